@@ -0,0 +1,71 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Benchmark of the full driver path (pack + init + display_frame) run against the fake hardware backend.
+# It also checks the frames decoded by the fake panel and prints a digest of the byte stream sent,
+# so changes to what goes over the wire are easy to spot.
+# Run from the project directory: python3 -m benchmarks.display_frame [repeat]
+
+import hashlib
+import os
+import sys
+import time
+
+os.environ["EPAPER_HW_BACKEND"] = "fake"
+os.environ.setdefault("EPAPER_FAKE_TIME_SCALE", "0")
+
+from epds import epdif, fake_hw, epd2in7b, epd4in2, lut_profiles      # noqa: E402
+from benchmarks.frame_buffer import sample_image        # noqa: E402
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, module, tri_color in [('2.7" (epd2in7b)', epd2in7b, True), ('4.2" (epd4in2)', epd4in2, False)]:
+        epd = module.EPD()
+        black = sample_image(epd.width, epd.height)
+        red = black.transpose(0)    # FLIP_LEFT_RIGHT - just to have something different on red plane
+
+        start = time.perf_counter()
+        epd.init()
+        init_ms = (time.perf_counter() - start) * 1000
+
+        fake_hw.PANEL.clear_log()
+        encode_ms = transfer_ms = 0.0
+        for i in range(repeat):
+            start = time.perf_counter()
+            frames = [epd.get_frame_buffer(black, 0)] + ([epd.get_frame_buffer(red, 1)] if tri_color else [])
+            encoded = time.perf_counter()
+            epd.display_frame(*frames)
+            encode_ms += (encoded - start) * 1000
+            transfer_ms += (time.perf_counter() - encoded) * 1000
+
+        displayed_black, displayed_red = fake_hw.PANEL.frames[-1]
+        if displayed_black.tobytes() != black.tobytes() or (tri_color and displayed_red.tobytes() != red.tobytes()):
+            raise AssertionError("{}: frame decoded by the fake panel differs from the one sent".format(name))
+
+        print("{} {}x{}:".format(name, epd.width, epd.height))
+        print("  init           : {:8.2f} ms".format(init_ms))
+        print("  encode / frame : {:8.2f} ms".format(encode_ms / repeat))
+        print("  display / frame: {:8.2f} ms (incl. simulated busy time, scale: {})".format(transfer_ms / repeat, fake_hw.TIME_SCALE))
+        print("  simulated refresh: {:.0f} ms".format(fake_hw.PANEL.refresh_durations[-1]))
+        print("  stream sha1    : {}".format(hashlib.sha1(fake_hw.PANEL.stream()).hexdigest()))
+
+        # deep sleep between refreshes and waking up (reset & init) before the next one
+        epd.sleep()
+        epd.wake()
+        print("  sleep / wake   : {:8.2f} / {:.2f} ms".format(epdif.POWER_STATS.last('sleep'), epdif.POWER_STATS.last('wake')))
+
+    # LUT profiles of 2.7" are switched per refresh (no re-init), the refresh time is derived from waveforms uploaded
+    epd = epd2in7b.EPD()
+    epd.init()
+    frames = [epd.get_frame_buffer(sample_image(epd.width, epd.height), plane) for plane in (0, 1)]
+    print('2.7" LUT profiles:')
+    for profile in sorted(lut_profiles.PROFILES):
+        epd.display_frame(frames[0], frames[1], profile)
+        print("  {:14} : {:8.0f} ms simulated refresh".format(profile, fake_hw.PANEL.refresh_durations[-1]))
+    print("transfers: {}".format(epdif.TRANSFER_STATS.format()))
+    print("busy: {}".format(epdif.BUSY_STATS.format()))
+    print("power: {}".format(epdif.POWER_STATS.format()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Provider data the benchmarks render screens of - the usual day, warnings (painted red), long alerts
+# and huge values (that make the texts shrink to fit).
+
+from providers.airly import Airly
+from providers.gmaps import GMaps
+from providers.openweather import OpenWeather
+from providers.system_info import SystemInfo
+
+
+WEATHER = OpenWeather.DEFAULT._replace(temp=21.4, temp_min=12, temp_max=25, icon='01d',
+                                       summary='Sunny and warm all day long with a gentle breeze', forecast_summary='Rain tomorrow')
+AQI = Airly.DEFAULT._replace(aqi=42, pm25=10, pm10=20, temperature=19.5, humidity=40, pressure=1013, level='VERY_LOW',
+                             advice='Breathe freely, the air is clean today and you can go out')
+GMAPS = GMaps.DEFAULT._replace(time_to_dest=600, time_to_dest_in_traffic=700, distance='12 km',
+                               origin_address='Home street 1, City, Country', destination_address='Work avenue 12, Big City, Country')
+SYSTEM = SystemInfo.DEFAULT._replace(uptime='12 days, 3:45', cpu_usage='7.5%', mem_usage='41.2%', free_disk='11.3 GB')
+
+# name -> (weather, aqi, gmaps1, gmaps2)
+FIXTURES = {
+    'normal': (WEATHER, AQI, GMAPS, GMAPS._replace(time_to_dest=900, time_to_dest_in_traffic=960)),
+    'warnings': (WEATHER._replace(icon='11d', nearest_storm_distance=5), AQI._replace(aqi=180, level='HIGH'),
+                 GMAPS._replace(time_to_dest_in_traffic=1200), GMAPS._replace(time_to_dest_in_traffic=1500)),
+    'long-alert': (WEATHER._replace(temp=-3, icon='13d', alert_title='Snow storm',
+                                    alert_description='Severe snow storm with strong wind gusts and heavy snowfall expected from the '
+                                                      'evening until the morning, roads may become impassable, avoid travelling'),
+                   AQI, GMAPS, GMAPS),
+    'huge-values': (WEATHER._replace(temp=-27, temp_min=-35, temp_max=-18), AQI._replace(aqi=1234, pm25=999, pm10=1500),
+                    GMAPS._replace(time_to_dest_in_traffic=60000), GMAPS._replace(time_to_dest=6000, time_to_dest_in_traffic=600000))
+}
@@ -0,0 +1,68 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Microbenchmark: original per-pixel get_frame_buffer() loops vs. bulk FramePacker.
+# Run from the project directory: python3 -m benchmarks.frame_buffer
+
+import sys
+import time
+from PIL import Image, ImageDraw, ImageFont
+
+from epds.packer import FramePacker, numpy
+
+
+# a copy of the original loop of epd2in7b.py (invert=True) and epd4in2.py (invert=False)
+def legacy_frame_buffer(image, width, height, invert):
+    buf = [0xFF if invert else 0] * int(width * height / 8)
+    pixels = image.convert('1').load()
+    for y in range(height):
+        for x in range(width):
+            if pixels[x, y] != 0:
+                if invert:
+                    buf[int((x + y * width) / 8)] &= ~(0x80 >> (x % 8))
+                else:
+                    buf[int((x + y * width) / 8)] |= 0x80 >> (x % 8)
+    return buf
+
+
+def sample_image(width, height):
+    image = Image.new('1', (width, height), 1)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.truetype('./resources/font/default', int(height / 4))
+    draw.rectangle((0, int(height / 2), width, height), fill=0)
+    draw.text((5, 5), "12:34", font=font, fill=0)
+    draw.text((5, int(height / 2) + 5), "-7° 42", font=font, fill=255)
+    return image
+
+
+def measure(fn, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000.0
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, width, height, invert in [('2.7" (epd2in7b)', 176, 264, True), ('4.2" (epd4in2)', 400, 300, False)]:
+        image = sample_image(width, height)
+        blank = Image.new('1', (width, height), 1)
+
+        expected = bytes(legacy_frame_buffer(image, width, height, invert))
+        packers = [('bytes', FramePacker(width, height, invert, use_numpy=False))]
+        if numpy is not None:
+            packers.append(('numpy', FramePacker(width, height, invert, use_numpy=True)))
+
+        print("{} {}x{}:".format(name, width, height))
+        print("  legacy loop    : {:8.2f} ms".format(measure(lambda: legacy_frame_buffer(image, width, height, invert), repeat)))
+        for packer_name, packer in packers:
+            if bytes(packer.pack(image)) != expected:
+                raise AssertionError("{} packer output differs from the legacy loop".format(packer_name))
+            print("  {:15}: {:8.3f} ms".format(packer_name + " packer", measure(lambda: packer.pack(image), repeat * 20)))
+            print("  {:15}: {:8.3f} ms".format(packer_name + " blank", measure(lambda: packer.pack(blank), repeat * 20)))
+
+
+if __name__ == '__main__':
+    main()
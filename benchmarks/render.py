@@ -0,0 +1,77 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Benchmark of rendering the main screen for a panel: the virtual 400x300 canvas rotated & resized to the panel
+# resolution (as it used to be done) vs. rendering at the panel resolution with a (lossless) rotation only.
+# It also measures a minute tick of the retained main screen (widgets.py), where only the clock is re-rendered.
+# Run from the project directory: python3 -m benchmarks.render [repeat]
+
+import sys
+from PIL import Image
+
+from benchmarks.frame_buffer import measure
+from drawing import Drawing
+from widgets import MainScreen
+from providers.airly import Airly
+from providers.gmaps import GMaps
+from providers.openweather import OpenWeather
+
+
+WEATHER = OpenWeather.DEFAULT._replace(temp=21.4, temp_min=12, temp_max=25, icon='01d',
+                                       alert_description='Severe thunderstorms with hail expected in the afternoon')
+AQI = Airly.DEFAULT._replace(aqi=180, temperature=19.5)
+GMAPS1 = GMaps.DEFAULT._replace(time_to_dest=600, time_to_dest_in_traffic=700)
+GMAPS2 = GMaps.DEFAULT._replace(time_to_dest=600, time_to_dest_in_traffic=1200)
+
+
+def new_drawing(width=Drawing.CANVAS_WIDTH, height=Drawing.CANVAS_HEIGHT):
+    return Drawing('si', 10, 75, 50, 50, width, height)
+
+
+def render(drawing, is_mono, formatted_time="1234"):
+    return drawing.draw_frame(is_mono, formatted_time, True, WEATHER, True, False, AQI, GMAPS1, GMAPS2)
+
+
+def legacy(drawing, is_mono, width, height):
+    black_buf, red_buf = render(drawing, is_mono)
+    if (width, height) != black_buf.size:
+        black_buf = black_buf.transpose(Image.ROTATE_90).resize((width, height), Image.LANCZOS)
+        red_buf = red_buf.transpose(Image.ROTATE_90).resize((width, height), Image.LANCZOS)
+    return black_buf, red_buf
+
+
+def native(drawing, is_mono, width, height):
+    black_buf, red_buf = render(drawing, is_mono)
+    if (width, height) != black_buf.size:
+        black_buf = black_buf.transpose(Image.ROTATE_90)
+        red_buf = red_buf.transpose(Image.ROTATE_90)
+    return black_buf, red_buf
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    for name, width, height, is_mono in [('2.7" (epd2in7b)', 176, 264, False), ('4.2" (epd4in2)', 400, 300, True)]:
+        virtual = new_drawing()
+        scaled = new_drawing(max(width, height), min(width, height))
+        # warm-up, so the resources are cached and only rendering is measured
+        for frame in [legacy(virtual, is_mono, width, height), native(scaled, is_mono, width, height)]:
+            if frame[0].size != (width, height):
+                raise AssertionError("{}: frame of {} rendered instead of {}".format(name, frame[0].size, (width, height)))
+
+        legacy_ms = measure(lambda: legacy(virtual, is_mono, width, height), repeat)
+        native_ms = measure(lambda: native(scaled, is_mono, width, height), repeat)
+        print("{} {}x{}:".format(name, width, height))
+        print("  virtual canvas + rotate & resize: {:8.2f} ms".format(legacy_ms))
+        print("  panel resolution + rotate       : {:8.2f} ms".format(native_ms))
+        print("  saved per frame                 : {:8.2f} ms ({:.0f}%)".format(legacy_ms - native_ms, 100.0 * (legacy_ms - native_ms) / legacy_ms))
+
+        main_screen = MainScreen(scaled)
+        ticks = ["12%02d" % minute for minute in range(60)]
+        for formatted_time in ticks[:2]:
+            if [plane.tobytes() for plane in render(main_screen, is_mono, formatted_time)] != [plane.tobytes() for plane in render(scaled, is_mono, formatted_time)]:
+                raise AssertionError("{}: retained main screen differs from draw_frame".format(name))
+        tick_ms = measure(lambda: render(main_screen, is_mono, ticks.pop()), min(repeat, len(ticks)))
+        print("  retained widgets, minute tick   : {:8.2f} ms".format(tick_ms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Scaling benchmark: the main screen (all the fixtures, benchmarks/fixtures.py) is rendered and encoded at resolutions
+# of panels from 2.7" up to 12.48" - the layout is scaled to each one (no resampling of frames). Costs are reported
+# per resolution together with a linear fit (ms = fixed + per megapixel) of every stage and its goodness (r^2).
+# Rendering & encoding are expected to scale linearly with pixel count (or better) - the suite fails (exit code 1)
+# if a stage costs more per pixel at the biggest resolution than at the 4.2" one by more than the threshold.
+#
+# Run from the project directory: python3 -m benchmarks.scaling [--repeat N] [--threshold 0.5] [--output report.json]
+
+import argparse
+import json
+import sys
+
+from benchmarks.fixtures import FIXTURES
+from benchmarks.suite import run_stage
+import compositor
+from drawing import Drawing
+from epds.packer import FramePacker
+from widgets import MainScreen
+
+
+# name, width, height (landscape) - the reference resolution (4.2") is the one of the virtual canvas
+RESOLUTIONS = [
+    ('2.7', 264, 176),
+    ('4.2', 400, 300),
+    ('7.5-v1', 640, 384),
+    ('7.5', 800, 480),
+    ('12.48', 1304, 984),
+]
+REFERENCE = '4.2'
+
+
+def stages(width, height):
+    drawing = Drawing('si', 10, 75, 50, 50, width, height)
+    packers = [FramePacker(width, height, False), FramePacker(width, height, True)]
+    frames = [drawing.draw_frame(False, "1234", True, weather, False, False, aqi, gmaps1, gmaps2)
+              for weather, aqi, gmaps1, gmaps2 in [FIXTURES[fixture] for fixture in sorted(FIXTURES)]]
+
+    def render():
+        for weather, aqi, gmaps1, gmaps2 in [FIXTURES[fixture] for fixture in sorted(FIXTURES)]:
+            drawing.draw_frame(False, "1234", True, weather, False, False, aqi, gmaps1, gmaps2)
+
+    def encode():
+        for planes in frames:
+            for packer, plane in zip(packers, planes):
+                packer.pack(plane)
+
+    result = [('render', render), ('encode', encode)]
+    if compositor.numpy is not None:
+        main_screen = MainScreen(drawing)
+        composed = []
+        for weather, aqi, gmaps1, gmaps2 in [FIXTURES[fixture] for fixture in sorted(FIXTURES)]:
+            frame = compositor.TriColorCompositor(width, height)
+            composed.append(main_screen.compose(frame, False, "1234", True, weather, False, False, aqi, gmaps1, gmaps2))
+
+        def encode_composed():
+            for frame in composed:
+                frame.packed(True)
+        result.append(('encode_composed', encode_composed))
+    return result
+
+
+def linear_fit(points):
+    # least squares of ms = fixed + per_mpix * megapixels, r^2 - how well a line explains the costs
+    n = float(len(points))
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    syy = sum((y - mean_y) ** 2 for _, y in points)
+    slope = sxy / sxx
+    return {
+        'fixed_ms': round(mean_y - slope * mean_x, 4),
+        'per_mpix_ms': round(slope, 4),
+        'r2': round(sxy * sxy / (sxx * syy), 4) if syy else 1.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rendering & encoding cost vs. panel resolution')
+    parser.add_argument('--repeat', type=int, default=10, help='runs of every stage (the best is taken)')
+    parser.add_argument('--threshold', type=float, default=0.5, help='allowed growth of per pixel cost (0.5 - 50%%)')
+    parser.add_argument('--output', help='a file to write the JSON report to (stdout by default)')
+    args = parser.parse_args()
+
+    results = {}
+    for name, width, height in RESOLUTIONS:
+        megapixels = width * height / 1e6
+        for stage, fn in stages(width, height):
+            ms = run_stage(fn, args.repeat)['ms']
+            results.setdefault(stage, {})[name] = {
+                'pixels': width * height,
+                'ms': ms,
+                'ms_per_mpix': round(ms / megapixels, 4)
+            }
+
+    report = {'stages': {}, 'failures': []}
+    biggest = max(RESOLUTIONS, key=lambda resolution: resolution[1] * resolution[2])[0]
+    for stage, by_resolution in sorted(results.items()):
+        fit = linear_fit([(result['pixels'] / 1e6, result['ms']) for result in by_resolution.values()])
+        growth = by_resolution[biggest]['ms_per_mpix'] / by_resolution[REFERENCE]['ms_per_mpix']
+        report['stages'][stage] = {'resolutions': by_resolution, 'fit': fit, 'per_pixel_growth': round(growth, 3)}
+        if growth > 1 + args.threshold:
+            report['failures'].append({'stage': stage, 'per_pixel_growth': round(growth, 3)})
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            fp.write(output + '\n')
+    else:
+        print(output)
+
+    for failure in report['failures']:
+        sys.stderr.write("Superlinear cost of {stage}: {per_pixel_growth}x per pixel at the biggest resolution\n".format(**failure))
+    if report['failures']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Rendering benchmark suite: the main screen (draw_frame, retained widgets & the NumPy compositor) of every fixture
+# (benchmarks/fixtures.py) and all the details screens are rendered, encoded by the display drivers' packers and sent
+# to the fake hardware backend - per panel. Timings (best & median of runs) and allocations (peak & retained, as seen
+# by tracemalloc - Python & NumPy memory, not Pillow's image buffers) of every stage are reported as JSON.
+#
+# With a baseline stored (--save-baseline) the suite fails (exit code 1) if a stage regresses past it by more than
+# the threshold (and by more than a noise floor). Baselines are machine specific - store them where you compare.
+#
+# Run from the project directory: python3 -m benchmarks.suite [--repeat N] [--output report.json]
+#                                 [--baseline benchmarks/baseline.json] [--save-baseline] [--threshold 0.5]
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+os.environ["EPAPER_HW_BACKEND"] = "fake"
+os.environ["EPAPER_FAKE_TIME_SCALE"] = "0"
+
+import PIL      # noqa: E402
+from PIL import Image        # noqa: E402
+
+import compositor       # noqa: E402
+from benchmarks.fixtures import FIXTURES, AQI, GMAPS, SYSTEM, WEATHER       # noqa: E402
+from drawing import Drawing     # noqa: E402
+from epds import epd2in7b, epd4in2, epd7in5, fake_hw       # noqa: E402
+from widgets import MainScreen      # noqa: E402
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# a stage regresses if it is slower (or allocates more) by the threshold and by more than these
+NOISE_FLOOR_MS = 0.2
+NOISE_FLOOR_KIB = 16
+# times a regressed stage is measured again before it is reported
+RETRIES = 2
+
+# name, driver, tri-color
+PANELS = [('2.7', epd2in7b, True), ('4.2', epd4in2, False), ('7.5', epd7in5, False)]
+
+
+def run_stage(fn, repeat):
+    fn()    # warm-up, caches are filled (fonts, atlases, layouts, packers' buffers) - steady state is measured
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'ms': round(timings[0], 4),
+        'median_ms': round(timings[len(timings) // 2], 4),
+        'alloc_kib': round((peak - before) / 1024.0, 2),
+        'retained_kib': round((current - before) / 1024.0, 2)
+    }
+
+
+def panel_frames(epd, black_buf, red_buf):
+    if black_buf.size != (epd.width, epd.height):
+        black_buf = black_buf.transpose(Image.ROTATE_90)
+        red_buf = red_buf.transpose(Image.ROTATE_90)
+    return black_buf, red_buf
+
+
+def encoder(epd, tri_color, planes):
+    return lambda: [bytes(epd.get_frame_buffer(plane, index)) for index, plane in enumerate(planes[:2 if tri_color else 1])]
+
+
+def sender(epd, tri_color, frames):
+    def send():
+        fake_hw.PANEL.clear_log()
+        epd.display_frame(*frames[:2 if tri_color else 1])
+    return send
+
+
+def fixture_stages(name, fixture, epd, tri_color, drawing, main_screen, frame, ticks):
+    weather, aqi, gmaps1, gmaps2 = FIXTURES[fixture]
+
+    def frame_inputs(formatted_time="1234"):
+        return (not tri_color, formatted_time, True, weather, False, False, aqi, gmaps1, gmaps2)
+
+    def tick():
+        # the retained main screen a minute later - the clock is re-rendered only
+        ticks.append(ticks.pop(0))
+        return main_screen.draw_frame(*frame_inputs(ticks[0]))
+
+    def compose():
+        main_screen.compose(frame, *frame_inputs(ticks[0]))
+
+    prefix = '{}/{}/'.format(name, fixture)
+    planes = panel_frames(epd, *drawing.draw_frame(*frame_inputs()))
+    stages = [
+        (prefix + 'draw_frame', lambda: drawing.draw_frame(*frame_inputs())),
+        (prefix + 'main_screen_tick', tick),
+        (prefix + 'encode', encoder(epd, tri_color, planes))
+    ]
+    if frame is not None:
+        stages.append((prefix + 'compose', compose))
+        compose()
+        stages.append((prefix + 'compose_encode', lambda: frame.packed(epd.PACKER_INVERT, drawing.width != epd.width, 2 if tri_color else 1)))
+    stages.append((prefix + 'transfer', sender(epd, tri_color, encoder(epd, tri_color, planes)())))
+    return stages
+
+
+def panel_stages(name, module, tri_color):
+    # (name, function) of the stages of a panel, in the order they are to be run
+    epd = module.EPD()
+    epd.init()
+    drawing = Drawing('si', 10, 75, 50, 50, max(epd.width, epd.height), min(epd.width, epd.height))
+    main_screen = MainScreen(drawing)
+    frame = compositor.TriColorCompositor(drawing.width, drawing.height) if compositor.numpy is not None else None
+    ticks = ["12%02d" % minute for minute in range(60)]
+
+    stages = []
+    for fixture in sorted(FIXTURES):
+        stages.extend(fixture_stages(name, fixture, epd, tri_color, drawing, main_screen, frame, ticks))
+
+    details = {
+        'aqi': lambda: drawing.draw_aqi_details(AQI),
+        'gmaps': lambda: drawing.draw_gmaps_details(GMAPS, GMAPS._replace(time_to_dest_in_traffic=1200)),
+        'weather': lambda: drawing.draw_weather_details(WEATHER),
+        'system': lambda: drawing.draw_system_details(SYSTEM)
+    }
+    for screen, draw in sorted(details.items()):
+        prefix = '{}/details-{}/'.format(name, screen)
+        stages.append((prefix + 'render', draw))
+        stages.append((prefix + 'encode', encoder(epd, tri_color, panel_frames(epd, *draw()))))
+    return stages
+
+
+def regressions(results, baseline, threshold):
+    found = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric, floor in [('ms', NOISE_FLOOR_MS), ('alloc_kib', NOISE_FLOOR_KIB)]:
+            if result[metric] > base[metric] * (1 + threshold) and result[metric] - base[metric] > floor:
+                found.append({'stage': key, 'metric': metric, 'baseline': base[metric], 'value': result[metric]})
+    return found
+
+
+def confirm(stages, results, baseline, threshold, repeat):
+    # stages that seem to have regressed are measured again (a busy machine makes single runs noisy),
+    # the best of the measurements counts
+    for retry in range(RETRIES):
+        suspects = set(regression['stage'] for regression in regressions(results, baseline, threshold))
+        if not suspects:
+            break
+        for key in suspects:
+            again = run_stage(stages[key], repeat)
+            results[key] = dict((metric, min(results[key][metric], value)) for metric, value in again.items())
+    return regressions(results, baseline, threshold)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rendering benchmark suite')
+    parser.add_argument('--repeat', type=int, default=20, help='runs of every stage (the best & median are reported)')
+    parser.add_argument('--output', help='a file to write the JSON report to (stdout by default)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='stored stages to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='store the stages as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.5, help='allowed regression (0.5 - 50%% slower or bigger)')
+    args = parser.parse_args()
+
+    stages = {}
+    results = {}
+    for name, module, tri_color in PANELS:
+        for key, stage in panel_stages(name, module, tri_color):
+            stages[key] = stage
+            results[key] = run_stage(stage, args.repeat)
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'pillow': PIL.__version__,
+            'numpy': compositor.numpy.__version__ if compositor.numpy is not None else None,
+            'repeat': args.repeat
+        },
+        'stages': results
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as fp:
+            report['baseline'] = args.baseline
+            report['regressions'] = confirm(stages, results, json.load(fp), args.threshold, args.repeat)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            fp.write(output + '\n')
+    else:
+        print(output)
+
+    if report.get('regressions'):
+        for regression in report['regressions']:
+            sys.stderr.write("Regression of {stage} ({metric}): {baseline} -> {value}\n".format(**regression))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 # https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
 
 import logging
-import RPi.GPIO as GPIO
+from epds.hardware import GPIO
 
 
 class Buttons(object):
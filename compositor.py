@@ -0,0 +1,76 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+BLACK = 1
+RED = 2
+
+
+class TriColorCompositor(object):
+
+    # The main screen frame held as a single array of 2-bit pixels (bit 0: black, bit 1: red, none set: white)
+    # instead of two PIL canvases. Widget tiles are applied as layers (vectorized, with masks) and both planes
+    # are taken out of the array at once - already rotated for a panel and ready to be packed for SPI.
+    # Requires NumPy.
+
+
+    def __init__(self, width, height):
+        if numpy is None:
+            raise ValueError('NumPy is required by the tri-color compositor')
+        self.frame = numpy.zeros((height, width), dtype=numpy.uint8)
+        self.layers_applied = 0
+
+
+    def clear(self):
+        self.frame.fill(0)
+
+
+    def apply(self, layer):
+        # the bits of painted planes are replaced within the box, the bits of other planes are kept - the same as
+        # pasting tiles onto the canvases with masks does
+        (x0, y0, x1, y1), keep, paint = layer
+        region = self.frame[y0:y1, x0:x1]
+        region &= keep
+        region |= paint
+        self.layers_applied += 1
+
+
+    def planes(self, rotate=False):
+        # boolean arrays of colored pixels (black, red), rotated by 90 degrees (counter clockwise) for portrait panels
+        frame = numpy.rot90(self.frame) if rotate else self.frame
+        return (frame & BLACK) != 0, (frame & RED) != 0
+
+
+    def packed(self, invert, rotate=False, planes=2):
+        # the planes (black, red - or black only) packed for SPI at once, in a single pass over the frame
+        # invert - as of FramePacker (True: a set bit is colored), rotate - as of planes()
+        frame = numpy.rot90(self.frame) if rotate else self.frame
+        colored = numpy.stack([(frame & bit) != 0 for bit in [BLACK, RED][:planes]])
+        packed = numpy.packbits(colored.reshape(planes, -1), axis=1)
+        if not invert:
+            numpy.invert(packed, out=packed)
+        return [plane.tobytes() for plane in packed]
+
+
+def make_layer(tiles):
+    # tiles - (image, mask, offset) of the planes (black, red) as cut by Widget.tile, None if nothing is painted on it
+    painted = [(bit, tile) for bit, tile in zip([BLACK, RED], tiles) if tile is not None]
+    if not painted:
+        return None
+    x0 = min(tile[2][0] for _, tile in painted)
+    y0 = min(tile[2][1] for _, tile in painted)
+    x1 = max(tile[2][0] + tile[0].size[0] for _, tile in painted)
+    y1 = max(tile[2][1] + tile[0].size[1] for _, tile in painted)
+
+    keep = numpy.full((y1 - y0, x1 - x0), BLACK | RED, dtype=numpy.uint8)
+    paint = numpy.zeros((y1 - y0, x1 - x0), dtype=numpy.uint8)
+    for bit, (image, mask, offset) in painted:
+        box = (slice(offset[1] - y0, offset[1] - y0 + image.size[1]), slice(offset[0] - x0, offset[0] - x0 + image.size[0]))
+        mask = numpy.asarray(mask)
+        keep[box][mask] &= ~bit & (BLACK | RED)
+        paint[box][mask & ~numpy.asarray(image)] |= bit     # 1-bit images: False means black (colored)
+    return (x0, y0, x1, y1), keep, paint
@@ -0,0 +1,82 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import logging
+import threading
+
+
+class DisplayWorker(object):
+
+    # Pushes frames to the display on its own thread so the main loop can fetch & render meanwhile.
+    # There's a single slot for a pending frame - the latest frame wins, the one superseded
+    # before being transmitted is dropped (there's no point in displaying an outdated screen).
+
+
+    def __init__(self, display_action):
+        self._display_action = display_action
+        self._condition = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._stopped = False
+        self.displayed = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self.run, name='display-worker')
+        self._thread.daemon = True
+        self._thread.start()
+
+
+    def submit(self, *frame):
+        with self._condition:
+            if self._stopped:
+                logging.warning("Display worker stopped - frame ignored")
+                return
+            if self._pending is not None:
+                self.dropped += 1
+                logging.info("Frame superseded before being displayed - dropped (%d so far)" % self.dropped)
+            self._pending = frame
+            self._condition.notify_all()
+
+
+    def flush(self, timeout=None):
+        # waits until the pending frame (if any) has been displayed, returns False on timeout
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+
+    def stop(self, timeout=None):
+        flushed = self.flush(timeout)
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        return flushed
+
+
+    def busy(self):
+        with self._condition:
+            return self._busy or self._pending is not None
+
+
+    def pending(self):
+        # whether there's a frame waiting to be displayed next
+        with self._condition:
+            return self._pending is not None
+
+
+    def run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._stopped)
+                if self._pending is None:
+                    return
+                frame = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                self._display_action(*frame)
+            except Exception as e:
+                logging.exception(e)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self.displayed += 1
+                    self._condition.notify_all()
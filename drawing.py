@@ -4,9 +4,11 @@
 # Modifications: https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
 
 from PIL import Image, ImageDraw, ImageFont
-import textwrap
 
-from resources import icons
+import render_plan
+from layout import TextLayout
+from render_plan import FrameInputs
+from resources.cache import ResourceCache
 
 
 class Drawing(object):
@@ -22,203 +24,112 @@ class Drawing(object):
     PM_SYMBOL = 'µg/m³'
 
 
-    def __init__(self, weather_units, storm_distance_warn, aqi_warn_level, primary_time_warn_above, secondary_time_warn_above):
+    def __init__(self, weather_units, storm_distance_warn, aqi_warn_level, primary_time_warn_above, secondary_time_warn_above,
+                 width=CANVAS_WIDTH, height=CANVAS_HEIGHT, layout_path=render_plan.LAYOUT_PATH):
+        # width, height - size of frames to render (i.e. of a panel), the layout is defined for the virtual canvas and scaled to it
+        # layout_path - the main screen layout (see render_plan.py), compiled into a render plan for the resolution
         self.distance_symbol = 'km' if weather_units == 'si' else 'mi'
         self.storm_distance_warn = storm_distance_warn
         self.aqi_warn_level = aqi_warn_level
         self.primary_time_warn_above = primary_time_warn_above
         self.secondary_time_warn_above = secondary_time_warn_above
+        self.width = width
+        self.height = height
+        self.resources = ResourceCache(resolution=(width, height))
+        self.scale_x = float(width) / self.CANVAS_WIDTH
+        self.scale_y = float(height) / self.CANVAS_HEIGHT
+        # fonts can be scaled proportionally only - the smaller scale so the text fits
+        self.scale_font = min(self.scale_x, self.scale_y)
+        self.scale = (self.scale_x, self.scale_y)
+        self.layout = TextLayout(self.resources.font)
+        self.plan = render_plan.compile_layout(render_plan.load(layout_path), self)
 
 
-    def load_font(self, font_size):
-        return ImageFont.truetype('./resources/font/default', int(font_size))
-
+    def new_canvas(self, color=1):
+        return Image.new('1', (self.width, self.height), color)
 
-    def draw_text(self, x, y, text, font_size, draw, color=0):
-        font = self.load_font(font_size)
-        draw.text((x, y), text, font=font, fill=color)
-        return y + font_size * 1.2  # +20%
-
-
-    def draw_multiline_text(self, x, y, text, font_size, draw, color=0):
-        height = 0
-        font = self.load_font(font_size)
-        text_length = font.getlength(text)
-        if text_length * 1.05 > self.CANVAS_WIDTH - x:
-            break_at = len(text) * (self.CANVAS_WIDTH - x) / text_length  # rough estimation (proportion: text width to screen size minus start pos vs unknown to string len)
-            lines = textwrap.wrap(text, width=int(break_at))
-            line_counter = 0
-            for line in lines:
-                draw.text((x, int(y + line_counter * font_size * 1.1)), line, font=font, fill=color)
-                line_counter += 1
-                height += font_size * 1.2
-        else:
-            draw.text((x, y), text, font=font, fill=color)
-            height += font_size * 1.2
 
-        return y + height
+    def xy(self, x, y):
+        # virtual canvas coordinates to the frame ones
+        return (x * self.scale_x, y * self.scale_y)
 
 
-    def draw_weather_icon(self, buf, fn_icon, pos):
-        img_icon = Image.open("./resources/icons/" + fn_icon)
-        buf.paste(img_icon, pos)
+    def paste_xy(self, x, y):
+        return (int(x * self.scale_x), int(y * self.scale_y))
 
 
-    def draw_weather(self, buf, red_buf, weather, airly, prefer_airly_local_temp, black_on_red):
-        start_pos = (0, 200)
+    def box(self, x0, y0, x1, y1):
+        return (int(x0 * self.scale_x), int(y0 * self.scale_y), int(x1 * self.scale_x), int(y1 * self.scale_y))
 
-        back = Image.open('./resources/images/back.bmp')
-        buf.paste(back, start_pos)
 
-        icon = icons.weather_icons.get(weather.icon, None)
+    def font_size(self, font_size):
+        # font size (virtual canvas) to the frame one
+        return int(font_size * self.scale_font)
 
-        if icon is not None:
-            self.draw_weather_icon(
-                buf,
-                icon,
-                [start_pos[0] + 15, start_pos[1] + 15]
-            )
 
-        draw = ImageDraw.Draw(buf)
-        red_draw = ImageDraw.Draw(red_buf)
-
-        top_y = start_pos[1] - 6
-
-        current_temp = weather.temp
-        if prefer_airly_local_temp and airly.temperature is not None:
-            current_temp = airly.temperature
-
-        caption = "{:0.0f}{}".format(current_temp, self.TEMPERATURE_SYMBOL)
-        self.draw_text(85, top_y, caption, 90, draw, 255)
+    def load_font(self, font_size):
+        return self.resources.font(self.font_size(font_size))
 
-        storm_distance_warning = self.storm_distance_warn
 
-        if weather.alert_description is not None:
-            top_y = top_y + 3
-            caption = "[!] {}".format(weather.alert_description.lower())
-            draw.rectangle((215, top_y + 5, self.CANVAS_WIDTH - 10, top_y + 95), 255, 255)
-            red_draw.rectangle((215, top_y + 5, self.CANVAS_WIDTH - 10, top_y + 95), 0, 0)
-            if black_on_red:
-                self.draw_multiline_text(220, top_y, caption, 23, draw, 0)      # black text
-            self.draw_multiline_text(220, top_y, caption, 23, red_draw, 255)    # on red canvas
-        elif weather.nearest_storm_distance is not None and weather.nearest_storm_distance <= storm_distance_warning:
-            top_y = top_y + 3
-            caption = "Storm @ {}{}".format(weather.nearest_storm_distance, self.distance_symbol)
-            draw.rectangle((215, top_y + 5, self.CANVAS_WIDTH - 10, top_y + 95), 255, 255)
-            red_draw.rectangle((215, top_y + 5, self.CANVAS_WIDTH - 10, top_y + 95), 0, 0)
-            top_y = top_y + 7
-            if black_on_red:
-                self.draw_multiline_text(230, top_y, caption, 40, draw, 0)      # black text
-            self.draw_multiline_text(230, top_y, caption, 40, red_draw, 255)    # on red canvas
-        else:
-            top_y = top_y + 17
-            caption = "{:0.0f}{} {:0.0f}{}".format(weather.temp_min, self.TEMPERATURE_SYMBOL, weather.temp_max, self.TEMPERATURE_SYMBOL)
-            self.draw_text(205, top_y, caption, 60, draw, 255)
-
-
-    def draw_clock(self, img_buf, formatted_time, use_hrs_mins_separator):
-        start_pos = (0, 0)
-        im_width = 100
-        offs = 0
-        for n in formatted_time:
-            if n == " ":
-                n = "_SPACE"
-            fn = 'resources/images/%s.bmp' % n
-            img_num = Image.open(fn)
-            img_num = img_num.resize((img_num.size[0], (int)(img_num.size[1] / 2)), Image.NEAREST)
-            img_buf.paste(img_num, (start_pos[0] + offs, start_pos[1]))
-            offs += im_width
-        if use_hrs_mins_separator:
-            divider = Image.open('resources/images/clock-middle.bmp')
-            img_buf.paste(divider, (int(self.CANVAS_WIDTH / 2 - 10), start_pos[1] + 10))
-
-
-    def draw_text_aqi(self, x, y, text, text_size, draw, font_color=255):
-        font = self.load_font(text_size)
-        font_dims = font.getlength(text)
-
-        # lower font size to accommodate huge polution levels
-        if font_dims > 100:
-            font = self.load_font(text_size * 2 / 3)
-            draw.text((x, y + 15), text, font=font, fill=font_color)
+    def draw_glyphs(self, xy, text, font_size, draw, color=0):
+        # main screen texts are blitted from glyph atlases (rasterized if there are glyphs out of its charset)
+        # xy & font_size - of the frame, not the virtual canvas ones
+        atlas = self.resources.atlas(font_size)
+        if atlas.covers(text):
+            atlas.draw(draw, xy, text, color)
         else:
-            draw.text((x, y), text, font=font, fill=font_color)
-
-
-    def draw_text_eta(self, x, y, text, text_size, draw, font_color=255):
-        font = self.load_font(text_size)
-        font_width = font.getlength(text)
+            draw.text(xy, text, font=self.resources.font(font_size), fill=color)
 
-        # lower font size to accommodate time in minutes
-        if font_width > 100:
-            font = self.load_font(text_size * 2 / 3)
-        font_width = font.getlength(text)
 
-        # one more time lower font size to accommodate time in minutes - yes, would be nice to convert value to hours or ... days
-        if font_width > 100:
-            font = self.load_font(text_size * 2 / 4)
-
-        draw.text((x, y), text, font=font, fill=font_color)
-
-
-    def draw_aqi(self, black_buf, red_buf, aqi, black_on_red):
-        start_pos = (0, 100)
-        no_warn = aqi.aqi < self.aqi_warn_level
-        buf = black_buf if no_warn else red_buf
-
-        back = Image.open('./resources/images/back_aqi.bmp')
-        buf.paste(back, start_pos)
-
-        draw = ImageDraw.Draw(buf)
-
-        caption = "%3i" % int(round(aqi.aqi))
-        if not no_warn and black_on_red:
-            black_draw = ImageDraw.Draw(black_buf)
-            self.draw_text_aqi(start_pos[0] + 25, start_pos[1] - 5, caption, 90, black_draw, 0)
-        self.draw_text_aqi(start_pos[0] + 25, start_pos[1] - 5, caption, 90, draw, 255)
-
-
-    def draw_eta(self, idx, black_buf, red_buf, gmaps, warn_above_percent, black_on_red):
-        start_pos = (50  + ((idx + 1) * self.CANVAS_WIDTH) / 3, 100)
-        secs_in_traffic = 1.0 * gmaps.time_to_dest_in_traffic
-        secs = 1.0 * gmaps.time_to_dest
+    def draw_text(self, x, y, text, font_size, draw, color=0):
+        font = self.load_font(font_size)
+        draw.text(self.xy(x, y), text, font=font, fill=color)
+        return y + font_size * 1.2  # +20%
 
-        no_warn = secs < 0 or secs * (100.0 + warn_above_percent) / 100.0 > secs_in_traffic
-        buf = black_buf if no_warn else red_buf
 
-        back = Image.open("./resources/images/back_eta_{}.bmp".format(idx))
-        buf.paste(back, (int(((idx + 1) * self.CANVAS_WIDTH) / 3) , 100))
+    def draw_multiline_text(self, x, y, text, font_size, draw, color=0, right=None, bottom=None, min_font_size=None):
+        # the text is wrapped to fit between x and right, if bottom is given the font is lowered (down to min_font_size)
+        # for the text to fit above it - and cut if it doesn't fit still
+        right = right if right is not None else self.CANVAS_WIDTH - 10
+        max_width = (right - x) * self.scale_x
+        line_spacing = 1.1 * self.scale_y / self.scale_font     # lines are 10% apart (of the font size)
+        if bottom is None:
+            layout = self.layout.layout(text, self.font_size(font_size), max_width, None, line_spacing)
+        else:
+            layout = self.layout.fit(text, max_width, (bottom - y) * self.scale_y, self.font_size(font_size),
+                                     self.font_size(min_font_size or font_size), line_spacing)
+            font_size = layout.font_size / self.scale_font
 
-        draw = ImageDraw.Draw(buf)
+        for line_counter, line in enumerate(layout.lines):
+            self.draw_glyphs((x * self.scale_x, y * self.scale_y + line_counter * layout.line_height), line, layout.font_size, draw, color)
 
-        caption = "%2i" % int(round(secs_in_traffic / 60))
+        return y + len(layout.lines) * font_size * 1.2
 
-        if not no_warn and black_on_red:
-            black_draw = ImageDraw.Draw(black_buf)
-            self.draw_text_eta(start_pos[0], start_pos[1], caption, 70, black_draw, 0)  # black font on red canvas below
 
-        self.draw_text_eta(start_pos[0], start_pos[1], caption, 70, draw, 255)
+    def fit_text(self, text, max_width, text_size, min_text_size):
+        # the biggest font size (of the frame, not bigger than text_size) for the text to fit in max_width
+        return self.layout.fit(text, max_width * self.scale_x, None, self.font_size(text_size), self.font_size(min_text_size)).font_size
 
 
     def draw_starting(self, is_mono):
-        black_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
-        red_buf = black_buf if (is_mono) else Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
-        shutdown_icon = Image.open("./resources/images/starting.bmp")
+        black_buf = self.new_canvas(1)
+        red_buf = black_buf if (is_mono) else self.new_canvas(1)
+        shutdown_icon = self.resources.image("./resources/images/starting.bmp", red_buf.mode, self.scale)
         red_buf.paste(shutdown_icon, (0, 0))
         return black_buf, red_buf
 
 
     def draw_shutdown(self, is_mono):
-        black_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
-        red_buf = black_buf if (is_mono) else Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
-        shutdown_icon = Image.open("./resources/images/shutdown.bmp")
+        black_buf = self.new_canvas(1)
+        red_buf = black_buf if (is_mono) else self.new_canvas(1)
+        shutdown_icon = self.resources.image("./resources/images/shutdown.bmp", red_buf.mode, self.scale)
         red_buf.paste(shutdown_icon, (0, 0))
         return black_buf, red_buf
 
 
     def draw_aqi_details(self, aqi):
-        black_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
-        red_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
+        black_buf = self.new_canvas(1)
+        red_buf = self.new_canvas(1)
         draw = ImageDraw.Draw(black_buf)
 
         provider = aqi.provider
@@ -239,8 +150,8 @@ class Drawing(object):
 
 
     def draw_gmaps_details(self, gmaps1, gmaps2):
-        black_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
-        red_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
+        black_buf = self.new_canvas(1)
+        red_buf = self.new_canvas(1)
         draw = ImageDraw.Draw(black_buf)
         self.draw_text(10, 10, "Traffic info by {}".format(gmaps1.provider), 35, draw)
 
@@ -264,19 +175,19 @@ class Drawing(object):
             return address
 
     def draw_blanks(self):
-        black_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 0)
-        red_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 0)
-        white_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
+        black_buf = self.new_canvas(0)
+        red_buf = self.new_canvas(0)
+        white_buf = self.new_canvas(1)
         return black_buf, red_buf, white_buf
 
     def draw_weather_details(self, weather):
-        black_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
-        red_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
+        black_buf = self.new_canvas(1)
+        red_buf = self.new_canvas(1)
         draw = ImageDraw.Draw(black_buf)
         provider = weather.provider
         provider_text = "Weather by {}".format(provider)
-        provider_text_size = 32 if len(provider_text) < 31 else 23  # try to accomodate a bigger title by reducing font size
-        self.draw_text(10, 10, provider_text, provider_text_size, draw)
+        font = self.resources.font(self.fit_text(provider_text, self.CANVAS_WIDTH - 20, 32, 16))  # try to accomodate a bigger title by reducing font size
+        draw.text(self.xy(10, 10), provider_text, font=font, fill=0)
 
         self.draw_text(10, 65, "Temperature: {:.1f}{}".format(weather.temp, self.TEMPERATURE_SYMBOL), 30, draw)
         self.draw_text(10, 95, "Daily min: {:.1f}{}, max: {:.1f}{}".format(weather.temp_min, self.TEMPERATURE_SYMBOL, weather.temp_max, self.TEMPERATURE_SYMBOL), 30, draw)
@@ -293,8 +204,8 @@ class Drawing(object):
 
 
     def draw_system_details(self, sys_info):
-        black_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
-        red_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
+        black_buf = self.new_canvas(1)
+        red_buf = self.new_canvas(1)
         draw = ImageDraw.Draw(black_buf)
         self.draw_text(10, 10, "System info", 35, draw)
 
@@ -307,26 +218,18 @@ class Drawing(object):
 
 
     def draw_frame(self, is_mono, formatted_time, use_hrs_mins_separator, weather, prefer_airly_local_temp, black_on_red, aqi, gmaps1, gmaps2):
-        black_buf = Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
+        inputs = FrameInputs(formatted_time, use_hrs_mins_separator, weather, prefer_airly_local_temp, black_on_red, aqi, gmaps1, gmaps2)
+        black_buf = self.new_canvas(1)
 
         # for mono display we simply use black buffer so all the painting will be done in black
-        red_buf = black_buf if (is_mono) else Image.new('1', (self.CANVAS_WIDTH, self.CANVAS_HEIGHT), 1)
-
-        # draw clock into buffer
-        self.draw_clock(black_buf, formatted_time, use_hrs_mins_separator)
-
-        # draw time to dest into buffer
-        self.draw_eta(0, black_buf, red_buf, gmaps1, self.primary_time_warn_above, black_on_red)
-
-        # draw time to dest into buffer
-        self.draw_eta(1, black_buf, red_buf, gmaps2, self.secondary_time_warn_above, black_on_red)
-
-        # draw AQI into buffer
-        self.draw_aqi(black_buf, red_buf, aqi, black_on_red)
+        red_buf = black_buf if (is_mono) else self.new_canvas(1)
 
-        # draw weather into buffer
-        self.draw_weather(black_buf, red_buf, weather, aqi, prefer_airly_local_temp, black_on_red)
+        # the widgets of the main screen layout (clock, times to destinations, AQI & weather)
+        for widget in self.plan.widgets:
+            self.draw_widget(widget, black_buf, red_buf, inputs)
 
         return black_buf, red_buf
 
 
+    def draw_widget(self, widget, black_buf, red_buf, inputs):
+        render_plan.render(widget, self.plan, self, black_buf, red_buf, inputs)
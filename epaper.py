@@ -5,9 +5,20 @@ import logging
 import json
 import os
 import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
 from PIL import Image
 
 from drawing import Drawing
+from epds.stats import RollingStats
+from display_worker import DisplayWorker
+from frame_cache import FrameCache
+from widgets import MainScreen
+import compositor
+import render_plan
+from maintenance import Maintenance
 from providers.airly import Airly
 from providers.aqicn import Aqicn
 
@@ -18,6 +29,14 @@ from providers.meteoalarm import Meteoalarm
 
 from providers.gmaps import GMaps
 from providers.system_info import SystemInfo
+from providers.fetcher import Fetcher
+from providers import http_client
+from providers.scheduler import RefreshScheduler
+
+
+# a main screen rendered (and encoded) ahead of its minute - black & red are None if there's nothing new to display,
+# planes packed for the panel already if composed by TriColorCompositor
+PreparedFrame = namedtuple('PreparedFrame', ['dt', 'tick', 'formatted', 'black', 'red'])
 
 
 class EPaper(object):
@@ -45,12 +64,45 @@ class EPaper(object):
         EPD_WIDTH       = 400
         EPD_HEIGHT      = 300
         MONO_DISPLAY    = True
+    elif DEVICE_TYPE == 'waveshare-7.5':
+        # Display resolution for 7.5" (V2)
+        EPD_WIDTH       = 800
+        EPD_HEIGHT      = 480
+        MONO_DISPLAY    = True
     else:
         raise Exception('Incorrect epaper screen type: ' + DEVICE_TYPE)
 
 
     MONO_DISPLAY = os.environ.get("EPAPER_MONO", "true" if MONO_DISPLAY else "false") == "true"  # one may override but must replace relevant library edpXinX.py, by default lib for 2.7 is tri-color, 4.2 is mono
     FAST_REFRESH = os.environ.get("EPAPER_FAST_REFRESH", "false") == "true"
+    # LUT profiles (2.7" only, see epds/lut_profiles.py) used to refresh clock ticks, details screens and to clean the display
+    CLOCK_LUT = os.environ.get("EPAPER_CLOCK_LUT", "fast" if FAST_REFRESH else "standard")
+    DETAILS_LUT = os.environ.get("EPAPER_DETAILS_LUT", "standard")
+    MAINTENANCE_LUT = os.environ.get("EPAPER_MAINTENANCE_LUT", "deep-clean")
+    # an hour when anti-ghosting maintenance of the display may run (once a day, length depends on the number of refreshes done)
+    MAINTENANCE_HOUR = int(os.environ.get("EPAPER_MAINTENANCE_HOUR", "3"))
+    # push frames to the display on a separate thread, so the main loop isn't blocked by (long) display refreshes
+    ASYNC_DISPLAY = os.environ.get("EPAPER_ASYNC_DISPLAY", "true") == "true"
+    # partial refresh of changed screen parts (4.2" only), with a full refresh if too much has changed or every N partial refreshes
+    PARTIAL_REFRESH = os.environ.get("EPAPER_PARTIAL_REFRESH", "false") == "true"
+    PARTIAL_REFRESH_MAX_DIRTY_PERCENT = int(os.environ.get("EPAPER_PARTIAL_REFRESH_MAX_DIRTY_PERCENT", "35"))
+    PARTIAL_REFRESH_FULL_EVERY = int(os.environ.get("EPAPER_PARTIAL_REFRESH_FULL_EVERY", "30"))
+    # deep sleep of the panel between refreshes: always, dead-times (only within DEAD_TIMES hours) or never
+    DEEP_SLEEP = os.environ.get("EPAPER_DEEP_SLEEP", "always")
+    if DEEP_SLEEP not in ['always', 'dead-times', 'never']:
+        raise Exception('Incorrect deep sleep policy: ' + DEEP_SLEEP)
+    # compose the main screen as a single tri-color array and pack planes out of it directly (if NumPy is installed)
+    NUMPY_COMPOSITOR = os.environ.get("EPAPER_NUMPY_COMPOSITOR", "true") == "true" and compositor.numpy is not None
+    # providers with expired data are acquired concurrently (by that many workers), the ones that take longer than
+    # the deadline (in seconds) are shown with cached data meanwhile - a refresh doesn't stall for the sum of all the timeouts
+    FETCH_WORKERS = int(os.environ.get("EPAPER_FETCH_WORKERS", "4"))
+    FETCH_DEADLINE = int(os.environ.get("EPAPER_FETCH_DEADLINE", "10"))
+    # providers' data refreshed ahead of its expiry (by that many seconds, minus up to the jitter) on a background thread,
+    # so rendering reads data from memory only - all the providers are acquired in parallel at start
+    REFRESH_AHEAD = os.environ.get("EPAPER_REFRESH_AHEAD", "true") == "true"
+    REFRESH_AHEAD_SEC = int(os.environ.get("EPAPER_REFRESH_AHEAD_SEC", "60"))
+    REFRESH_JITTER_SEC = int(os.environ.get("EPAPER_REFRESH_JITTER_SEC", "30"))
+    REFRESH_RETRY_SEC = int(os.environ.get("EPAPER_REFRESH_RETRY_SEC", "60"))
 
 
     drawing = Drawing(
@@ -58,8 +110,13 @@ class EPaper(object):
         int(os.environ.get("WEATHER_STORM_DISTANCE_WARN", "10")),
         int(os.environ.get("AQI_WARN_LEVEL", "75")),
         int(os.environ.get("FIRST_TIME_WARN_ABOVE_PERCENT", "50")),
-        int(os.environ.get("SECONDARY_TIME_WARN_ABOVE_PERCENT", "50"))
+        int(os.environ.get("SECONDARY_TIME_WARN_ABOVE_PERCENT", "50")),
+        max(EPD_WIDTH, EPD_HEIGHT),     # frames are rendered in landscape orientation at the panel resolution
+        min(EPD_WIDTH, EPD_HEIGHT),
+        os.environ.get("EPAPER_LAYOUT", render_plan.LAYOUT_PATH)
     )
+    # the main screen composed of widgets re-rendered only if their data changes
+    main_screen = MainScreen(drawing)
 
     aqi = None
     if os.environ.get("AIRLY_KEY"):
@@ -138,138 +195,309 @@ class EPaper(object):
         self._debug_mode = debug_mode
         if not debug_mode:
             if self.DEVICE_TYPE == 'waveshare-2.7':
-                if self.FAST_REFRESH:
+                from epds import epd2in7b, lut_profiles
+                for lut in [self.CLOCK_LUT, self.DETAILS_LUT, self.MAINTENANCE_LUT]:
+                    lut_profiles.get(lut)
+                if self.CLOCK_LUT == 'fast':
                     logging.info("Using experimental LUT tables!")
-                    from epds import epd2in7b_fast_lut
-                    self._epd = epd2in7b_fast_lut.EPD()
-                else:
-                    from epds import epd2in7b
-                    self._epd = epd2in7b.EPD()
+                self._epd = epd2in7b.EPD(self.CLOCK_LUT)
             elif self.DEVICE_TYPE == 'waveshare-4.2':
                 from epds import epd4in2
                 self._epd = epd4in2.EPD()
-
+                if self.PARTIAL_REFRESH:
+                    logging.info("Using partial refresh!")
+                    self._epd.set_partial_refresh(True, self.PARTIAL_REFRESH_MAX_DIRTY_PERCENT / 100.0, self.PARTIAL_REFRESH_FULL_EVERY)
+            elif self.DEVICE_TYPE == 'waveshare-7.5':
+                from epds import epd7in5
+                self._epd = epd7in5.EPD()
+
+            from epds import epdif
+            self._epdif = epdif
             self._epd.init()
 
         self._str_time = "XXXX"
+        self.fetcher = Fetcher(self.FETCH_WORKERS, self.FETCH_DEADLINE)
+        self.scheduler = None
+        if self.REFRESH_AHEAD:
+            self.scheduler = RefreshScheduler(self.fetcher, self.data_providers(), self.REFRESH_AHEAD_SEC, self.REFRESH_JITTER_SEC, self.REFRESH_RETRY_SEC)
+            self.scheduler.start()
+        self.frame_cache = FrameCache()
+        self.maintenance = Maintenance(self.MAINTENANCE_HOUR)
+        self._worker = DisplayWorker(self.display_now) if self.ASYNC_DISPLAY else None
+        self._encode_lock = threading.Lock()
+        self.compositor = None
+        if self.NUMPY_COMPOSITOR and not debug_mode:
+            logging.info("Using NumPy tri-color compositor")
+            self.compositor = compositor.TriColorCompositor(self.drawing.width, self.drawing.height)
+        # (in ms) drift - from a minute tick to the start of pushing its frame, latency - to the panel done refreshing
+        self.tick_stats = RollingStats()
+
+
+    def display(self, black_buf, red_buf, name, wait = False, force = False, lut = None, tick = None):
+        if self._worker is None:
+            self.display_now(black_buf, red_buf, name, force, lut, tick)
+            return
+        self._worker.submit(black_buf, red_buf, name, force, lut, tick)
+        if wait:
+            self.flush()
 
 
-    def display(self, black_buf, red_buf, name):
+    def flush(self, timeout = None):
+        # waits until the frames handed over to display worker are displayed
+        if self._worker is not None:
+            return self._worker.flush(timeout)
+        return True
+
+
+    def display_now(self, black_buf, red_buf, name, force = False, lut = None, tick = None):
+        # force - refresh the panel even if the very same image is displayed (i.e. to clean it)
+        # lut - LUT profile to refresh the panel with (2.7" only), clock's one by default
+        # tick - time (epoch) of a minute tick the frame is displayed for
+        lut = lut or self.CLOCK_LUT
+        if tick is not None:
+            self.tick_stats.record('drift', (time.time() - tick) * 1000)
         if self._debug_mode:
             debug_output = "/tmp/epaper-" + ( name.strftime("%H-%M-%S") if type(name) is not str else name )
             logging.info("Debug mode - saving screen output to: " + debug_output + "* bmps")
             black_buf.save(debug_output + "_bw_frame.bmp")
             red_buf.save(debug_output + "_red_frame.bmp")
+            self.record_tick_latency(tick)
+            return
+
+        if isinstance(black_buf, Image.Image):
+            black_frame, red_frame = self.encode(black_buf, red_buf)
+        else:
+            black_frame, red_frame = black_buf, red_buf     # packed by the compositor already
+        digest = self.frame_cache.digest(black_frame, red_frame)
+        if not force and self.frame_cache.on_panel(digest):
+            logging.info("The same image is already displayed - refresh skipped (%s)" % self.frame_cache.stats())
+            self.record_tick_latency(tick)     # the tick is on the panel already
             return
 
+        self.frame_cache.displayed(None)
+        if self._epd.asleep:
+            self._epd.wake()
+        refresh = 'full'
         if not self.MONO_DISPLAY:
             logging.info("Going to display a new tri-color image...")
-            self._epd.display_frame(
-                self._epd.get_frame_buffer(black_buf),
-                self._epd.get_frame_buffer(red_buf)
-            )
+            self._epd.display_frame(black_frame, red_frame, lut)
         else:
             logging.info("Going to display a new mono-color image...")
-            self._epd.display_frame(
-                self._epd.get_frame_buffer(black_buf)
-            )
+            # forced frames (i.e. cleaning steps) are refreshed in full - never diffed into partial refreshes or skipped
+            refresh = self._epd.display_frame(black_frame, full = force)
+        self.frame_cache.displayed(digest)
+        if not force and refresh is not None:
+            self.maintenance.record_refresh('partial' if refresh == 'partial' else lut)
+        if self.sleep_after_refresh():
+            self._epd.sleep()
+        self.record_tick_latency(tick)
 
+        logging.info("Display timings - busy: %s; transfers: %s; power: %s" % (self._epdif.BUSY_STATS.format(), self._epdif.TRANSFER_STATS.format(), self._epdif.POWER_STATS.format()))
+        logging.info("Frame stats: %s" % self.frame_cache.stats())
 
-    def display_buffer(self, black_buf, red_buf, dt):
 
-        if self.DEVICE_TYPE == 'waveshare-2.7':
-            black_buf = black_buf.transpose(Image.ROTATE_90)
-            black_buf = black_buf.resize((self.EPD_WIDTH, self.EPD_HEIGHT), Image.LANCZOS)
+    def encode(self, black_buf, red_buf):
+        # planes packed for the panel, cached - so a frame encoded ahead (see prepare_main_screen) isn't packed again
+        with self._encode_lock:     # packers reuse their buffers
+            black_frame = self.frame_cache.encode(black_buf, lambda image: self._epd.get_frame_buffer(image, 0))
+            red_frame = self.frame_cache.encode(red_buf, lambda image: self._epd.get_frame_buffer(image, 1)) if not self.MONO_DISPLAY else None
+        return black_frame, red_frame
 
-            red_buf = red_buf.transpose(Image.ROTATE_90)
-            red_buf = red_buf.resize((self.EPD_WIDTH, self.EPD_HEIGHT), Image.LANCZOS)
 
-        self.display(black_buf, red_buf, dt)
+    def compose_main_screen(self, *frame_inputs):
+        # both planes packed straight out of the compositor's frame at once - no canvases to rotate and pack one by one
+        with self._encode_lock:     # the frame is reused
+            frame = self.main_screen.compose(self.compositor, *frame_inputs)
+            planes = frame.packed(self._epd.PACKER_INVERT, self.drawing.width != self.EPD_WIDTH, 1 if self.MONO_DISPLAY else 2)
+        return planes[0], planes[1] if not self.MONO_DISPLAY else None
+
+
+    def record_tick_latency(self, tick):
+        if tick is None:
+            return
+        self.tick_stats.record('latency', (time.time() - tick) * 1000)
+        logging.info("Minute tick displayed - drift: %.0fms, latency: %.0fms (%s)"
+                     % (self.tick_stats.last('drift'), self.tick_stats.last('latency'), self.tick_stats.format()))
+
+
+    def sleep_after_refresh(self):
+        if self._worker is not None and self._worker.pending():
+            return False    # the next frame is waiting already
+        if self.DEEP_SLEEP == 'dead-times':
+            return self.is_dead_time(datetime.now().hour)
+        return self.DEEP_SLEEP == 'always'
+
+
+    def is_dead_time(self, hour):
+        for dead_range in self.DEAD_TIMES:
+            if hour in dead_range:
+                return True
+        return False
+
+
+    def panel_stats(self):
+        # rolling statistics (in ms) of panel busy periods and SPI transfers
+        if self._debug_mode:
+            return {}
+        return {
+            'busy': self._epdif.BUSY_STATS.summary(),
+            'transfer': self._epdif.TRANSFER_STATS.summary(),
+            'power': self._epdif.POWER_STATS.summary(),
+            'frames': self.frame_cache.stats(),
+            'resources': self.drawing.resources.stats(),
+            'layouts': self.drawing.layout.stats(),
+            'widget_renders': self.main_screen.stats(),
+            'ticks': self.tick_stats.summary(),
+            'maintenance': self.maintenance.stats(),
+            'providers': self.provider_stats(),
+            'fetcher': self.fetcher.stats(),
+            'scheduler': self.scheduler.stats() if self.scheduler is not None else None,
+            'http': http_client.CLIENT.stats()
+        }
+
+
+    def provider_stats(self):
+        # in-memory cache tier of the providers - hits, misses, time spent on parsing and age of the data
+        return dict((name, provider.stats()) for name, provider in self.data_providers().items() if provider is not None)
+
+
+    def display_buffer(self, black_buf, red_buf, dt, wait = False, force = False, lut = None, tick = None):
+        black_buf, red_buf = self.panel_frames(black_buf, red_buf)
+        self.display(black_buf, red_buf, dt, wait, force, lut, tick)
+
+
+    def panel_frames(self, black_buf, red_buf):
+        # frames are rendered at the panel resolution already, portrait panels need a (lossless) rotation only
+        if black_buf.size != (self.EPD_WIDTH, self.EPD_HEIGHT):
+            black_buf = black_buf.transpose(Image.ROTATE_90)
+        if red_buf.size != (self.EPD_WIDTH, self.EPD_HEIGHT):
+            red_buf = red_buf.transpose(Image.ROTATE_90)
+        return black_buf, red_buf
 
 
     def display_starting(self):
         black_frame, red_frame = self.drawing.draw_starting(self.MONO_DISPLAY)
-        self.display_buffer(black_frame, red_frame, 'starting')
+        self.display_buffer(black_frame, red_frame, 'starting', lut = self.DETAILS_LUT)
 
 
     def display_shutdown(self):
         black_frame, red_frame = self.drawing.draw_shutdown(self.MONO_DISPLAY)
-        self.display_buffer(black_frame, red_frame, 'shutdown')
+        self.display_buffer(black_frame, red_frame, 'shutdown', lut = self.DETAILS_LUT)
 
 
     def display_aqi_details(self):
-        black_frame, red_frame = self.drawing.draw_aqi_details(self.aqi.get())
-        self.display_buffer(black_frame, red_frame, 'aqi')
+        black_frame, red_frame = self.drawing.draw_aqi_details(self.fetch(aqi=self.aqi)['aqi'])
+        self.display_buffer(black_frame, red_frame, 'aqi', lut = self.DETAILS_LUT)
 
 
     def display_gmaps_details(self):
-        black_frame, red_frame = self.drawing.draw_gmaps_details(self.gmaps1.get(), self.gmaps2.get())
-        self.display_buffer(black_frame, red_frame, 'gmaps')
+        data = self.fetch(gmaps1=self.gmaps1, gmaps2=self.gmaps2)
+        black_frame, red_frame = self.drawing.draw_gmaps_details(data['gmaps1'], data['gmaps2'])
+        self.display_buffer(black_frame, red_frame, 'gmaps', lut = self.DETAILS_LUT)
 
 
     def display_weather_details(self):
-        black_frame, red_frame = self.drawing.draw_weather_details(self.merge_weather_and_meteo(self.weather, self.meteoalarm))
-        self.display_buffer(black_frame, red_frame, 'weather')
+        data = self.fetch(weather=self.weather, meteoalarm=self.meteoalarm)
+        black_frame, red_frame = self.drawing.draw_weather_details(self.merge_weather_and_meteo(data['weather'], data.get('meteoalarm')))
+        self.display_buffer(black_frame, red_frame, 'weather', lut = self.DETAILS_LUT)
 
 
     def display_system_details(self):
         black_frame, red_frame = self.drawing.draw_system_details(self.system_info.get())
-        self.display_buffer(black_frame, red_frame, 'system')
+        self.display_buffer(black_frame, red_frame, 'system', lut = self.DETAILS_LUT)
 
-    def cycle_display(self):
+    def display_maintenance_step(self, dt):
+        # displays a single step of anti-ghosting cleaning, returns True if there are more steps to go
+        kind = self.maintenance.next_step()
         black_frame, red_frame, white_frame = self.drawing.draw_blanks()
-        for cycle in range(1, 6):
-            for cycle_blacks in range(1, 5):
-                self.display_buffer(black_frame, white_frame, '')
-            for cycle_whites in range(1, 5):
-                self.display_buffer(white_frame, white_frame, '')
-            for cycle_reds in range(1, 10):
-                self.display_buffer(white_frame, red_frame, '')
+        if kind == 'black':
+            self.display_buffer(black_frame, white_frame, '', True, True, self.MAINTENANCE_LUT)
+        elif kind == 'white':
+            self.display_buffer(white_frame, white_frame, '', True, True, self.MAINTENANCE_LUT)
+        else:
+            self.display_buffer(white_frame, red_frame, '', True, True, self.MAINTENANCE_LUT)
+        self.maintenance.step_done(dt)
+        return self.maintenance.in_progress()
+
 
     def display_main_screen(self, dt, force = False):
+        self.display_prepared(self.prepare_main_screen(dt, None, force))
+
+
+    def prepare_main_screen(self, dt, tick = None, force = False):
+        # renders (and encodes) the main screen for the given time, i.e. ahead of the minute it's to be displayed at
         time_format = "%H%M"
         formatted = dt.strftime(time_format)
 
         # set blank minutes if time's hour is within dead ranges
         h = formatted[:2]
-        for dead_range in self.DEAD_TIMES:
-            if int(h) in dead_range:
-                formatted = "{}  ".format(h)
+        if self.is_dead_time(int(h)):
+            formatted = "{}  ".format(h)
 
-        if force or formatted != self._str_time:
+        if not force and formatted == self._str_time:
+            return PreparedFrame(dt, tick, formatted, None, None)
 
-            weather_data = self.merge_weather_and_meteo(self.weather, self.meteoalarm)
-            logging.info("--- weather: " + json.dumps(weather_data))
+        data = self.fetch(**self.data_providers())
 
-            aqi_data = self.aqi.get()
-            logging.info("--- aqi: " + json.dumps(aqi_data))
+        weather_data = self.merge_weather_and_meteo(data['weather'], data.get('meteoalarm'))
+        logging.info("--- weather: " + json.dumps(weather_data))
+
+        aqi_data = data['aqi']
+        logging.info("--- aqi: " + json.dumps(aqi_data))
+
+        gmaps1_data = data['gmaps1']
+        logging.info("--- gmaps1: " + json.dumps(gmaps1_data))
+
+        gmaps2_data = data['gmaps2']
+        logging.info("--- gmaps2: " + json.dumps(gmaps2_data))
+
+        frame_inputs = (
+            self.MONO_DISPLAY,
+            formatted,
+            self.CLOCK_HOURS_MINS_SEPARATOR,
+            weather_data,
+            self.PREFER_AIRLY_LOCAL_TEMP,
+            self.WARN_PAINTED_BLACK_ON_RED,
+            aqi_data,
+            gmaps1_data,
+            gmaps2_data
+        )
+        if self.compositor is not None:
+            black_frame, red_frame = self.compose_main_screen(*frame_inputs)
+            return PreparedFrame(dt, tick, formatted, black_frame, red_frame)
+
+        black_frame, red_frame = self.panel_frames(*self.main_screen.draw_frame(*frame_inputs))
+        if not self._debug_mode:
+            self.encode(black_frame, red_frame)
+        return PreparedFrame(dt, tick, formatted, black_frame, red_frame)
+
+
+    def display_prepared(self, prepared):
+        if prepared.black is None:
+            return
+        self.display(prepared.black, prepared.red, prepared.dt, lut = self.CLOCK_LUT, tick = prepared.tick)
+        self._str_time = prepared.formatted
 
-            gmaps1_data = self.gmaps1.get()
-            logging.info("--- gmaps1: " + json.dumps(gmaps1_data))
+    def data_providers(self):
+        # name -> provider of the data displayed on the main screen (None if not configured)
+        return {
+            'weather': self.weather,
+            'meteoalarm': self.meteoalarm,
+            'aqi': self.aqi,
+            'gmaps1': self.gmaps1,
+            'gmaps2': self.gmaps2
+        }
 
-            gmaps2_data = self.gmaps2.get()
-            logging.info("--- gmaps2: " + json.dumps(gmaps2_data))
 
-            black_frame, red_frame = self.drawing.draw_frame(
-                self.MONO_DISPLAY,
-                formatted,
-                self.CLOCK_HOURS_MINS_SEPARATOR,
-                weather_data,
-                self.PREFER_AIRLY_LOCAL_TEMP,
-                self.WARN_PAINTED_BLACK_ON_RED,
-                aqi_data,
-                gmaps1_data,
-                gmaps2_data
-            )
-            self.display_buffer(black_frame, red_frame, dt)
+    def fetch(self, **providers):
+        # data of the providers - from memory if it's refreshed ahead by the scheduler, acquired (if expired) otherwise
+        return self.fetcher.fetch(providers, self.scheduler is None)
 
-            self._str_time = formatted
 
-    def merge_weather_and_meteo(self, weather, meteoalarm):
-        w = weather.get()
+    def merge_weather_and_meteo(self, w, m):
+        # w, m - data of weather & meteoalarm providers (None if there's no meteoalarm)
         result = w
-        if meteoalarm:
-            m = meteoalarm.get()
+        if m:
             result = w._replace(provider = "%s & %s" % (w.provider, m.provider) if m.alert_title or m.alert_description else w.provider,
                                 alert_title = w.alert_title if w.alert_title else m.alert_title,
                                 alert_description = w.alert_description if w.alert_description else m.alert_description)
@@ -0,0 +1,52 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Finds what has changed between two packed 1-bit frames, so only those parts can be sent to the panel.
+
+
+# returns a list of byte aligned windows: (x_byte_start, x_byte_end, y_start, y_end), ends are exclusive
+# - rows being at most `row_gap` rows apart are merged into one window (each window costs a panel refresh)
+# - when more than `max_windows` windows remain they are merged into one bounding window
+def dirty_windows(old, new, width, height, row_gap=16, max_windows=3):
+    row_bytes = width // 8
+    windows = []
+    current = None
+    for y in range(height):
+        offset = y * row_bytes
+        old_row = old[offset:offset + row_bytes]
+        new_row = new[offset:offset + row_bytes]
+        if old_row == new_row:
+            continue
+
+        # whole rows compare in C, only changed ones are scanned for their horizontal extent
+        first = 0
+        while old_row[first] == new_row[first]:
+            first += 1
+        last = row_bytes
+        while old_row[last - 1] == new_row[last - 1]:
+            last -= 1
+
+        if current is not None and y - current[3] <= row_gap:
+            current[0] = min(current[0], first)
+            current[1] = max(current[1], last)
+            current[3] = y + 1
+        else:
+            current = [first, last, y, y + 1]
+            windows.append(current)
+
+    if len(windows) > max_windows:
+        windows = [[min(w[0] for w in windows), max(w[1] for w in windows), windows[0][2], windows[-1][3]]]
+
+    return [tuple(w) for w in windows]
+
+
+# fraction of the frame covered by given windows
+def windows_ratio(windows, width, height):
+    area = sum((w[1] - w[0]) * 8 * (w[3] - w[2]) for w in windows)
+    return float(area) / (width * height)
+
+
+# the bytes of a window, row by row
+def window_bytes(frame, window, width):
+    row_bytes = width // 8
+    x_start, x_end, y_start, y_end = window
+    return b''.join(bytes(frame[y * row_bytes + x_start:y * row_bytes + x_end]) for y in range(y_start, y_end))
@@ -25,9 +25,13 @@
  #
 
 from . import epdif
+import logging
+import time
+from .packer import FramePacker
+from . import lut_profiles
 from PIL import Image
 from PIL import ImageDraw
-import RPi.GPIO as GPIO
+from .hardware import GPIO
 
 # Display resolution
 EPD_WIDTH       = 176
@@ -72,6 +76,9 @@ PROGRAM_MODE                                = 0xA0
 ACTIVE_PROGRAM                              = 0xA1
 READ_OTP_DATA                               = 0xA2
 
+# a short reset pulse is enough to wake the controller up from deep sleep
+WAKE_RESET_LOW_MS                           = 10
+
 # Display orientation
 ROTATE_0                                    = 0
 ROTATE_90                                   = 1
@@ -79,68 +86,37 @@ ROTATE_180                                  = 2
 ROTATE_270                                  = 3
 
 class EPD:
-    def __init__(self):
+    # polarity of packed planes (see FramePacker) - a set bit is colored (black or red)
+    PACKER_INVERT = True
+
+    # profile - a name of LUT profile (see lut_profiles.py) used by refreshes if not given otherwise
+    def __init__(self, profile='standard'):
         self.reset_pin = epdif.RST_PIN
         self.dc_pin = epdif.DC_PIN
         self.busy_pin = epdif.BUSY_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
+        self._packers = {}
         self.rotate = ROTATE_0
-
-    lut_vcom_dc = [
-        0x00    ,0x00,
-        0x00    ,0x1A    ,0x1A    ,0x00    ,0x00    ,0x01,        
-        0x00    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,        
-        0x00    ,0x0E    ,0x01    ,0x0E    ,0x01    ,0x10,        
-        0x00    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,        
-        0x00    ,0x04    ,0x10    ,0x00    ,0x00    ,0x05,        
-        0x00    ,0x03    ,0x0E    ,0x00    ,0x00    ,0x0A,        
-        0x00    ,0x23    ,0x00    ,0x00    ,0x00    ,0x01    
-    ]
-
-    # R21H
-    lut_ww = [
-        0x90    ,0x1A    ,0x1A    ,0x00    ,0x00    ,0x01,
-        0x40    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,
-        0x84    ,0x0E    ,0x01    ,0x0E    ,0x01    ,0x10,
-        0x80    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,
-        0x00    ,0x04    ,0x10    ,0x00    ,0x00    ,0x05,
-        0x00    ,0x03    ,0x0E    ,0x00    ,0x00    ,0x0A,
-        0x00    ,0x23    ,0x00    ,0x00    ,0x00    ,0x01
-    ]
-
-    # R22H    r
-    lut_bw = [
-        0xA0    ,0x1A    ,0x1A    ,0x00    ,0x00    ,0x01,
-        0x00    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,
-        0x84    ,0x0E    ,0x01    ,0x0E    ,0x01    ,0x10,
-        0x90    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,
-        0xB0    ,0x04    ,0x10    ,0x00    ,0x00    ,0x05,
-        0xB0    ,0x03    ,0x0E    ,0x00    ,0x00    ,0x0A,
-        0xC0    ,0x23    ,0x00    ,0x00    ,0x00    ,0x01
-    ]
-
-    # R23H    w
-    lut_bb = [
-        0x90    ,0x1A    ,0x1A    ,0x00    ,0x00    ,0x01,
-        0x40    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,
-        0x84    ,0x0E    ,0x01    ,0x0E    ,0x01    ,0x10,
-        0x80    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,
-        0x00    ,0x04    ,0x10    ,0x00    ,0x00    ,0x05,
-        0x00    ,0x03    ,0x0E    ,0x00    ,0x00    ,0x0A,
-        0x00    ,0x23    ,0x00    ,0x00    ,0x00    ,0x01
-    ]
-
-    # R24H    b
-    lut_wb = [
-        0x90    ,0x1A    ,0x1A    ,0x00    ,0x00    ,0x01,
-        0x20    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,
-        0x84    ,0x0E    ,0x01    ,0x0E    ,0x01    ,0x10,
-        0x10    ,0x0A    ,0x0A    ,0x00    ,0x00    ,0x08,
-        0x00    ,0x04    ,0x10    ,0x00    ,0x00    ,0x05,
-        0x00    ,0x03    ,0x0E    ,0x00    ,0x00    ,0x0A,
-        0x00    ,0x23    ,0x00    ,0x00    ,0x00    ,0x01
-    ]
+        self.profile = lut_profiles.get(profile).name
+        self._lut_sequences = {}
+        self._lut_on_panel = None
+        self.asleep = False
+
+    # init commands sent after power on - compiled once into byte streams
+    init_sequence = epdif.compile_sequence([
+        (PANEL_SETTING, [0xaf]),                            # KW-BF   KWR-AF    BWROTP 0f
+        (PLL_CONTROL, [0x3a]),                              # 3A 100HZ   29 150Hz 39 200HZ    31 171HZ
+        (POWER_SETTING, [0x03, 0x00, 0x2b, 0x2b, 0x09]),    # VDS_EN, VDG_EN; VCOM_HV, VGHL_LV[1], VGHL_LV[0]; VDH; VDL; VDHR
+        (BOOSTER_SOFT_START, [0x07, 0x07, 0x17]),
+        (0xF8, [0x60, 0xA5]),                               # Power optimization
+        (0xF8, [0x89, 0xA5]),                               # Power optimization
+        (0xF8, [0x90, 0x00]),                               # Power optimization
+        (0xF8, [0x93, 0x2A]),                               # Power optimization
+        (0xF8, [0x73, 0x41]),                               # Power optimization
+        (VCM_DC_SETTING_REGISTER, [0x12]),
+        (VCOM_AND_DATA_INTERVAL_SETTING, [0x87]),           # define by OTP
+    ])
 
     def digital_write(self, pin, value):
         epdif.epd_digital_write(pin, value)
@@ -163,140 +139,96 @@ class EPD:
         # so use [data] instead of data
         epdif.spi_transfer([data])
 
-    def init(self):
+    def send(self, command, data=None):
+        epdif.send(command, data)
+
+    def init(self, reset_low_ms=200):
         if (epdif.epd_init() != 0):
             return -1
-        self.reset()
-
-        self.send_command(POWER_ON)
-        self.wait_until_idle()
-
-        self.send_command(PANEL_SETTING)
-        self.send_data(0xaf)        #KW-BF   KWR-AF    BWROTP 0f
-        
-        self.send_command(PLL_CONTROL)
-        self.send_data(0x3a)       #3A 100HZ   29 150Hz 39 200HZ    31 171HZ
-
-        self.send_command(POWER_SETTING)
-        self.send_data(0x03)                  # VDS_EN, VDG_EN
-        self.send_data(0x00)                  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
-        self.send_data(0x2b)                  # VDH
-        self.send_data(0x2b)                  # VDL
-        self.send_data(0x09)                  # VDHR
-
-        self.send_command(BOOSTER_SOFT_START)
-        self.send_data(0x07)
-        self.send_data(0x07)
-        self.send_data(0x17)
-
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x60)
-        self.send_data(0xA5)
-
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x89)
-        self.send_data(0xA5)
-
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x90)
-        self.send_data(0x00)
-        
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x93)
-        self.send_data(0x2A)
-
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x73)
-        self.send_data(0x41)
-
-        self.send_command(VCM_DC_SETTING_REGISTER)
-        self.send_data(0x12)                   
-        self.send_command(VCOM_AND_DATA_INTERVAL_SETTING)
-        self.send_data(0x87)        # define by OTP
+        self.reset(reset_low_ms)
+
+        self.send(POWER_ON)
+        self.wait_until_idle('init')
+
+        epdif.send_sequence(self.init_sequence)
 
         self.set_lut()
 
-        self.send_command(PARTIAL_DISPLAY_REFRESH)
-        self.send_data(0x00)        
+        self.send(PARTIAL_DISPLAY_REFRESH, [0x00])
 
         return 0
 
-    def wait_until_idle(self):
-        while(self.digital_read(self.busy_pin) == 0):      # 0: busy, 1: idle
-            self.delay_ms(100)
+    def wait_until_idle(self, label='busy'):
+        # waits for BUSY pin edge (0: busy, 1: idle) and records how long the panel was busy
+        elapsed = epdif.epd_wait_until_idle(label)
+        logging.debug("Display busy (%s) for %.0fms" % (label, elapsed))
 
-    def reset(self):
+    def reset(self, low_ms=200):
+        self._lut_on_panel = None                            # LUTs are lost on reset
         self.digital_write(self.reset_pin, GPIO.LOW)         # module reset
-        self.delay_ms(200)
+        self.delay_ms(low_ms)
         self.digital_write(self.reset_pin, GPIO.HIGH)
         self.delay_ms(200)    
 
-    def set_lut(self):
-        self.send_command(LUT_FOR_VCOM)               # vcom
-        for count in range(0, 44):
-            self.send_data(self.lut_vcom_dc[count])
-        
-        self.send_command(LUT_WHITE_TO_WHITE)         # ww --
-        for count in range(0, 42):
-            self.send_data(self.lut_ww[count])
-        
-        self.send_command(LUT_BLACK_TO_WHITE)         # bw r
-        for count in range(0, 42):
-            self.send_data(self.lut_bw[count])
-
-        self.send_command(LUT_WHITE_TO_BLACK)         # wb w
-        for count in range(0, 42):
-            self.send_data(self.lut_bb[count])
-
-        self.send_command(LUT_BLACK_TO_BLACK)         # bb b
-        for count in range(0, 42):
-            self.send_data(self.lut_wb[count])
-
-    def get_frame_buffer(self, image):
-        buf = [0xFF] * int(self.width * self.height / 8)
+    def set_profile(self, profile):
+        # the profile used by refreshes from now on, uploaded with the next refresh
+        self.profile = lut_profiles.get(profile).name
+
+    def lut_sequence(self, profile):
+        # LUT commands of a profile - compiled once into a byte stream
+        sequence = self._lut_sequences.get(profile)
+        if sequence is None:
+            luts = lut_profiles.get(profile)
+            sequence = self._lut_sequences[profile] = epdif.compile_sequence([
+                (LUT_FOR_VCOM, luts.vcom),                  # vcom
+                (LUT_WHITE_TO_WHITE, luts.ww),              # ww --
+                (LUT_BLACK_TO_WHITE, luts.bw),              # bw r
+                (LUT_WHITE_TO_BLACK, luts.wb),              # wb w
+                (LUT_BLACK_TO_BLACK, luts.bb),              # bb b
+            ])
+        return sequence
+
+    def set_lut(self, profile=None):
+        # uploads LUTs of the given (or current) profile, no re-init needed
+        profile = profile or self.profile
+        start = time.time()
+        epdif.send_sequence(self.lut_sequence(profile))
+        self._lut_on_panel = profile
+        epdif.TRANSFER_STATS.record('lut', (time.time() - start) * 1000)
+
+    def get_frame_buffer(self, image, plane=0):
         # Set buffer to value of Python Imaging Library image.
-        # Image must be in mode 1.
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        if imwidth != self.width or imheight != self.height:
-            raise ValueError('Image must be same dimensions as display \
-                ({0}x{1}).' .format(self.width, self.height))
+        # Image must be in mode 1. Each plane (0: black, 1: red) is packed into its own reusable buffer.
+        packer = self._packers.get(plane)
+        if packer is None or packer.width != self.width or packer.height != self.height:
+            packer = self._packers[plane] = FramePacker(self.width, self.height, self.PACKER_INVERT)
+        return packer.pack(image)
 
-        pixels = image_monocolor.load()
-        for y in range(self.height):
-            for x in range(self.width):
-                # Set the bits for the column of pixels at the current position.
-                if pixels[x, y] != 0:
-                    buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
-        return buf
+    def display_frame(self, frame_buffer_black, frame_buffer_red, profile=None):
+        # profile - LUT profile to refresh the panel with (the current one if not given)
+        profile = profile or self.profile
+        if profile != self._lut_on_panel:
+            self.set_lut(profile)
 
-    def display_frame(self, frame_buffer_black, frame_buffer_red):
-        self.send_command(TCON_RESOLUTION)
-        self.send_data(EPD_WIDTH >> 8)
-        self.send_data(EPD_WIDTH & 0xff)        #176      
-        self.send_data(EPD_HEIGHT >> 8)        
-        self.send_data(EPD_HEIGHT & 0xff)       #264
+        start = time.time()
+        self.send(TCON_RESOLUTION, [EPD_WIDTH >> 8, EPD_WIDTH & 0xff, EPD_HEIGHT >> 8, EPD_HEIGHT & 0xff])     # 176x264
 
         if (frame_buffer_black != None):
-            self.send_command(DATA_START_TRANSMISSION_1)           
+            self.send_command(DATA_START_TRANSMISSION_1)
+            self.delay_ms(2)
+            epdif.send_payload(frame_buffer_black)
             self.delay_ms(2)
-            for i in range(0, int(self.width * self.height / 8)):
-                self.send_data(frame_buffer_black[i])  
-            self.delay_ms(2)                  
         if (frame_buffer_red != None):
             self.send_command(DATA_START_TRANSMISSION_2)
             self.delay_ms(2)
-            for i in range(0, int(self.width * self.height / 8)):
-                self.send_data(frame_buffer_red[i])  
-            self.delay_ms(2)        
+            epdif.send_payload(frame_buffer_red)
+            self.delay_ms(2)
+        elapsed = (time.time() - start) * 1000
+        epdif.TRANSFER_STATS.record('frame', elapsed)
+        logging.debug("Frame transferred in %.0fms (%s)" % (elapsed, epdif.TRANSFER_STATS.format('frame')))
 
-        self.send_command(DISPLAY_REFRESH) 
-        self.wait_until_idle()
+        self.send_command(DISPLAY_REFRESH)
+        self.wait_until_idle('refresh:' + profile)
 
     # After this command is transmitted, the chip would enter the deep-sleep
     # mode to save power. The deep sleep mode would return to standby by
@@ -304,8 +236,20 @@ class EPD:
     # be executed if check code = 0xA5. 
     # Use EPD::Reset() to awaken and use EPD::Init() to initialize.
     def sleep(self):
-        self.send_command(DEEP_SLEEP)
-        self.send_data(0xa5)
+        start = time.time()
+        self.send(POWER_OFF)
+        self.wait_until_idle('power off')
+        self.send(DEEP_SLEEP, [0xa5])
+        self.asleep = True
+        epdif.POWER_STATS.record('sleep', (time.time() - start) * 1000)
+
+    def wake(self):
+        # leaves deep sleep - a hardware reset and init sequences (GPIO & SPI are set up already)
+        start = time.time()
+        result = self.init(WAKE_RESET_LOW_MS)
+        self.asleep = False
+        epdif.POWER_STATS.record('wake', (time.time() - start) * 1000)
+        return result
 
     def set_rotate(self, rotate):
         if (rotate == ROTATE_0):
@@ -25,7 +25,11 @@
  #
 
 from . import epdif
-import RPi.GPIO as GPIO
+import logging
+import time
+from .packer import FramePacker
+from . import diff
+from .hardware import GPIO
 
 # Display resolution
 EPD_WIDTH       = 400
@@ -71,13 +75,28 @@ ACTIVE_PROGRAMMING                          = 0xA1
 READ_OTP                                    = 0xA2
 POWER_SAVING                                = 0xE3
 
+# a short reset pulse is enough to wake the controller up from deep sleep
+WAKE_RESET_LOW_MS                           = 10
+
 class EPD:
+    # polarity of packed planes (see FramePacker) - a set bit is white
+    PACKER_INVERT = False
+
     def __init__(self):
         self.reset_pin = epdif.RST_PIN;
         self.dc_pin = epdif.DC_PIN;
         self.busy_pin = epdif.BUSY_PIN;
         self.width = EPD_WIDTH;
         self.height = EPD_HEIGHT;
+        self._packers = {}
+        self._white_frame = None
+        # partial refresh state - disabled by default
+        self.partial_refresh = False
+        self.max_dirty_ratio = 0.35
+        self.full_refresh_every = 30
+        self._last_frame = None
+        self._partial_count = 0
+        self.asleep = False
 
     lut_vcom0 = [
         0x00, 0x17, 0x00, 0x00, 0x00, 0x02,      
@@ -129,6 +148,25 @@ class EPD:
         0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
     ]
 
+    # init commands - compiled once into byte streams
+    power_on_sequence = epdif.compile_sequence([
+        (POWER_SETTING, [0x03, 0x00, 0x2b, 0x2b, 0xff]),    # VDS_EN, VDG_EN; VCOM_HV, VGHL_LV[1], VGHL_LV[0]; VDH; VDL; VDHR
+        (BOOSTER_SOFT_START, [0x17, 0x17, 0x17]),           # 07 0f 17 1f 27 2F 37 2f
+    ])
+
+    init_sequence = epdif.compile_sequence([
+        (PANEL_SETTING, [0xbf, 0x0b]),                      # KW-BF   KWR-AF  BWROTP 0f
+        (PLL_CONTROL, [0x3c]),                              # 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
+    ])
+
+    lut_sequence = epdif.compile_sequence([
+        (LUT_FOR_VCOM, lut_vcom0),                          # vcom
+        (LUT_WHITE_TO_WHITE, lut_ww),                       # ww --
+        (LUT_BLACK_TO_WHITE, lut_bw),                       # bw r
+        (LUT_WHITE_TO_BLACK, lut_bb),                       # wb w
+        (LUT_BLACK_TO_BLACK, lut_wb),                       # bb b
+    ])
+
     def digital_write(self, pin, value):
         epdif.epd_digital_write(pin, value)
 
@@ -150,106 +188,135 @@ class EPD:
         # so use [data] instead of data
         epdif.spi_transfer([data])
 
-    def init(self):
+    def send(self, command, data=None):
+        epdif.send(command, data)
+
+    def init(self, reset_low_ms=200):
         if (epdif.epd_init() != 0):
             return -1
-        self.reset()
-        self.send_command(POWER_SETTING)
-        self.send_data(0x03)                  # VDS_EN, VDG_EN
-        self.send_data(0x00)                  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
-        self.send_data(0x2b)                  # VDH
-        self.send_data(0x2b)                  # VDL
-        self.send_data(0xff)                  # VDHR
-        self.send_command(BOOSTER_SOFT_START)
-        self.send_data(0x17)
-        self.send_data(0x17)
-        self.send_data(0x17)                  #07 0f 17 1f 27 2F 37 2f
-        self.send_command(POWER_ON)
-        self.wait_until_idle()
-        self.send_command(PANEL_SETTING)
-        self.send_data(0xbf)    # KW-BF   KWR-AF  BWROTP 0f
-        self.send_data(0x0b)
-        self.send_command(PLL_CONTROL)
-        self.send_data(0x3c)        # 3A 100HZ   29 150Hz 39 200HZ  31 171HZ
+        self.reset(reset_low_ms)
+        epdif.send_sequence(self.power_on_sequence)
+        self.send(POWER_ON)
+        self.wait_until_idle('init')
+        epdif.send_sequence(self.init_sequence)
         return 0
 
-    def wait_until_idle(self):
-        while(self.digital_read(self.busy_pin) == 0):      # 0: busy, 1: idle
-            self.delay_ms(100)
+    def wait_until_idle(self, label='busy'):
+        # waits for BUSY pin edge (0: busy, 1: idle) and records how long the panel was busy
+        elapsed = epdif.epd_wait_until_idle(label)
+        logging.debug("Display busy (%s) for %.0fms" % (label, elapsed))
 
-    def reset(self):
+    def reset(self, low_ms=200):
         self.digital_write(self.reset_pin, GPIO.LOW)         # module reset
-        self.delay_ms(200)
+        self.delay_ms(low_ms)
         self.digital_write(self.reset_pin, GPIO.HIGH)
         self.delay_ms(200)    
 
     def set_lut(self):
-        self.send_command(LUT_FOR_VCOM)               # vcom
-        for count in range(0, 44):
-            self.send_data(self.lut_vcom0[count])
-        
-        self.send_command(LUT_WHITE_TO_WHITE)         # ww --
-        for count in range(0, 42):
-            self.send_data(self.lut_ww[count])
-        
-        self.send_command(LUT_BLACK_TO_WHITE)         # bw r
-        for count in range(0, 42):
-            self.send_data(self.lut_bw[count])
-
-        self.send_command(LUT_WHITE_TO_BLACK)         # wb w
-        for count in range(0, 42):
-            self.send_data(self.lut_bb[count])
-
-        self.send_command(LUT_BLACK_TO_BLACK)         # bb b
-        for count in range(0, 42):
-            self.send_data(self.lut_wb[count])
-
-    def get_frame_buffer(self, image):
-        buf = [0] * int(self.width * self.height / 8)
+        start = time.time()
+        epdif.send_sequence(self.lut_sequence)
+        epdif.TRANSFER_STATS.record('lut', (time.time() - start) * 1000)
+
+    def get_frame_buffer(self, image, plane=0):
         # Set buffer to value of Python Imaging Library image.
-        # Image must be in mode 1.
-        image_monocolor = image.convert('1')
-        imwidth, imheight = image_monocolor.size
-        if imwidth != self.width or imheight != self.height:
-            raise ValueError('Image must be same dimensions as display \
-                ({0}x{1}).' .format(self.width, self.height))
-
-        pixels = image_monocolor.load()
-        for y in range(self.height):
-            for x in range(self.width):
-                # Set the bits for the column of pixels at the current position.
-                if pixels[x, y] != 0:
-                    buf[int((x + y * self.width) / 8)] |= 0x80 >> (x % 8)
-        return buf
-
-    def display_frame(self, frame_buffer):
-        self.send_command(RESOLUTION_SETTING)
-        self.send_data(self.width >> 8)        
-        self.send_data(self.width & 0xff)
-        self.send_data(self.height >> 8)
-        self.send_data(self.height & 0xff)
-
-        self.send_command(VCM_DC_SETTING)
-        self.send_data(0x12)                   
+        # Image must be in mode 1. Each plane (0: black, 1: red) is packed into its own reusable buffer.
+        packer = self._packers.get(plane)
+        if packer is None or packer.width != self.width or packer.height != self.height:
+            packer = self._packers[plane] = FramePacker(self.width, self.height, self.PACKER_INVERT)
+        return packer.pack(image)
+
+    def set_partial_refresh(self, enabled, max_dirty_ratio=0.35, full_refresh_every=30):
+        # max_dirty_ratio - a full refresh is done when a bigger part of the screen has changed
+        # full_refresh_every - a full refresh is forced after that many partial ones (to clean up ghosting)
+        self.partial_refresh = enabled
+        self.max_dirty_ratio = max_dirty_ratio
+        self.full_refresh_every = full_refresh_every
+        self._last_frame = None
+        self._partial_count = 0
+
+    def display_frame(self, frame_buffer, full=False):
+        # full - refresh the whole panel even if the frame hasn't changed (i.e. anti-ghosting cleaning)
+        # returns the kind of refresh done: 'full', 'partial' or None (frame unchanged - skipped)
+        if not full and frame_buffer is not None and self.partial_refresh and self._last_frame is not None \
+                and self._partial_count < self.full_refresh_every:
+            windows = diff.dirty_windows(self._last_frame, frame_buffer, self.width, self.height)
+            if not windows:
+                logging.info("Frame unchanged - panel refresh skipped")
+                return None
+            ratio = diff.windows_ratio(windows, self.width, self.height)
+            if ratio <= self.max_dirty_ratio:
+                logging.info("Partial refresh of %d window(s), %.0f%% of the screen" % (len(windows), ratio * 100))
+                for window in windows:
+                    self.display_window(self._last_frame, frame_buffer, window)
+                self._partial_count += 1
+                self._last_frame = bytes(frame_buffer)
+                return 'partial'
+
+        self.display_full_frame(frame_buffer)
+        self._partial_count = 0
+        self._last_frame = bytes(frame_buffer) if frame_buffer is not None and self.partial_refresh else None
+        return 'full'
+
+    def display_full_frame(self, frame_buffer):
+        start = time.time()
+        self.send(RESOLUTION_SETTING, [self.width >> 8, self.width & 0xff, self.height >> 8, self.height & 0xff])
+        self.send(VCM_DC_SETTING, [0x12])
 
         self.send_command(VCOM_AND_DATA_INTERVAL_SETTING)
         self.send_command(0x97)    #VBDF 17|D7 VBDW 97  VBDB 57  VBDF F7  VBDW 77  VBDB 37  VBDR B7
 
         if (frame_buffer != None):
-            self.send_command(DATA_START_TRANSMISSION_1)
-            for i in range(0, int(self.width * self.height / 8)):
-                self.send_data(0xFF)       # bit set: white, bit reset: black
+            self.send(DATA_START_TRANSMISSION_1, self.white_frame())      # bit set: white, bit reset: black
+            self.delay_ms(2)
+            self.send(DATA_START_TRANSMISSION_2, frame_buffer)
             self.delay_ms(2)
-            self.send_command(DATA_START_TRANSMISSION_2) 
-            for i in range(0, int(self.width * self.height / 8)):
-                self.send_data(frame_buffer[i])
-            self.delay_ms(2)                  
+        elapsed = (time.time() - start) * 1000
+        epdif.TRANSFER_STATS.record('frame', elapsed)
+        logging.debug("Frame transferred in %.0fms (%s)" % (elapsed, epdif.TRANSFER_STATS.format('frame')))
 
         self.set_lut()
 
         self.send_command(DISPLAY_REFRESH) 
         self.delay_ms(100)
-        self.wait_until_idle()
+        self.wait_until_idle('refresh')
+
+    # window - byte aligned (x_byte_start, x_byte_end, y_start, y_end) as returned by diff.dirty_windows()
+    def display_window(self, old_frame_buffer, frame_buffer, window):
+        start = time.time()
+        x_start = window[0] * 8
+        x_end = window[1] * 8 - 1
+        y_start = window[2]
+        y_end = window[3] - 1
+
+        self.send(PARTIAL_IN)
+        self.send(PARTIAL_WINDOW, [
+            x_start >> 8, x_start & 0xf8,       # x must be the multiple of 8, the last 3 bits are ignored
+            x_end >> 8, (x_end & 0xff) | 0x07,
+            y_start >> 8, y_start & 0xff,
+            y_end >> 8, y_end & 0xff,
+            0x01                                # gates scan both inside and outside of the partial window
+        ])
+        self.delay_ms(2)
+        self.send(DATA_START_TRANSMISSION_1, diff.window_bytes(old_frame_buffer, window, self.width))
+        self.delay_ms(2)
+        self.send(DATA_START_TRANSMISSION_2, diff.window_bytes(frame_buffer, window, self.width))
+        self.delay_ms(2)
+        elapsed = (time.time() - start) * 1000
+        epdif.TRANSFER_STATS.record('window', elapsed)
+        logging.debug("Window transferred in %.0fms (%s)" % (elapsed, epdif.TRANSFER_STATS.format('window')))
+
+        self.set_lut()
+
+        self.send_command(DISPLAY_REFRESH)
+        self.delay_ms(100)
+        self.wait_until_idle('partial refresh')
+        self.send(PARTIAL_OUT)
+
+    def white_frame(self):
+        size = int(self.width * self.height / 8)
+        if self._white_frame is None or len(self._white_frame) != size:
+            self._white_frame = bytes([0xFF]) * size
+        return self._white_frame
 
 ##
  #  @brief: After this command is transmitted, the chip would enter the
@@ -260,24 +327,28 @@ class EPD:
  #          You can use reset() to awaken or init() to initialize
  ##
     def sleep(self):
-        self.send_command(VCOM_AND_DATA_INTERVAL_SETTING)
-        self.send_data(0x17)     #border floating   
-        self.send_command(VCM_DC_SETTING)        #VCOM to 0V
-        self.send_command(PANEL_SETTING)         #
-        self.delay_ms(100)       
-
-        self.send_command(POWER_SETTING)         #VG&VS to 0V fast
-        self.send_data(0x00)     
-        self.send_data(0x00)     
-        self.send_data(0x00)           
-        self.send_data(0x00)     
-        self.send_data(0x00)
-        self.delay_ms(100)       
-                    
-        self.send_command(POWER_OFF)         #power off
-        self.wait_until_idle()
-        self.send_command(DEEP_SLEEP)            #deep sleep
-        self.send_data(0xA5)
+        start = time.time()
+        self.send(VCOM_AND_DATA_INTERVAL_SETTING, [0x17])     #border floating
+        self.send(VCM_DC_SETTING)            #VCOM to 0V
+        self.send(PANEL_SETTING)             #
+        self.delay_ms(100)
+
+        self.send(POWER_SETTING, [0x00, 0x00, 0x00, 0x00, 0x00])     #VG&VS to 0V fast
+        self.delay_ms(100)
+
+        self.send(POWER_OFF)                 #power off
+        self.wait_until_idle('power off')
+        self.send(DEEP_SLEEP, [0xA5])        #deep sleep
+        self.asleep = True
+        epdif.POWER_STATS.record('sleep', (time.time() - start) * 1000)
+
+    def wake(self):
+        # leaves deep sleep - a hardware reset and init sequences (GPIO & SPI are set up already)
+        start = time.time()
+        result = self.init(WAKE_RESET_LOW_MS)
+        self.asleep = False
+        epdif.POWER_STATS.record('wake', (time.time() - start) * 1000)
+        return result
 
 ### END OF FILE ###
 
@@ -0,0 +1,133 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Waveshare 7.5inch e-Paper HAT V2 (800x480, black & white, UC8179 controller) - a high resolution panel.
+# Init & refresh sequences follow the Waveshare reference driver (epd7in5_V2.py); LUTs are taken from OTP.
+# Frames are drawn at the panel resolution (the layout is scaled to it) and packed in bulk as for other panels.
+
+from . import epdif
+import logging
+import time
+from .packer import FramePacker
+from .hardware import GPIO
+
+# Display resolution
+EPD_WIDTH       = 800
+EPD_HEIGHT      = 480
+
+# UC8179 commands
+PANEL_SETTING                               = 0x00
+POWER_SETTING                               = 0x01
+POWER_OFF                                   = 0x02
+POWER_ON                                    = 0x04
+BOOSTER_SOFT_START                          = 0x06
+DEEP_SLEEP                                  = 0x07
+DATA_START_TRANSMISSION_1                   = 0x10
+DISPLAY_REFRESH                             = 0x12
+DATA_START_TRANSMISSION_2                   = 0x13
+DUAL_SPI                                    = 0x15
+VCOM_AND_DATA_INTERVAL_SETTING              = 0x50
+TCON_SETTING                                = 0x60
+RESOLUTION_SETTING                          = 0x61
+
+# a short reset pulse is enough to wake the controller up from deep sleep
+WAKE_RESET_LOW_MS                           = 10
+
+class EPD:
+    # polarity of packed planes (see FramePacker) - a set bit is black (DDX[0] = 0)
+    PACKER_INVERT = True
+
+    def __init__(self):
+        self.reset_pin = epdif.RST_PIN
+        self.dc_pin = epdif.DC_PIN
+        self.busy_pin = epdif.BUSY_PIN
+        self.width = EPD_WIDTH
+        self.height = EPD_HEIGHT
+        self._packers = {}
+        self.asleep = False
+
+    # init commands - compiled once into byte streams
+    power_on_sequence = epdif.compile_sequence([
+        (POWER_SETTING, [0x07, 0x07, 0x3f, 0x3f]),          # VGH=20V, VGL=-20V; VDH=15V; VDL=-15V
+        (BOOSTER_SOFT_START, [0x17, 0x17, 0x28, 0x17]),
+    ])
+
+    init_sequence = epdif.compile_sequence([
+        (PANEL_SETTING, [0x1f]),                            # KW mode, LUTs from OTP
+        (RESOLUTION_SETTING, [EPD_WIDTH >> 8, EPD_WIDTH & 0xff, EPD_HEIGHT >> 8, EPD_HEIGHT & 0xff]),
+        (DUAL_SPI, [0x00]),                                 # single SPI
+        (VCOM_AND_DATA_INTERVAL_SETTING, [0x10, 0x07]),     # DDX=00: new data bit set means black
+        (TCON_SETTING, [0x22]),
+    ])
+
+    def digital_write(self, pin, value):
+        epdif.epd_digital_write(pin, value)
+
+    def delay_ms(self, delaytime):
+        epdif.epd_delay_ms(delaytime)
+
+    def send(self, command, data=None):
+        epdif.send(command, data)
+
+    def init(self, reset_low_ms=200):
+        if (epdif.epd_init() != 0):
+            return -1
+        self.reset(reset_low_ms)
+        epdif.send_sequence(self.power_on_sequence)
+        self.send(POWER_ON)
+        self.delay_ms(100)
+        self.wait_until_idle('init')
+        epdif.send_sequence(self.init_sequence)
+        return 0
+
+    def wait_until_idle(self, label='busy'):
+        # waits for BUSY pin edge (0: busy, 1: idle) and records how long the panel was busy
+        elapsed = epdif.epd_wait_until_idle(label)
+        logging.debug("Display busy (%s) for %.0fms" % (label, elapsed))
+
+    def reset(self, low_ms=200):
+        self.digital_write(self.reset_pin, GPIO.HIGH)
+        self.delay_ms(20)
+        self.digital_write(self.reset_pin, GPIO.LOW)         # module reset
+        self.delay_ms(low_ms)
+        self.digital_write(self.reset_pin, GPIO.HIGH)
+        self.delay_ms(20)
+
+    def get_frame_buffer(self, image, plane=0):
+        # Image (mode 1) or a NumPy plane of colored pixels - packed in bulk into a reusable buffer.
+        # The controller takes set bits as black (unlike PIL), so the packer inverts.
+        packer = self._packers.get(plane)
+        if packer is None or packer.width != self.width or packer.height != self.height:
+            packer = self._packers[plane] = FramePacker(self.width, self.height, self.PACKER_INVERT)
+        return packer.pack(image)
+
+    def display_frame(self, frame_buffer, full=False):
+        # always a full refresh - returns its kind, as epd4in2 does
+        start = time.time()
+        if frame_buffer is not None:
+            self.send(DATA_START_TRANSMISSION_2, frame_buffer)
+        elapsed = (time.time() - start) * 1000
+        epdif.TRANSFER_STATS.record('frame', elapsed)
+        logging.debug("Frame transferred in %.0fms (%s)" % (elapsed, epdif.TRANSFER_STATS.format('frame')))
+
+        self.send(DISPLAY_REFRESH)
+        self.delay_ms(100)
+        self.wait_until_idle('refresh')
+        return 'full'
+
+    def sleep(self):
+        start = time.time()
+        self.send(POWER_OFF)
+        self.wait_until_idle('power off')
+        self.send(DEEP_SLEEP, [0xA5])
+        self.asleep = True
+        epdif.POWER_STATS.record('sleep', (time.time() - start) * 1000)
+
+    def wake(self):
+        # leaves deep sleep - a hardware reset and init sequences (GPIO & SPI are set up already)
+        start = time.time()
+        result = self.init(WAKE_RESET_LOW_MS)
+        self.asleep = False
+        epdif.POWER_STATS.record('wake', (time.time() - start) * 1000)
+        return result
+
+### END OF FILE ###
@@ -24,40 +24,137 @@
  # THE SOFTWARE.
  #
 
-import spidev
-import RPi.GPIO as GPIO
+import logging
+import os
+import threading
 import time
 
+from .hardware import GPIO, spidev
+
+from .stats import RollingStats
+
 # Pin definition
 RST_PIN         = 17
 DC_PIN          = 25
 CS_PIN          = 8
 BUSY_PIN        = 24
 
+# SPI clock - the panels are specified for up to 4MHz (2MHz is a safe default)
+SPI_SPEED_HZ    = int(os.environ.get("EPAPER_SPI_SPEED_HZ", "2000000"))
+
 # SPI device, bus = 0, device = 0
 SPI = spidev.SpiDev(0, 0)
 
+
+def spi_buffer_size():
+    # spidev kernel module refuses transfers bigger than its buffer (4096 bytes by default)
+    try:
+        with open('/sys/module/spidev/parameters/bufsiz') as fp:
+            return int(fp.read())
+    except (IOError, ValueError):
+        return 4096
+
+SPI_BUFFER_SIZE = spi_buffer_size()
+
+# timings (in ms) of bulk transfers
+TRANSFER_STATS = RollingStats()
+# measured periods (in ms) the panel was busy (init, refresh etc.)
+BUSY_STATS = RollingStats()
+# timings (in ms) of putting the panel into deep sleep and waking it up
+POWER_STATS = RollingStats()
+
+# give up waiting for BUSY after that long (full refresh of 2.7" tri-color panel takes ~15s)
+BUSY_TIMEOUT_MS = int(os.environ.get("EPAPER_BUSY_TIMEOUT_MS", "40000"))
+
 def epd_digital_write(pin, value):
     GPIO.output(pin, value)
 
 def epd_digital_read(pin):
     return GPIO.input(BUSY_PIN)
 
+def epd_wait_until_idle(label='busy', timeout_ms=None):
+    # BUSY pin: 0 - busy, 1 - idle
+    timeout_ms = timeout_ms or BUSY_TIMEOUT_MS
+    start = time.time()
+    deadline = start + timeout_ms / 1000.0
+    # edge detection is armed before the pin is checked - so an edge right after the check can't be missed
+    idle = threading.Event()
+    try:
+        GPIO.add_event_detect(BUSY_PIN, GPIO.RISING, callback=lambda pin: idle.set())
+        use_edges = True
+    except RuntimeError as e:
+        # i.e. edge detection already set up for this pin by somebody else - fall back to polling
+        logging.debug("Edge detection of BUSY pin unavailable (%s), polling instead" % e)
+        use_edges = False
+    try:
+        while GPIO.input(BUSY_PIN) == 0:
+            remaining_ms = int((deadline - time.time()) * 1000)
+            if remaining_ms <= 0:
+                logging.warning("Display still busy after %dms (%s) - giving up" % (timeout_ms, label))
+                break
+            if use_edges:
+                idle.wait(remaining_ms / 1000.0)
+                idle.clear()    # the level is checked again - a glitch doesn't end waiting
+            else:
+                time.sleep(0.01)
+    finally:
+        if use_edges:
+            GPIO.remove_event_detect(BUSY_PIN)
+
+    elapsed = (time.time() - start) * 1000
+    BUSY_STATS.record(label, elapsed)
+    return elapsed
+
 def epd_delay_ms(delaytime):
     time.sleep(delaytime / 1000.0)
 
 def spi_transfer(data):
     SPI.writebytes(data)
 
+def spi_write(data):
+    # zero-copy slices of the payload, each one fitting into spidev buffer
+    view = memoryview(data if not isinstance(data, (list, tuple)) else bytes(data))
+    for offset in range(0, len(view), SPI_BUFFER_SIZE):
+        SPI.writebytes2(view[offset:offset + SPI_BUFFER_SIZE])
+
+def send_command(command):
+    GPIO.output(DC_PIN, GPIO.LOW)
+    SPI.writebytes([command])
+
+def send_payload(data):
+    # DC is held high for the whole payload instead of being toggled per byte
+    if data:
+        GPIO.output(DC_PIN, GPIO.HIGH)
+        spi_write(data)
+
+def send(command, data=None):
+    send_command(command)
+    send_payload(data)
+
+def compile_sequence(steps):
+    # [(command, [data, ...]), ...] -> immutable (command, bytes) pairs ready to be streamed
+    return tuple((command, bytes(data) if data else b'') for command, data in steps)
+
+def send_sequence(sequence):
+    for command, data in sequence:
+        send(command, data)
+
+_gpio_ready = False
+
 def epd_init():
+    # GPIO & SPI are set up once, waking the panel up from deep sleep needs a reset & init sequences only
+    global _gpio_ready
+    if _gpio_ready:
+        return 0
     GPIO.setmode(GPIO.BCM)
     GPIO.setwarnings(False)
     GPIO.setup(RST_PIN, GPIO.OUT)
     GPIO.setup(DC_PIN, GPIO.OUT)
     GPIO.setup(CS_PIN, GPIO.OUT)
     GPIO.setup(BUSY_PIN, GPIO.IN)
-    SPI.max_speed_hz = 2000000
+    SPI.max_speed_hz = SPI_SPEED_HZ
     SPI.mode = 0b00
+    _gpio_ready = True
     return 0;
 
 ### END OF FILE ###
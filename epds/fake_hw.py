@@ -0,0 +1,360 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# A software stand-in for RPi.GPIO and spidev (select it with EPAPER_HW_BACKEND=fake) - it lets real drivers
+# run on any Linux box: it records every command & data byte, decodes frames sent to the panel into images
+# and simulates BUSY periods of the panel (refresh time is derived from LUT waveforms that were uploaded).
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from PIL import Image, ImageChops
+
+
+# pins as wired in epdif.py
+RST_PIN = 17
+DC_PIN = 25
+BUSY_PIN = 24
+
+# simulated time is multiplied by this factor (0 - the panel is never busy, handy for benchmarks)
+TIME_SCALE = float(os.environ.get("EPAPER_FAKE_TIME_SCALE", "1.0"))
+# where to save decoded frames (as bmps), not saved if not set
+OUTPUT_DIR = os.environ.get("EPAPER_FAKE_OUTPUT_DIR")
+
+# commands common for all the supported controllers
+PANEL_SETTING = 0x00
+POWER_OFF = 0x02
+POWER_ON = 0x04
+DEEP_SLEEP = 0x07
+DATA_START_TRANSMISSION_1 = 0x10
+DISPLAY_REFRESH = 0x12
+DATA_START_TRANSMISSION_2 = 0x13
+LUT_FOR_VCOM = 0x20
+LUT_BLACK_TO_BLACK = 0x24
+PLL_CONTROL = 0x30
+VCOM_AND_DATA_INTERVAL_SETTING = 0x50
+RESOLUTION_SETTING = 0x61
+PARTIAL_WINDOW = 0x90
+PARTIAL_IN = 0x91
+PARTIAL_OUT = 0x92
+
+# frame rates set by PLL_CONTROL (Hz)
+FRAME_RATES = {0x29: 150, 0x31: 171, 0x39: 200, 0x3A: 100, 0x3C: 50}
+
+# timings (ms) of the operations that aren't driven by LUTs
+POWER_ON_MS = 80
+POWER_OFF_MS = 40
+# refresh time (ms) when LUTs are taken from OTP (not uploaded), by panel kind (tri-color or b&w)
+OTP_REFRESH_MS = {True: 15000, False: 4000}
+
+
+class FakePanel(object):
+
+
+    def __init__(self, history=10, log_size=10000):
+        # log_size - writes kept in the log (the oldest dropped), so long runs (i.e. travis-ci.sh) don't grow it forever
+        self._lock = threading.Lock()
+        self._log_size = log_size
+        self.log = deque(maxlen=log_size)               # (is_command, bytes) as received
+        self.received = 0                               # writes received (the ones dropped from the log included)
+        self.frames = deque(maxlen=history)             # (black, red) images after every refresh
+        self.refresh_durations = deque(maxlen=history)  # simulated (unscaled) ms
+        self.ignored = 0                                # bytes received during deep sleep
+        self.reset()
+
+
+    def reset(self):
+        with self._lock:
+            self.width = None
+            self.height = None
+            self.panel_setting = None
+            self.data_polarity = None
+            self.frame_rate = 100
+            self.luts = {}
+            self.ram = {}
+            self.window = None
+            self.partial = False
+            self.asleep = False
+            self._command = None
+            self._data = bytearray()
+            self._cursor = 0
+            self._busy_until = 0
+
+
+    def tri_color(self):
+        # KWR mode unless bit 4 (KW) of panel setting is set
+        return self.panel_setting is None or not (self.panel_setting & 0x10)
+
+
+    def busy(self):
+        return time.time() < self._busy_until
+
+
+    def busy_remaining(self):
+        return max(0.0, self._busy_until - time.time())
+
+
+    def set_busy(self, duration_ms):
+        self._busy_until = time.time() + duration_ms * TIME_SCALE / 1000.0
+
+
+    def refresh_duration(self):
+        # LUT rows are 6 bytes: level selection, 4 frame counts of phases and repeat count of them
+        if not self.luts:
+            return OTP_REFRESH_MS[self.tri_color()]
+        frames = 0
+        for lut in self.luts.values():
+            rows = range(0, len(lut) - len(lut) % 6, 6)
+            frames = max(frames, sum(sum(lut[i + 1:i + 5]) * max(1, lut[i + 5]) for i in rows))
+        return frames * 1000.0 / self.frame_rate
+
+
+    def receive(self, is_command, data):
+        with self._lock:
+            self.log.append((is_command, bytes(data)))
+            self.received += 1
+            if self.asleep:
+                self.ignored += len(data)
+                return
+            if is_command:
+                for command in data:
+                    self._command = command
+                    self._data = bytearray()
+                    self.start_command(command)
+            elif self._command in (DATA_START_TRANSMISSION_1, DATA_START_TRANSMISSION_2):
+                self.write_ram(self._command, data)
+            elif self._command is not None:
+                self._data.extend(data)
+                self.apply_parameters(self._command, self._data)
+
+
+    def start_command(self, command):
+        if command == POWER_ON:
+            self.set_busy(POWER_ON_MS)
+        elif command == POWER_OFF:
+            self.set_busy(POWER_OFF_MS)
+        elif command in (DATA_START_TRANSMISSION_1, DATA_START_TRANSMISSION_2):
+            self._cursor = 0
+        elif command == PARTIAL_IN:
+            self.partial = True
+        elif command == PARTIAL_OUT:
+            self.partial = False
+            self.window = None
+        elif command == DISPLAY_REFRESH:
+            # a partial refresh drives just the window, but its waveform takes as long as the full one
+            duration = self.refresh_duration()
+            self.refresh_durations.append(duration)
+            self.set_busy(duration)
+            self.snapshot()
+
+
+    def apply_parameters(self, command, data):
+        # called with all the parameters received so far - values get overwritten until the last byte comes
+        if command == PANEL_SETTING:
+            self.panel_setting = data[0]
+        elif command == VCOM_AND_DATA_INTERVAL_SETTING:
+            self.data_polarity = data[0] & 0x01
+        elif command == PLL_CONTROL:
+            self.frame_rate = FRAME_RATES.get(data[0], 100)
+        elif command == RESOLUTION_SETTING and len(data) >= 4:
+            self.width = (data[0] << 8) | data[1]
+            self.height = (data[2] << 8) | data[3]
+        elif LUT_FOR_VCOM <= command <= LUT_BLACK_TO_BLACK:
+            self.luts[command] = bytes(data)
+        elif command == PARTIAL_WINDOW and len(data) >= 8:
+            x_start = ((data[0] << 8) | data[1]) & 0xFFF8
+            x_end = (data[2] << 8) | data[3]
+            y_start = (data[4] << 8) | data[5]
+            y_end = (data[6] << 8) | data[7]
+            self.window = (x_start // 8, x_end // 8 + 1, y_start, y_end + 1)
+        elif command == DEEP_SLEEP and data[0] == 0xA5:
+            self.asleep = True
+
+
+    def write_ram(self, command, data):
+        if not self.width:
+            return
+        row_bytes = self.width // 8
+        ram = self.ram.get(command)
+        if ram is None:
+            ram = self.ram[command] = bytearray(b'\x00' * (row_bytes * self.height))
+        x_start, x_end, y_start, y_end = self.window if self.partial and self.window else (0, row_bytes, 0, self.height)
+        window_width = x_end - x_start
+        data = memoryview(data)
+        while data:
+            # copy the rest of the current window row at once
+            y = y_start + self._cursor // window_width
+            x = x_start + self._cursor % window_width
+            chunk = min(len(data), x_end - x)
+            if y < y_end:
+                ram[y * row_bytes + x:y * row_bytes + x + chunk] = data[:chunk]
+            data = data[chunk:]
+            self._cursor += chunk
+
+
+    def plane(self, command):
+        ram = self.ram.get(command)
+        if ram is None or not self.width:
+            return None
+        return Image.frombytes('1', (self.width, self.height), bytes(ram))
+
+
+    def snapshot(self):
+        # decodes RAM into (black, red) images in a drawing convention: white pixel is 1, colored is 0
+        if not self.width:
+            return
+        if self.tri_color():
+            black = self.plane(DATA_START_TRANSMISSION_1)
+            red = self.plane(DATA_START_TRANSMISSION_2)
+            black = ImageChops.invert(black) if black is not None else None
+            red = ImageChops.invert(red) if red is not None else None
+        else:
+            black = self.plane(DATA_START_TRANSMISSION_2)
+            # DDX[0] of b&w panels - 0: a set bit is black (i.e. UC8179 of 7.5"), 1 (default): a set bit is white
+            if black is not None and self.data_polarity == 0:
+                black = ImageChops.invert(black)
+            red = None
+        self.frames.append((black, red))
+        if OUTPUT_DIR:
+            name = os.path.join(OUTPUT_DIR, "epaper-fake-%d" % self.received)
+            logging.info("Fake display - saving decoded frame to: %s* bmps" % name)
+            if black is not None:
+                black.save(name + "_bw_frame.bmp")
+            if red is not None:
+                red.save(name + "_red_frame.bmp")
+
+
+    def clear_log(self):
+        with self._lock:
+            self.log = deque(maxlen=self._log_size)
+
+
+    def stream(self):
+        # all the bytes received since the log was cleared (the last log_size writes), commands prefixed with 'C', data with 'D'
+        with self._lock:
+            return b''.join((b'C' if is_command else b'D') + data for is_command, data in self.log)
+
+
+PANEL = FakePanel()
+
+
+class FakeGPIO(object):
+
+    BCM = 11
+    BOARD = 10
+    IN = 1
+    OUT = 0
+    LOW = 0
+    HIGH = 1
+    PUD_UP = 22
+    PUD_DOWN = 21
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+
+    def __init__(self, panel):
+        self._panel = panel
+        self._levels = {}
+        self._callbacks = {}
+        self._edges = {}        # pin -> timer of a simulated edge
+
+
+    def setmode(self, mode):
+        pass
+
+
+    def setwarnings(self, flag):
+        pass
+
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        self._levels[pin] = 1 if pull_up_down == self.PUD_UP else (initial or 0)
+
+
+    def cleanup(self, pin=None):
+        pass
+
+
+    def output(self, pin, value):
+        previous = self._levels.get(pin)
+        self._levels[pin] = value
+        if pin == RST_PIN and previous == self.LOW and value == self.HIGH:
+            self._panel.reset()
+
+
+    def input(self, pin):
+        if pin == BUSY_PIN:
+            return self.LOW if self._panel.busy() else self.HIGH
+        return self._levels.get(pin, 0)
+
+
+    def wait_for_edge(self, pin, edge, timeout=None, bouncetime=None):
+        if pin != BUSY_PIN or edge != self.RISING:
+            raise RuntimeError("Fake GPIO supports waiting for rising edge of BUSY pin only")
+        remaining = self._panel.busy_remaining()
+        if timeout is not None and remaining > timeout / 1000.0:
+            time.sleep(timeout / 1000.0)
+            return None
+        time.sleep(remaining)
+        return pin
+
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        if pin in self._callbacks:
+            raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+        self._callbacks[pin] = callback
+        if pin == BUSY_PIN and edge == self.RISING and callback is not None and self._panel.busy():
+            # the rising edge of BUSY pin happens once the panel is done
+            self._edges[pin] = threading.Timer(self._panel.busy_remaining(), callback, [pin])
+            self._edges[pin].start()
+
+
+    def remove_event_detect(self, pin):
+        self._callbacks.pop(pin, None)
+        edge = self._edges.pop(pin, None)
+        if edge is not None:
+            edge.cancel()
+
+
+    def press(self, pin):
+        # simulates a button press (falling edge) on the given pin
+        callback = self._callbacks.get(pin)
+        if callback is not None:
+            callback(pin)
+
+
+GPIO = FakeGPIO(PANEL)
+
+
+class SpiDev(object):
+
+
+    def __init__(self, bus=None, device=None):
+        self.max_speed_hz = 0
+        self.mode = 0
+        self.bytes_written = 0
+
+
+    def writebytes(self, data):
+        self.write(data)
+
+
+    def writebytes2(self, data):
+        self.write(data)
+
+
+    def xfer(self, data, *args):
+        self.write(data)
+        return [0] * len(data)
+
+
+    def write(self, data):
+        data = bytes(data)
+        self.bytes_written += len(data)
+        PANEL.receive(GPIO.input(DC_PIN) == GPIO.LOW, data)
+
+
+    def close(self):
+        pass
@@ -0,0 +1,19 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Hardware backend used by display drivers and buttons:
+# - rpi  - RPi.GPIO and spidev (default)
+# - fake - a software stand-in (see fake_hw.py) that records the traffic and simulates the panel, works on any box
+
+import os
+
+BACKEND = os.environ.get("EPAPER_HW_BACKEND", "rpi")
+
+if BACKEND == 'rpi':
+    import RPi.GPIO as GPIO
+    import spidev
+elif BACKEND == 'fake':
+    from . import fake_hw
+    GPIO = fake_hw.GPIO
+    spidev = fake_hw
+else:
+    raise Exception('Incorrect hardware backend: ' + BACKEND)
@@ -0,0 +1,145 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Named LUT (waveform) profiles of the 2.7" tri-color display (epd2in7b.py), uploaded to the panel on demand.
+#
+# LUT rows are 6 bytes: level selection, 4 frame counts of phases and a repeat count of them. The built-in
+# profiles share the original Waveshare waveforms and differ in repeat counts only:
+# - standard   - the original Waveshare LUTs
+# - fast       - phases run once, about 10 times faster refresh but more ghosting
+# - deep-clean - the shaking phase repeated twice as long, to wipe out ghosting (used by display maintenance)
+#
+# More profiles can be supplied as json files (name of a file is a name of a profile) put in EPAPER_LUT_DIR:
+# - {"repeats": [1, 8, 16, 8, 5, 10, 1]} - the original waveforms with the given repeat counts, or
+# - {"vcom": [44 bytes], "ww": [42 bytes], "bw": [...], "wb": [...], "bb": [...]} - own tables (missing ones are
+#   taken from the standard profile); tables are named after the LUT registers (0x20 - 0x24) they are sent to.
+
+import json
+import logging
+import os
+from collections import namedtuple
+
+LUT_DIR = os.environ.get("EPAPER_LUT_DIR")
+
+VCOM_LENGTH = 44
+LUT_LENGTH = 42
+ROW_LENGTH = 6
+
+LutProfile = namedtuple('LutProfile', ['name', 'vcom', 'ww', 'bw', 'wb', 'bb'])
+
+# waveforms of the original epd2in7b.py, repeat counts (last byte of a row) are set by profiles
+WAVEFORMS = LutProfile(
+    'waveforms',
+    [0x00, 0x00,
+     0x00, 0x1A, 0x1A, 0x00, 0x00, 0x00,
+     0x00, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0x00, 0x0E, 0x01, 0x0E, 0x01, 0x00,
+     0x00, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0x00, 0x04, 0x10, 0x00, 0x00, 0x00,
+     0x00, 0x03, 0x0E, 0x00, 0x00, 0x00,
+     0x00, 0x23, 0x00, 0x00, 0x00, 0x00],
+    # R21H
+    [0x90, 0x1A, 0x1A, 0x00, 0x00, 0x00,
+     0x40, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0x84, 0x0E, 0x01, 0x0E, 0x01, 0x00,
+     0x80, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0x00, 0x04, 0x10, 0x00, 0x00, 0x00,
+     0x00, 0x03, 0x0E, 0x00, 0x00, 0x00,
+     0x00, 0x23, 0x00, 0x00, 0x00, 0x00],
+    # R22H    r
+    [0xA0, 0x1A, 0x1A, 0x00, 0x00, 0x00,
+     0x00, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0x84, 0x0E, 0x01, 0x0E, 0x01, 0x00,
+     0x90, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0xB0, 0x04, 0x10, 0x00, 0x00, 0x00,
+     0xB0, 0x03, 0x0E, 0x00, 0x00, 0x00,
+     0xC0, 0x23, 0x00, 0x00, 0x00, 0x00],
+    # R23H    w (named lut_bb in the original library)
+    [0x90, 0x1A, 0x1A, 0x00, 0x00, 0x00,
+     0x40, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0x84, 0x0E, 0x01, 0x0E, 0x01, 0x00,
+     0x80, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0x00, 0x04, 0x10, 0x00, 0x00, 0x00,
+     0x00, 0x03, 0x0E, 0x00, 0x00, 0x00,
+     0x00, 0x23, 0x00, 0x00, 0x00, 0x00],
+    # R24H    b (named lut_wb in the original library)
+    [0x90, 0x1A, 0x1A, 0x00, 0x00, 0x00,
+     0x20, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0x84, 0x0E, 0x01, 0x0E, 0x01, 0x00,
+     0x10, 0x0A, 0x0A, 0x00, 0x00, 0x00,
+     0x00, 0x04, 0x10, 0x00, 0x00, 0x00,
+     0x00, 0x03, 0x0E, 0x00, 0x00, 0x00,
+     0x00, 0x23, 0x00, 0x00, 0x00, 0x00]
+)
+
+# repeat counts of the 7 rows of the built-in profiles
+REPEATS = {
+    'standard': [0x01, 0x08, 0x10, 0x08, 0x05, 0x0A, 0x01],
+    'fast': [0x01, 0x01, 0x01, 0x01, 0x01, 0x09, 0x01],
+    'deep-clean': [0x01, 0x08, 0x20, 0x08, 0x05, 0x0A, 0x01]
+}
+
+PROFILES = {}
+
+
+def with_repeats(table, repeats):
+    # the vcom table has 2 extra leading bytes, rows start after them
+    table = list(table)
+    offset = len(table) - len(repeats) * ROW_LENGTH
+    for row, repeat in enumerate(repeats):
+        table[offset + row * ROW_LENGTH + ROW_LENGTH - 1] = repeat
+    return table
+
+
+def validate(name, table, length):
+    if len(table) != length or any(not 0 <= value <= 0xFF for value in table):
+        raise Exception('Incorrect LUT table of profile %s: %d bytes expected' % (name, length))
+    return list(table)
+
+
+def register(name, vcom, ww, bw, wb, bb):
+    PROFILES[name] = LutProfile(
+        name,
+        validate(name, vcom, VCOM_LENGTH),
+        *[validate(name, table, LUT_LENGTH) for table in (ww, bw, wb, bb)]
+    )
+    return PROFILES[name]
+
+
+def register_repeats(name, repeats):
+    if len(repeats) != LUT_LENGTH // ROW_LENGTH:
+        raise Exception('Incorrect repeat counts of profile %s: %d values expected' % (name, LUT_LENGTH // ROW_LENGTH))
+    return register(name, *[with_repeats(table, repeats) for table in WAVEFORMS[1:]])
+
+
+def load(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    with open(path) as fp:
+        definition = json.load(fp)
+    if 'repeats' in definition:
+        return register_repeats(name, definition['repeats'])
+    standard = PROFILES['standard']
+    return register(name, *[definition.get(table, getattr(standard, table)) for table in LutProfile._fields[1:]])
+
+
+def load_dir(path):
+    for file_name in sorted(os.listdir(path)):
+        if file_name.endswith('.json'):
+            try:
+                profile = load(os.path.join(path, file_name))
+                logging.info("LUT profile loaded: %s" % profile.name)
+            except Exception as e:
+                logging.warning("Cannot load LUT profile from %s: %s" % (file_name, e))
+
+
+def get(name):
+    profile = PROFILES.get(name)
+    if profile is None:
+        raise Exception('Unknown LUT profile: %s (available: %s)' % (name, ', '.join(sorted(PROFILES))))
+    return profile
+
+
+for profile_name, profile_repeats in REPEATS.items():
+    register_repeats(profile_name, profile_repeats)
+
+if LUT_DIR:
+    load_dir(LUT_DIR)
@@ -0,0 +1,77 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Bulk packer of 1-bit PIL images into SPI-ready frame buffers.
+# Replaces per-pixel loops of the original Waveshare get_frame_buffer() that took
+# seconds on RPi Zero - here the whole plane is handled by Pillow (and optionally NumPy) in C.
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# a lookup table to flip all the bits of a byte (for bytes.translate())
+INVERT_TABLE = bytes(0xFF - b for b in range(256))
+
+
+class FramePacker(object):
+
+    # invert - False: bit set means white (as PIL does), True: bit set means colored (black or red)
+    # use_numpy - None: use NumPy if installed (it is a bit faster), True/False: force on/off
+    def __init__(self, width, height, invert, use_numpy=None):
+        self.width = width
+        self.height = height
+        self.invert = invert
+        self.size = (width * height + 7) // 8
+        self.buffer = bytearray(self.size)
+        self.blank = False
+
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if (use_numpy or width % 8 != 0) and numpy is None:
+            raise ValueError('NumPy is required to pack frames of width: {}'.format(width))
+        self.use_numpy = use_numpy or width % 8 != 0    # rows of PIL's raw 1-bit data are byte aligned
+        self._view = numpy.frombuffer(self.buffer, dtype=numpy.uint8) if self.use_numpy else None
+
+        # what an all white plane looks like once packed
+        self._white = bytes([0x00 if invert else 0xFF]) * self.size
+
+
+    def pack(self, image):
+        if numpy is not None and isinstance(image, numpy.ndarray):
+            return self.pack_colored(image)
+        if image.mode != '1':
+            image = image.convert('1')
+        if image.size != (self.width, self.height):
+            raise ValueError('Image must be same dimensions as display ({0}x{1}).'.format(self.width, self.height))
+
+        # no black pixel at all - nothing to translate, the buffer is constant
+        self.blank = image.getextrema()[0] != 0
+        if self.blank:
+            self.buffer[:] = self._white
+        elif self.use_numpy:
+            packed = numpy.packbits(numpy.asarray(image), axis=None)
+            if self.invert:
+                numpy.invert(packed, out=self._view)
+            else:
+                self._view[:] = packed
+        else:
+            raw = image.tobytes('raw', '1')     # MSB first, rows are byte aligned
+            self.buffer[:] = raw.translate(INVERT_TABLE) if self.invert else raw
+
+        return self.buffer
+
+
+    def pack_colored(self, colored):
+        # colored - NumPy array of a plane (height x width), True where a pixel is colored (i.e. by TriColorCompositor)
+        if colored.shape != (self.height, self.width):
+            raise ValueError('Plane must be same dimensions as display ({0}x{1}).'.format(self.width, self.height))
+
+        self.blank = not colored.any()
+        view = self._view if self._view is not None else numpy.frombuffer(self.buffer, dtype=numpy.uint8)
+        packed = numpy.packbits(colored, axis=None)
+        if self.invert:
+            view[:] = packed
+        else:
+            numpy.invert(packed, out=view)
+        return self.buffer
@@ -0,0 +1,52 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Rolling timings of e-paper operations (SPI transfers, panel busy periods etc.) - kept in memory only.
+
+import threading
+from collections import deque
+
+
+class RollingStats(object):
+
+
+    def __init__(self, size=50):
+        self._size = size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+
+    def record(self, name, value):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self._size)
+            samples.append(value)
+
+
+    def last(self, name):
+        with self._lock:
+            samples = self._samples.get(name)
+            return samples[-1] if samples else None
+
+
+    def summary(self, name=None):
+        with self._lock:
+            names = [name] if name is not None else sorted(self._samples.keys())
+            result = {}
+            for n in names:
+                samples = self._samples.get(n)
+                if not samples:
+                    continue
+                result[n] = {
+                    'count': len(samples),
+                    'last': samples[-1],
+                    'min': min(samples),
+                    'avg': sum(samples) / len(samples),
+                    'max': max(samples)
+                }
+            return result
+
+
+    def format(self, name=None):
+        return ", ".join("{}: last {:.0f}ms avg {:.0f}ms max {:.0f}ms (n={})".format(n, s['last'], s['avg'], s['max'], s['count'])
+                         for n, s in self.summary(name).items())
@@ -0,0 +1,74 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class FrameCache(object):
+
+    # Remembers what is on the panel (a hash of packed planes) to skip pushing identical frames,
+    # and keeps packed planes of recently displayed images so the repeated screens aren't packed again.
+
+
+    def __init__(self, size=8):
+        self._size = size
+        self._encoded = OrderedDict()
+        self._on_panel = None
+        self._lock = threading.Lock()
+        self.encode_hits = 0
+        self.encode_misses = 0
+        self.refreshes = 0
+        self.skipped_refreshes = 0
+
+
+    def encode(self, image, encoder):
+        key = (image.mode, image.size, hashlib.sha1(image.tobytes()).digest())
+        with self._lock:
+            encoded = self._encoded.get(key)
+            if encoded is not None:
+                self._encoded.move_to_end(key)
+                self.encode_hits += 1
+                return encoded
+            self.encode_misses += 1
+
+        encoded = bytes(encoder(image))     # encoders may reuse their buffers, hence a copy
+        with self._lock:
+            self._encoded[key] = encoded
+            while len(self._encoded) > self._size:
+                self._encoded.popitem(last=False)
+        return encoded
+
+
+    def digest(self, *planes):
+        sha = hashlib.sha1()
+        for plane in planes:
+            sha.update(plane if plane is not None else b'')
+            sha.update(b'|')
+        return sha.digest()
+
+
+    def on_panel(self, digest):
+        with self._lock:
+            if digest == self._on_panel:
+                self.skipped_refreshes += 1
+                return True
+            return False
+
+
+    def displayed(self, digest):
+        # None means the panel state is unknown (i.e. a refresh failed)
+        with self._lock:
+            self._on_panel = digest
+            if digest is not None:
+                self.refreshes += 1
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                'refreshes': self.refreshes,
+                'skipped_refreshes': self.skipped_refreshes,
+                'encode_hits': self.encode_hits,
+                'encode_misses': self.encode_misses
+            }
@@ -0,0 +1,152 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import string
+import threading
+from collections import namedtuple, OrderedDict
+
+
+# font_size - of the font to draw with, lines - to draw, line_height - distance between lines; all in pixels
+Layout = namedtuple('Layout', ['font_size', 'lines', 'line_height', 'width', 'height'])
+
+
+class TextLayout(object):
+
+    # Measures texts with per font size tables of glyph advances (so a font is asked once per glyph), breaks them into
+    # lines (greedy, exact - as wide as fits) and finds the biggest font size for a text to fit into a box (binary search).
+    # Layouts are memoized (text, font size, box), so the repeated screens are laid out in no time.
+    # Widths are additive sums of glyph advances - exact for the basic layout of Pillow (used if raqm isn't available).
+
+    ELLIPSIS = '…'
+
+
+    def __init__(self, fonts, size=256):
+        self._fonts = fonts     # font size -> ImageFont (i.e. ResourceCache.font)
+        self._size = size
+        self._advances = {}
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+
+    def advances(self, font_size):
+        # glyph advances of a font size, printable ASCII measured at once - others on their first use
+        table = self._advances.get(font_size)
+        if table is None:
+            font = self._fonts(font_size)
+            table = dict((glyph, font.getlength(glyph)) for glyph in string.printable if not glyph.isspace() or glyph == ' ')
+            self._advances[font_size] = table
+        return table
+
+
+    def width(self, text, font_size):
+        table = self.advances(font_size)
+        width = 0
+        for glyph in text:
+            advance = table.get(glyph)
+            if advance is None:
+                advance = table[glyph] = self._fonts(font_size).getlength(glyph)
+            width += advance
+        return width
+
+
+    def wrap(self, text, font_size, max_width):
+        # greedy line breaking at spaces, a word wider than a line is broken at the glyph that doesn't fit
+        space = self.width(' ', font_size)
+        lines = []
+        line, line_width = '', 0
+        for word in text.split():
+            word_width = self.width(word, font_size)
+            if line and line_width + space + word_width <= max_width:
+                line, line_width = line + ' ' + word, line_width + space + word_width
+                continue
+            if line:
+                lines.append(line)
+            while word_width > max_width and len(word) > 1:
+                head, head_width = self.longest_prefix(word, font_size, max_width)
+                lines.append(head)
+                word, word_width = word[len(head):], word_width - head_width
+            line, line_width = word, word_width
+        if line:
+            lines.append(line)
+        return lines
+
+
+    def longest_prefix(self, word, font_size, max_width):
+        width = 0
+        for i, glyph in enumerate(word):
+            advance = self.width(glyph, font_size)
+            if i > 0 and width + advance > max_width:
+                return word[:i], width
+            width += advance
+        return word, width
+
+
+    def layout(self, text, font_size, max_width=None, max_height=None, line_spacing=1.0):
+        # lines of the text wrapped to max_width (a single line if not given), cut to max_height (with an ellipsis)
+        key = ('layout', text, font_size, max_width, max_height, line_spacing)
+        return self.memoized(key, lambda: self.lay_out(text, font_size, max_width, max_height, line_spacing))
+
+
+    def lay_out(self, text, font_size, max_width, max_height, line_spacing):
+        lines = self.wrap(text, font_size, max_width) if max_width is not None else [text]
+        line_height = font_size * line_spacing
+        if max_height is not None and len(lines) * line_height > max_height:
+            fitting = max(1, int(max_height // line_height))
+            last = lines[fitting - 1]
+            while last and max_width is not None and self.width(last + self.ELLIPSIS, font_size) > max_width:
+                last = last[:-1]
+            lines = lines[:fitting - 1] + [last.rstrip() + self.ELLIPSIS]
+        width = max([self.width(line, font_size) for line in lines] or [0])
+        return Layout(font_size, tuple(lines), line_height, width, len(lines) * line_height)
+
+
+    def fit(self, text, max_width, max_height=None, max_size=None, min_size=None, line_spacing=1.0):
+        # the biggest font size (between min & max sizes) for the text to fit into the box: a single line if max_height
+        # isn't given, wrapped lines otherwise; if even the smallest size doesn't fit, the text is cut to the box
+        key = ('fit', text, max_width, max_height, max_size, min_size, line_spacing)
+        return self.memoized(key, lambda: self.find_fit(text, max_width, max_height, max_size, min_size, line_spacing))
+
+
+    def find_fit(self, text, max_width, max_height, max_size, min_size, line_spacing):
+        def fits(font_size):
+            if max_height is None:
+                return self.width(text, font_size) <= max_width
+            return len(self.wrap(text, font_size, max_width)) * font_size * line_spacing <= max_height
+
+        low, high = min_size, max_size
+        while low < high:
+            middle = (low + high + 1) // 2
+            if fits(middle):
+                low = middle
+            else:
+                high = middle - 1
+        if max_height is None:
+            return self.lay_out(text, low, None, None, line_spacing)
+        return self.lay_out(text, low, max_width, max_height, line_spacing)
+
+
+    def memoized(self, key, compute):
+        with self._lock:
+            layout = self._layouts.get(key)
+            if layout is not None:
+                self._layouts.move_to_end(key)
+                self.hits += 1
+                return layout
+            self.misses += 1
+        layout = compute()
+        with self._lock:
+            self._layouts[key] = layout
+            while len(self._layouts) > self._size:
+                self._layouts.popitem(last=False)
+        return layout
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                'font_sizes': len(self._advances),
+                'layouts': len(self._layouts),
+                'hits': self.hits,
+                'misses': self.misses
+            }
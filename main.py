@@ -45,16 +45,20 @@ from epaper import EPaper
 # debugging aka developer mode (even w/o e-paper display and rpi)
 DEBUG_MODE = os.environ.get("EPAPER_DEBUG_MODE", "false") == "true"
 EPAPER_DEBUG_MODE_DONT_LOOP = os.environ.get("EPAPER_DEBUG_MODE_DONT_LOOP", "false") == "true"
+# how many seconds before a minute tick the main screen is rendered (and encoded), so it's pushed right at the tick
+PRERENDER_SECONDS = float(os.environ.get("EPAPER_PRERENDER_SECONDS", "5"))
 
 shutting_down = False
 details_to_display = None
 epaper = None
+notifier = None
 
 
 def main():
     global epaper
     global shutting_down
     global details_to_display
+    global notifier
 
     epaper = EPaper(debug_mode=DEBUG_MODE)
 
@@ -80,6 +84,7 @@ def main():
 
     epaper.display_starting()
 
+    prepared = None
     while True:
         if shutting_down:
             logging.info("App is shutting down.....")
@@ -91,6 +96,8 @@ def main():
             logging.info("Going to refresh the main screen with details view...")
             details_to_display()
             details_to_display = None
+            # the details are only queued to the display worker - dwell on them once they're on the panel
+            epaper.flush()
             buttons.set_not_busy()
             for i in range(10):
                 time.sleep(0.5)
@@ -103,19 +110,15 @@ def main():
             refresh_main_screen(epaper, force = True)
         else:
             logging.info("Going to refresh the main screen...")
-            refresh_main_screen(epaper)
+            refresh_main_screen(epaper, prepared = prepared)
 
         if EPAPER_DEBUG_MODE_DONT_LOOP:
             shutting_down = True
 
-        for i in range(120 if buttons is not None else 1):  # lower the CPU usage when no buttons handled
-            if shutting_down:
-                logging.info("App is shutting down...")
-                break
-            if details_to_display is not None:
-                logging.info("Got button pressed!")
-                break
-            time.sleep(0.5 if buttons is not None else 60)
+        prepared = wait_for_next_minute(epaper, buttons is not None)
+
+    # let the display worker finish the frame it's displaying
+    epaper.flush(60)
 
 
 def action_button(key, epaper):
@@ -132,20 +135,62 @@ def action_button(key, epaper):
         details_to_display = None
 
 
-def refresh_main_screen(epaper, force = False):
-    utc_dt = datetime.now(timezone('UTC'))  # time readings should be done in epaper itself (probably using acquire.py w/o caching)
-    dt = utc_dt.astimezone(get_localzone())
+def local_datetime(timestamp = None):
+    utc_dt = datetime.fromtimestamp(timestamp if timestamp is not None else time.time(), timezone('UTC'))  # time readings should be done in epaper itself (probably using acquire.py w/o caching)
+    return utc_dt.astimezone(get_localzone())
+
 
-    time_format = "%H%M"
-    if dt.strftime(time_format) == '0300':
-        epaper.cycle_display()
+def wait_for_next_minute(epaper, buttons_handled):
+    # sleeps until the next minute tick, rendering its screen PRERENDER_SECONDS ahead - returns the prepared screen,
+    # or None if interrupted (by a button or shutdown) before the tick
+    tick = (int(time.time() // 60) + 1) * 60
+    prepared = None
+    while True:
+        if shutting_down:
+            logging.info("App is shutting down...")
+            return None
+        if details_to_display is not None:
+            logging.info("Got button pressed!")
+            return None
+        now = time.time()
+        if now >= tick:
+            return prepared
+        if prepared is None and now >= tick - PRERENDER_SECONDS:
+            prepared = epaper.prepare_main_screen(local_datetime(tick), tick)
+            continue
+        wake_up = tick if prepared is not None else tick - PRERENDER_SECONDS
+        time.sleep(min(wake_up - now, 0.5 if buttons_handled else 60))  # lower the CPU usage when no buttons handled
+
+
+def refresh_main_screen(epaper, force = False, prepared = None):
+    # prepared - the main screen rendered ahead for the current minute (see wait_for_next_minute)
+    dt = prepared.dt if prepared is not None else local_datetime()
+
+    if epaper.maintenance.due(dt):
+        if not run_maintenance(epaper, dt):
+            return
+        force = True
+
+    if prepared is not None and not force:
+        epaper.display_prepared(prepared)
     else:
         epaper.display_main_screen(dt, force)
-        if DEBUG_MODE:
-            epaper.display_weather_details()
-            epaper.display_aqi_details()
-            epaper.display_gmaps_details()
-            epaper.display_system_details()
+    if DEBUG_MODE:
+        # wait for every screen, otherwise the display worker would drop all but the last one
+        for display_details in [epaper.display_weather_details, epaper.display_aqi_details, epaper.display_gmaps_details, epaper.display_system_details]:
+            epaper.flush()
+            display_details()
+
+
+def run_maintenance(epaper, dt):
+    # runs anti-ghosting cleaning step by step, returns False if interrupted (to be resumed later on)
+    logging.info("Running display maintenance...")
+    while epaper.display_maintenance_step(dt):
+        notifier.notify("WATCHDOG=1")
+        if shutting_down or details_to_display is not None:
+            logging.info("Display maintenance interrupted - to be resumed")
+            return False
+    return True
 
 
 def signal_hook(*args):
@@ -164,6 +209,8 @@ def shutdown_hook():
     if epaper is not None:
         logging.info("...but, let's try to display shutdown icon")
         epaper.display_shutdown()
+        if not epaper.flush(60):
+            logging.warning("...display didn't manage to show the shutdown icon in time")
         logging.info("...finally going down")
     return True
 
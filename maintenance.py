@@ -0,0 +1,114 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import json
+import logging
+import math
+import os
+import threading
+
+
+class Maintenance(object):
+
+    # Anti-ghosting maintenance of the display: refreshes are counted per LUT set, the ghosting they build up
+    # decides how many cleaning cycles to run. Cleaning runs step by step (so it can be interrupted and resumed
+    # later on), at most once a day - started within the maintenance window, resumed whenever it's been cut off. The state
+    # survives restarts.
+
+    # ghosting built up by a single refresh, per LUT profile (see epds/lut_profiles.py) - partial refreshes (4.2")
+    # don't drive the rest of the screen at all, so they're counted on their own
+    GHOSTING_WEIGHTS = {'standard': 1, 'fast': 4, 'deep-clean': 0, 'partial': 2}
+    # ghosting removed by a single cleaning cycle (a day of standard refreshes takes 2 cycles, of fast ones - max)
+    GHOSTING_PER_CYCLE = 1000
+    MAX_CYCLES = 5
+    # a single cleaning cycle: black, white and red frames (as originally done at 03:00 by cycle_display)
+    CYCLE = ['black'] * 4 + ['white'] * 4 + ['red'] * 9
+    # state is saved every that many refreshes (to spare SD card)
+    SAVE_EVERY = 10
+
+
+    def __init__(self, window_hour, state_path=None):
+        self.window_hour = window_hour
+        self.state_path = state_path or os.path.expanduser("~/.epaper-display/maintenance.json")
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.state = {
+            'refreshes': {},        # LUT set -> number of refreshes since the last cleaning
+            'ghosting': 0,
+            'last_run': None,       # date of the last completed cleaning
+            'cycles': 0,            # cleaning in progress: number of cycles planned...
+            'step': 0               # ...and steps done
+        }
+        self.load()
+
+
+    def load(self):
+        try:
+            if os.path.exists(self.state_path):
+                with open(self.state_path) as fp:
+                    self.state.update(json.load(fp))
+        except Exception as e:
+            logging.warning("Cannot load maintenance state from %s: %s" % (self.state_path, e))
+
+
+    def save(self):
+        try:
+            with self._lock:
+                dir_name = os.path.dirname(self.state_path)
+                if not os.path.exists(dir_name):
+                    os.makedirs(dir_name)
+                with open(self.state_path, 'w') as fp:
+                    json.dump(self.state, fp)
+                self._unsaved = 0
+        except Exception as e:
+            logging.warning("Cannot save maintenance state to %s: %s" % (self.state_path, e))
+
+
+    def record_refresh(self, lut):
+        with self._lock:
+            refreshes = self.state['refreshes']
+            refreshes[lut] = refreshes.get(lut, 0) + 1
+            self.state['ghosting'] += self.GHOSTING_WEIGHTS.get(lut, 1)
+            self._unsaved += 1
+            save = self._unsaved >= self.SAVE_EVERY
+        if save:
+            self.save()
+
+
+    def in_progress(self):
+        return self.state['cycles'] > 0
+
+
+    def due(self, dt):
+        # cleaning cut off (by buttons, the end of the window or a restart) is resumed right away - not a day later,
+        # the panel would be left with a partly cleaned image meanwhile
+        if self.in_progress():
+            return True
+        if dt.hour != self.window_hour:
+            return False
+        return self.state['last_run'] != dt.date().isoformat() and self.state['ghosting'] > 0
+
+
+    def next_step(self):
+        # the kind of a frame to display in the next step ('black', 'white' or 'red'), plans the cleaning if not started yet
+        with self._lock:
+            if not self.in_progress():
+                cycles = int(math.ceil(float(self.state['ghosting']) / self.GHOSTING_PER_CYCLE))
+                self.state['cycles'] = max(1, min(self.MAX_CYCLES, cycles))
+                self.state['step'] = 0
+                logging.info("Display maintenance: %d cleaning cycle(s) for ghosting of %d (refreshes: %s)"
+                             % (self.state['cycles'], self.state['ghosting'], self.state['refreshes']))
+            return self.CYCLE[self.state['step'] % len(self.CYCLE)]
+
+
+    def step_done(self, dt):
+        with self._lock:
+            self.state['step'] += 1
+            if self.state['step'] >= self.state['cycles'] * len(self.CYCLE):
+                logging.info("Display maintenance completed")
+                self.state.update(refreshes={}, ghosting=0, last_run=dt.date().isoformat(), cycles=0, step=0)
+        self.save()
+
+
+    def stats(self):
+        with self._lock:
+            return dict(self.state)
@@ -5,23 +5,62 @@
 
 import logging
 
+import hashlib
 import json
 import os
+import random
+import threading
 import time
+from collections import namedtuple
+
+
+CACHE_DIR = os.path.expanduser("~/.epaper-display/cache/")
+
+# failed acquisitions are retried after exponentially growing delays (in seconds, jittered)
+BACKOFF_BASE_SEC = int(os.environ.get("EPAPER_BACKOFF_BASE_SEC", "30"))
+BACKOFF_MAX_SEC = int(os.environ.get("EPAPER_BACKOFF_MAX_SEC", "1800"))
+# the last good data is served while acquisitions fail - up to that many minutes past its TTL, DEFAULT afterwards
+STALE_MAX_MINUTES = int(os.environ.get("EPAPER_STALE_MAX_MINUTES", "180"))
+# status codes of wrong API keys - the provider isn't called anymore (circuit breaker) until its configuration changes
+AUTH_ERRORS = [401, 403]
+
+# entries are replaced by acquisitions (on workers) while screens parse them (render thread) - see parsed()
+_ENTRY_LOCK = threading.Lock()
+
+# data - as acquired (parsed JSON), fetched - when it was acquired (epoch), result - the tuple parsed out of data (None until get())
+CacheEntry = namedtuple('CacheEntry', ['data', 'fetched', 'result'])
 
 
 class Acquire(object):
 
+    # Data is held in memory together with the time it was fetched and the result parsed out of it - fresh data is served
+    # from there (no file I/O, no parsing). The cache file is a write-through copy, read once only (at start) to survive restarts.
+    # Failures are tracked: the next attempts are backed off exponentially and the last good data is served meanwhile
+    # (stale-while-error). Auth errors open a circuit breaker, persisted along the cache file with the configuration
+    # it was opened for - the provider isn't called until the configuration (i.e. API key) changes.
+
+    # memory tier & failure state - per instance, assigned on the first use
+    _entry = None
+    _disk_read = False
+    _failures = 0
+    _retry_at = 0
+    _last_error = None
+    _circuit = None
+    hits = 0
+    misses = 0
+    parse_ms = 0.0
+
 
     def cache_name(self):
         pass
 
 
     def cache_path(self):
-        pth_cache = os.path.expanduser("~/.epaper-display/cache/")
-        if not os.path.exists(pth_cache):
-            os.makedirs(pth_cache)
-        return os.path.join(pth_cache, self.cache_name())
+        return os.path.join(CACHE_DIR, self.cache_name())
+
+
+    def breaker_path(self):
+        return self.cache_path() + ".breaker"
 
 
     def ttl(self):
@@ -64,42 +103,220 @@ class Acquire(object):
 
 
     def load_and_cache(self):
+        # None if acquisition failed or hasn't been attempted (circuit open, backing off)
+        if self._circuit is not None:
+            logging.debug("Circuit of %s open (status code %d) - not acquiring" % (self.cache_name(), self._circuit['status_code']))
+            return None
+        if time.time() < self._retry_at:
+            logging.debug("Backing off %s for %.0fs more" % (self.cache_name(), self._retry_at - time.time()))
+            return None
+
         acquired_data = None
         status_code, response_text = self.acquire()
-        if status_code is not None:
-            if not self.error_found(status_code, response_text):
+        if status_code is None:
+            error = "no response"
+        elif self.error_found(status_code, response_text):
+            error = "status code %d" % status_code
+        else:
+            try:
                 # https://stackoverflow.com/a/71029660/1715521
                 # response_text = response_text.encode().decode('utf-8-sig')
                 acquired_data = json.loads(response_text)
-                # write just acquired data to cache
-                fn_cache = self.cache_path()
-                with open(fn_cache,'wb') as fp:
-                    fp.write(response_text.encode('utf-8'))
+            except ValueError as e:
+                error = "invalid response: %s" % e
+
+        if acquired_data is None:
+            self.acquisition_failed(status_code, error)
+            return None
+
+        self.acquisition_succeeded()
+        with _ENTRY_LOCK:
+            self._entry = CacheEntry(acquired_data, time.time(), None)
+        # write just acquired data through to the cache file
+        if not os.path.exists(CACHE_DIR):
+            os.makedirs(CACHE_DIR)
+        fn_cache = self.cache_path()
+        with open(fn_cache,'wb') as fp:
+            fp.write(response_text.encode('utf-8'))
         return acquired_data
 
 
+    def acquisition_failed(self, status_code, error):
+        self._last_error = error
+        if status_code in AUTH_ERRORS:
+            self.open_circuit(status_code)
+            return
+        self._failures += 1
+        delay = min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** (self._failures - 1))
+        delay = delay / 2.0 + random.uniform(0, delay / 2.0)     # jitter - providers failing together retry apart
+        self._retry_at = time.time() + delay
+        logging.warning("Acquiring %s failed (%s), %d time(s) in a row - next attempt in %.0fs"
+                        % (self.cache_name(), error, self._failures, delay))
+
+
+    def acquisition_succeeded(self):
+        if self._failures:
+            logging.info("Acquiring %s recovered after %d failure(s)" % (self.cache_name(), self._failures))
+        self._failures = 0
+        self._retry_at = 0
+        self._last_error = None
+
+
+    def open_circuit(self, status_code):
+        logging.error("Provider %s returned %d - it won't be called until its configuration (i.e. API key) changes"
+                      % (self.cache_name(), status_code))
+        self._circuit = {'fingerprint': self.fingerprint(), 'status_code': status_code, 'since': time.time()}
+        if not os.path.exists(CACHE_DIR):
+            os.makedirs(CACHE_DIR)
+        with open(self.breaker_path(), 'w') as fp:
+            json.dump(self._circuit, fp)
+
+
+    def fingerprint(self):
+        # of the provider's configuration (API key, location etc.) - public attributes set by its constructor
+        config = sorted((name, repr(value)) for name, value in vars(self).items() if not name.startswith('_') and not hasattr(Acquire, name))
+        return hashlib.sha1(repr(config).encode('utf-8')).hexdigest()
+
+
+    def circuit_open(self):
+        self.load_from_disk()
+        return self._circuit is not None
+
+
+    def backoff_until(self):
+        # when the next acquisition may be attempted after failures (epoch), 0 if there were none
+        return self._retry_at
+
+
+    def load_from_disk(self):
+        # the cache file (and circuit breaker's one) is read once (at start), memory is used afterwards
+        if self._disk_read:
+            return
+        self._disk_read = True
+        if self._entry is None:
+            acquired_data = self.load_cached()
+            if acquired_data is not None:
+                entry = CacheEntry(acquired_data, self.get_cache_ts(), None)
+                with _ENTRY_LOCK:
+                    if self._entry is None:     # unless acquired meanwhile
+                        self._entry = entry
+
+        fn_breaker = self.breaker_path()
+        if os.path.exists(fn_breaker):
+            with open(fn_breaker) as fp:
+                circuit = json.load(fp)
+            if circuit.get('fingerprint') == self.fingerprint():
+                logging.warning("Circuit of %s open since %s (status code %d) - fix its configuration to acquire data again"
+                                % (self.cache_name(), time.ctime(circuit['since']), circuit['status_code']))
+                self._circuit = circuit
+            else:
+                logging.info("Configuration of %s changed - circuit closed" % self.cache_name())
+                os.remove(fn_breaker)
+
+
+    def expired(self):
+        # whether get() is going to acquire data - there's none yet or it's older than TTL (in minutes)
+        self.load_from_disk()
+        return self._entry is None or time.time() > self.expires_at()
+
+
+    def expires_at(self):
+        # when the data gets older than TTL (epoch), None if there's no data
+        entry = self._entry
+        return entry.fetched + 60 * self.ttl() if entry is not None else None
+
+
+    def refresh(self):
+        # acquires data ahead of its expiry (i.e. by RefreshScheduler), returns whether it has been acquired
+        logging.info("Refreshing ahead of expiry... %s" % str(type(self)))
+        try:
+            return self.load_and_cache() is not None
+        except Exception as e:
+            logging.exception(e)
+            return False
+
+
     def load(self):
-        # start from cached data 
-        acquired_data = self.load_cached()
+        # start from cached data
+        self.load_from_disk()
 
         # no data has been cached yet
-        if acquired_data is None:
+        if self._entry is None:
             logging.info("No cache found - acquiring data... %s" % str(type(self)))
+            return self.load_and_cache()
+
+        if self.expired():
+            logging.info("Cache too old, renewing...")
             acquired_data = self.load_and_cache()
-        else:
-            # get last modified time for cache...
-            ts_cache = self.get_cache_ts()
+            if acquired_data is None and self.stale_usable():
+                logging.info("Serving stale data of %s (%.0f minutes old) - %s" % (self.cache_name(), (time.time() - self._entry.fetched) / 60,
+                             self._last_error or "circuit open"))
+                return self._entry.data
+            return acquired_data
 
-            # refresh every TTL in minutes
-            if ts_cache is not None:
-                now = time.time()
-                if (now - ts_cache) > 60 * self.ttl():
-                    logging.info("Cache too old, renewing...")
-                    acquired_data = self.load_and_cache()
+        return self._entry.data
 
-        return acquired_data
 
+    def stale_usable(self):
+        # whether the last good data may still be served (while acquisitions fail)
+        entry = self._entry
+        return entry is not None and time.time() - entry.fetched <= 60 * (self.ttl() + STALE_MAX_MINUTES)
 
-    def get(self):
+
+    def parse(self, data):
+        # data (None if there's none) -> the provider's tuple
         pass
 
+
+    def get(self):
+        try:
+            data = self.load()
+        except Exception as e:
+            logging.exception(e)
+            return self.DEFAULT
+        return self.parsed(data)
+
+
+    def cached(self):
+        # the last data acquired (even if expired, as long as it may be served) - no acquisition, memory only; DEFAULT if there's none
+        self.load_from_disk()
+        entry = self._entry
+        return self.parsed(entry.data) if entry is not None and self.stale_usable() else self.DEFAULT
+
+
+    def parsed(self, data):
+        # data -> the provider's tuple, parsed once per data held in memory
+        entry = self._entry
+        if entry is not None and entry.data is data and entry.result is not None:
+            self.hits += 1
+            return entry.result
+
+        self.misses += 1
+        start = time.time()
+        try:
+            result = self.parse(data)
+        except Exception as e:
+            logging.exception(e)
+            result = self.DEFAULT
+        self.parse_ms += (time.time() - start) * 1000
+        # the result is kept unless the entry has been replaced meanwhile (i.e. just acquired by a worker) - it'd be
+        # overwritten with the older data otherwise
+        with _ENTRY_LOCK:
+            if entry is not None and entry.data is data and self._entry is entry:
+                self._entry = entry._replace(result=result)
+        return result
+
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'parse_ms': round(self.parse_ms, 2),
+            'age_s': round(time.time() - self._entry.fetched) if self._entry is not None else None,
+            'stale': self._entry is not None and time.time() > self.expires_at(),
+            'failures': self._failures,
+            'backoff_s': round(max(0, self._retry_at - time.time())),
+            'last_error': self._last_error,
+            'circuit': 'open' if self._circuit is not None else 'closed'
+        }
+
@@ -2,9 +2,9 @@
 # Modifications: https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
 
 from .acquire import Acquire
+from . import http_client
 
 import logging
-import requests
 from collections import namedtuple
 
 
@@ -36,7 +36,7 @@ class Airly(Acquire):
         logging.info("Getting a Airly.eu status from the internet...")
 
         try:
-            r = requests.get(
+            r = http_client.get(
                 "https://airapi.airly.eu/v2/measurements/point?indexType=AIRLY_CAQI&lat={}&lng={}".format(
                     self.lat,
                     self.lon
@@ -45,8 +45,7 @@ class Airly(Acquire):
                     "apikey" : self.key,
                     "Accept-Language" : "en",
                     "Accept" : "application/json"
-                },
-                timeout=(2, 4)
+                }
             )
             return r.status_code, r.text
         except Exception as e:
@@ -55,27 +54,19 @@ class Airly(Acquire):
         return (None, None)
 
 
-    def get(self):
-        try:
-            airly_data = self.load()
-            if airly_data is None or 'current' not in airly_data or 'values' not in airly_data["current"] or not airly_data["current"]["values"] or not airly_data["current"]["indexes"]:
-                logging.warn("No reasonable data returned by Airly. Check API key (status code) or whether the location has any sensors around (visit: https://airly.eu/map/en/)")
-                return self.DEFAULT
-
-            return AirlyTuple(
-                provider='Airly',
-                pm25=airly_data["current"]["values"][1]['value'],
-                pm10=airly_data["current"]["values"][2]['value'],
-                pressure=airly_data["current"]["values"][3]['value'],
-                humidity=airly_data["current"]["values"][4]['value'],
-                temperature=airly_data["current"]["values"][5]['value'],
-                aqi=airly_data["current"]["indexes"][0]['value'],
-                level=airly_data["current"]["indexes"][0]['level'],
-                advice=airly_data["current"]["indexes"][0]['advice']
-            )
-
-        except Exception as e:
-            logging.exception(e)
+    def parse(self, airly_data):
+        if airly_data is None or 'current' not in airly_data or 'values' not in airly_data["current"] or not airly_data["current"]["values"] or not airly_data["current"]["indexes"]:
+            logging.warn("No reasonable data returned by Airly. Check API key (status code) or whether the location has any sensors around (visit: https://airly.eu/map/en/)")
             return self.DEFAULT
 
-
+        return AirlyTuple(
+            provider='Airly',
+            pm25=airly_data["current"]["values"][1]['value'],
+            pm10=airly_data["current"]["values"][2]['value'],
+            pressure=airly_data["current"]["values"][3]['value'],
+            humidity=airly_data["current"]["values"][4]['value'],
+            temperature=airly_data["current"]["values"][5]['value'],
+            aqi=airly_data["current"]["indexes"][0]['value'],
+            level=airly_data["current"]["indexes"][0]['level'],
+            advice=airly_data["current"]["indexes"][0]['advice']
+        )
@@ -0,0 +1,94 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from epds.stats import RollingStats
+from . import http_client
+
+
+class Fetcher(object):
+
+    # Gets data of several providers for a screen at once: the ones with expired data are acquired concurrently
+    # on a bounded pool of workers and joined with an overall deadline, so a refresh can't stall for the sum of
+    # all the request timeouts. Providers that miss the deadline are shown with their cached data (DEFAULT if
+    # there's none) and keep acquiring in the background - the next refresh picks the data up from memory.
+
+
+    def __init__(self, workers=4, deadline=10):
+        # workers - max concurrent acquisitions, deadline - seconds to wait for all of them
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetcher')
+        self._deadline = deadline
+        self._running = {}     # provider -> future of its last acquisition
+        self._lock = threading.Lock()
+        self.latency = RollingStats()
+        self.late = 0
+
+
+    def fetch(self, providers, acquire=True):
+        # providers - name -> provider (None ones are skipped), returns name -> data tuple
+        # acquire - False if data is refreshed ahead by RefreshScheduler: memory only, acquisitions in progress
+        #           (i.e. the warm-up) are waited for if there's no fresh data yet
+        start = time.time()
+        results = {}
+        futures = {}
+        with self._lock:    # screens may be refreshed by the main loop and buttons at the same time
+            for name, provider in providers.items():
+                if provider is None:
+                    continue
+                running = self._running.get(provider)
+                if not provider.expired():
+                    results[name] = provider.cached()           # fresh - from memory
+                elif running is not None and not running.done():
+                    futures[name] = running                     # still acquiring (since the previous refresh or ahead of it)
+                elif acquire:
+                    futures[name] = self.submit_locked(name, provider, False)
+                else:
+                    results[name] = provider.cached()           # to be refreshed by the scheduler
+
+        if futures:
+            wait(list(futures.values()), timeout=max(0, self._deadline - (time.time() - start)))
+        for name, future in futures.items():
+            provider = providers[name]
+            if future.done():
+                results[name] = provider.cached()                    # stale data if acquiring failed
+            else:
+                self.late += 1
+                logging.warning("Provider %s not acquired within %ds - cached data used meanwhile" % (name, self._deadline))
+                results[name] = provider.cached()
+        return results
+
+
+    def submit(self, name, provider, ahead):
+        # acquisition of the provider's data on the pool (unless it's in progress already), returns its future
+        # ahead - refresh the data even if it hasn't expired yet, the future's result tells whether it's been acquired
+        with self._lock:
+            return self.submit_locked(name, provider, ahead)
+
+
+    def submit_locked(self, name, provider, ahead):
+        running = self._running.get(provider)
+        if running is None or running.done():
+            running = self._running[provider] = self._executor.submit(self.acquire, name, provider, ahead)
+        return running
+
+
+    def acquire(self, name, provider, ahead):
+        start = time.time()
+        try:
+            # requests of the provider are cut short at the deadline - a late acquisition doesn't go on much longer
+            with http_client.deadline(self._deadline):
+                return provider.refresh() if ahead else provider.get()
+        finally:
+            elapsed = (time.time() - start) * 1000
+            self.latency.record(name, elapsed)
+            logging.info("Provider %s acquisition took %.0fms (%s)" % (name, elapsed, self.latency.format(name)))
+
+
+    def stats(self):
+        return {
+            'latency': self.latency.summary(),
+            'late': self.late
+        }
@@ -2,10 +2,10 @@
 # Modifications: https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
 
 from .acquire import Acquire
+from . import http_client
 
 import json
 import logging
-import requests
 from collections import namedtuple
 
 
@@ -90,11 +90,10 @@ class GMaps(Acquire):
         }
 
         try:
-            r = requests.post(
+            r = http_client.post(
                 "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix",
                 headers = { 'X-Goog-Api-Key': self.key, 'X-Goog-FieldMask': 'duration,staticDuration,distanceMeters,status'},
-                json = body,
-                timeout=(2, 4)
+                json = body
             )
             return r.status_code, r.text
         except Exception as e:
@@ -103,22 +102,15 @@ class GMaps(Acquire):
         return (None, None)
 
 
-    def get(self):
-        try:
-            gmaps_data = self.load()
-            if gmaps_data is None:
-                return self.DEFAULT
-
-            return GMapsTuple(
-                provider='Google Maps',
-                time_to_dest=int(gmaps_data[0]['staticDuration'].rstrip('s')),  # in seconds
-                time_to_dest_in_traffic=int(gmaps_data[0]['duration'].rstrip('s')),  # in seconds
-                distance='{} km'.format(int(gmaps_data[0]['distanceMeters']) / 1000),  # in km, string with km
-                origin_address=self.home_name,
-                destination_address=self.dest_name
-            )
-        except Exception as e:
-            logging.exception(e)
+    def parse(self, gmaps_data):
+        if gmaps_data is None:
             return self.DEFAULT
 
-
+        return GMapsTuple(
+            provider='Google Maps',
+            time_to_dest=int(gmaps_data[0]['staticDuration'].rstrip('s')),  # in seconds
+            time_to_dest_in_traffic=int(gmaps_data[0]['duration'].rstrip('s')),  # in seconds
+            distance='{} km'.format(int(gmaps_data[0]['distanceMeters']) / 1000),  # in km, string with km
+            origin_address=self.home_name,
+            destination_address=self.dest_name
+        )
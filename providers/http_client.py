@@ -0,0 +1,214 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# HTTP client shared by all the providers: a pooled keep-alive Session per host (TCP & TLS set up once and reused,
+# i.e. by the two requests of Weatherbit or both Google Maps destinations), bounded pools, retries, default timeouts
+# and gzip. Every request is timed by phases - connect (DNS & TCP), TLS (zero for reused connections), backoff and
+# transfer. Requests sent within an acquisition (see Fetcher) never run past its deadline - timeouts of every attempt
+# are cut down to the time left and no retry is started after it.
+# Meteoalarm isn't using it - meteoalertapi library sends its requests itself (no session can be passed to it).
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from epds.stats import RollingStats
+
+
+# connections kept per host (requests wait for a free one if there are more at once)
+POOL_SIZE = int(os.environ.get("EPAPER_HTTP_POOL_SIZE", "2"))
+# retries of GETs that failed to connect, timed out or got 5xx (after 0.5s, 1s...) - POSTs aren't retried
+RETRIES = int(os.environ.get("EPAPER_HTTP_RETRIES", "1"))
+# default timeouts (in seconds) of connecting and reading
+CONNECT_TIMEOUT = float(os.environ.get("EPAPER_HTTP_CONNECT_TIMEOUT", "2"))
+READ_TIMEOUT = float(os.environ.get("EPAPER_HTTP_READ_TIMEOUT", "4"))
+
+BACKOFF_SEC = 0.5
+RETRY_METHODS = ['GET', 'HEAD']
+RETRY_STATUSES = [500, 502, 503, 504]
+
+# backoff - pauses between retries, transfer - the rest of a request: sending it, waiting for & reading the response
+PHASES = ['connect', 'tls', 'backoff', 'transfer']
+
+# phases (in ms) of the request being sent by the current thread, filled in by connections; the deadline (epoch)
+# of the acquisition the thread is running
+_timing = threading.local()
+
+
+def record(phase, elapsed):
+    phases = getattr(_timing, 'phases', None)
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0) + elapsed * 1000
+
+
+@contextmanager
+def deadline(seconds):
+    # requests sent by the current thread within the block don't run for longer than that in total
+    _timing.deadline = time.time() + seconds
+    try:
+        yield
+    finally:
+        _timing.deadline = None
+
+
+class TimedConnection(object):
+
+    # A mixin of urllib3 connections timing connects (DNS resolution & TCP) and TLS handshakes of new connections.
+
+
+    def _new_conn(self):
+        start = time.time()
+        try:
+            return super(TimedConnection, self)._new_conn()
+        finally:
+            self.connected_in = time.time() - start
+            record('connect', self.connected_in)
+
+
+    def connect(self):
+        start = time.time()
+        self.connected_in = 0
+        super(TimedConnection, self).connect()
+        record('tls', time.time() - start - self.connected_in)
+        if getattr(_timing, 'phases', None) is not None:
+            _timing.connections += 1
+
+
+class TimedHTTPConnection(TimedConnection, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnection, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(TimedAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+class HttpClient(object):
+
+
+    def __init__(self, pool_size=POOL_SIZE, retries=RETRIES, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+        self._pool_size = pool_size
+        self._retries = retries
+        self._timeout = timeout
+        self._sessions = {}     # host -> Session
+        self._lock = threading.Lock()
+        self.timings = RollingStats()
+        self.requests = 0
+        self.connections = 0
+
+
+    def session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                # retried here (see request), not by urllib3 - so retries can be kept within the deadline
+                adapter = TimedAdapter(pool_connections=1, pool_maxsize=self._pool_size, pool_block=True, max_retries=0)
+                session = self._sessions[host] = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['Accept-Encoding'] = 'gzip, deflate'
+            return session
+
+
+    def timeout(self, timeout):
+        # (connect, read) timeouts of an attempt - cut down to the time left till the deadline (if there's one)
+        until = getattr(_timing, 'deadline', None)
+        if until is None:
+            return timeout
+        left = until - time.time()
+        if left <= 0:
+            raise requests.exceptions.Timeout('Deadline of the acquisition has passed')
+        return tuple(min(value, left) for value in timeout)
+
+
+    def request(self, method, url, **kwargs):
+        host = urlsplit(url).hostname
+        timeout = kwargs.pop('timeout', self._timeout)
+        retries = self._retries if method in RETRY_METHODS else 0
+        response = failure = None
+        _timing.phases = phases = {}
+        _timing.connections = 0
+        start = time.time()
+        try:
+            for attempt in range(retries + 1):
+                if attempt:
+                    pause = BACKOFF_SEC * 2 ** (attempt - 1)
+                    until = getattr(_timing, 'deadline', None)
+                    if until is not None and time.time() + pause >= until:
+                        break   # no time left for another attempt
+                    logging.info("HTTP %s %s failed (%s) - retrying in %.1fs" % (method, host, failure, pause))
+                    time.sleep(pause)
+                    record('backoff', pause)
+                try:
+                    response = self.session(host).request(method, url, timeout=self.timeout(timeout), **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    response, failure = None, e
+                    continue
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                failure = response.status_code
+            if response is None:
+                raise failure
+            return response
+        finally:
+            elapsed = (time.time() - start) * 1000
+            _timing.phases = None
+            connections = _timing.connections
+            phases['transfer'] = max(0, elapsed - sum(phases.values()))
+            with self._lock:
+                self.requests += 1
+                self.connections += connections
+            for phase in PHASES:
+                self.timings.record(host + ' ' + phase, phases.get(phase, 0))
+            logging.info("HTTP %s %s took %.0fms (%s), %s" % (method, host, elapsed,
+                         ", ".join("%s %.0fms" % (phase, phases.get(phase, 0)) for phase in PHASES),
+                         "%d new connection(s)" % connections))
+
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'connections': self.connections,
+            'timings': self.timings.summary()
+        }
+
+
+CLIENT = HttpClient()
+
+
+def get(url, **kwargs):
+    return CLIENT.get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return CLIENT.post(url, **kwargs)
@@ -40,20 +40,14 @@ class Meteoalarm(Acquire):
 
         return (None, None)
 
-    def get(self):
-        try:
-            alarm_data = self.load()
-            if alarm_data is None:
-                return self.DEFAULT
-            title = alarm_data['headline'] if 'headline' in alarm_data else None
-            title = alarm_data['event'] if not title and 'event' in alarm_data else title
-
-            return MeteoalarmTuple(
-                provider='Meteoalarm',
-                alert_title=title,
-                alert_description=alarm_data['description'] if 'description' in alarm_data else None
-            )
-
-        except Exception as e:
-            logging.exception(e)
+    def parse(self, alarm_data):
+        if alarm_data is None:
             return self.DEFAULT
+        title = alarm_data['headline'] if 'headline' in alarm_data else None
+        title = alarm_data['event'] if not title and 'event' in alarm_data else title
+
+        return MeteoalarmTuple(
+            provider='Meteoalarm',
+            alert_title=title,
+            alert_description=alarm_data['description'] if 'description' in alarm_data else None
+        )
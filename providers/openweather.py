@@ -2,9 +2,9 @@
 # 2024.04 update: "We would like to inform you about our plans to complete the migration from One Call 2.5 to One Call 3.0 that started 2 years ago.
 #                  In line with this, access to One Call 2.5 will be finally closed in June 2024. Link: https://openweathermap.org/one-call-transfer"
 from .acquire import Acquire
+from . import http_client
 
 import logging
-import requests
 from collections import namedtuple
 
 
@@ -38,15 +38,14 @@ class OpenWeather(Acquire):
         logging.info("Getting a fresh forecast from the internet using OpenWeather...")
 
         try:
-            r = requests.get(
+            r = http_client.get(
                 "https://api.openweathermap.org/data/3.0/onecall",
                 params = {
                     "appid" : self.key,
                     "lat" : self.lat,
                     "lon" : self.lon,
                     "units" : self.units
-                },
-                timeout=(2, 4)
+                }
             )
             return r.status_code, r.text
 
@@ -56,33 +55,26 @@ class OpenWeather(Acquire):
         return (None, None)
 
 
-    def get(self):
-        try:
-            forecast_data = self.load()
-            if forecast_data is None:
-                return self.DEFAULT
-        
-            d = forecast_data['daily'][0]
-            
-            temp_min = d['temp']['min']
-            temp_max = d['temp']['max']
-
-            c = forecast_data['current']
-
-            return OpenWeatherTuple(
-                provider='OpenWeather',
-                temp=c['temp'],
-                temp_min=temp_min,
-                temp_max=temp_max,
-                icon=c['weather'][0]['icon'] if 'weather' in c else None,
-                summary=c['weather'][0]['main'] if 'weather' in c else None,
-                forecast_summary=d['weather'][0]['description'] if 'weather' in d else None,
-                nearest_storm_distance=None,    # Unsupported by this provider yet
-                alert_title=None,               # Unsupported by this provider yet
-                alert_description=None          # Unsupported by this provider yet
-            )
-
-        except Exception as e:
-            logging.exception(e)
+    def parse(self, forecast_data):
+        if forecast_data is None:
             return self.DEFAULT
-
+    
+        d = forecast_data['daily'][0]
+        
+        temp_min = d['temp']['min']
+        temp_max = d['temp']['max']
+
+        c = forecast_data['current']
+
+        return OpenWeatherTuple(
+            provider='OpenWeather',
+            temp=c['temp'],
+            temp_min=temp_min,
+            temp_max=temp_max,
+            icon=c['weather'][0]['icon'] if 'weather' in c else None,
+            summary=c['weather'][0]['main'] if 'weather' in c else None,
+            forecast_summary=d['weather'][0]['description'] if 'weather' in d else None,
+            nearest_storm_distance=None,    # Unsupported by this provider yet
+            alert_title=None,               # Unsupported by this provider yet
+            alert_description=None          # Unsupported by this provider yet
+        )
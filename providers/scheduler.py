@@ -0,0 +1,99 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import logging
+import random
+import threading
+import time
+
+
+class RefreshScheduler(object):
+
+    # Refreshes data of the providers ahead of its expiry on a background thread (acquisitions run on the Fetcher's
+    # pool), so rendering reads data from memory only and never waits for the network. Refreshes are due a lead time
+    # before TTL ends, minus a random jitter - providers of equal TTLs don't fire at the same second. All the providers
+    # are acquired in parallel at start (warm-up), failed refreshes are retried after a while (or after the provider's
+    # backoff, if longer). Providers with an open circuit (see Acquire) aren't refreshed at all.
+
+
+    def __init__(self, fetcher, providers, lead=60, jitter=30, retry=60):
+        # providers - name -> provider (None ones are skipped)
+        # lead, jitter, retry - in seconds
+        self._fetcher = fetcher
+        self._providers = dict((name, provider) for name, provider in providers.items() if provider is not None)
+        self._lead = lead
+        self._jitter = jitter
+        self._retry = retry
+        self._condition = threading.Condition()
+        self._due = {}          # name -> when to refresh (epoch), None while refreshing
+        self.refreshes = 0
+        self.failures = 0
+        self._thread = threading.Thread(target=self.run, name='refresh-scheduler')
+        self._thread.daemon = True
+
+
+    def start(self):
+        # warm-up - providers without fresh data (i.e. on the first boot) are acquired in parallel right away
+        with self._condition:
+            for name, provider in self._providers.items():
+                if provider.expired():
+                    self._due[name] = None
+                    self._fetcher.submit(name, provider, False).add_done_callback(
+                        lambda future, name=name, provider=provider: self.refreshed(name, not provider.expired()))
+                else:
+                    self.schedule(name, False)
+        self._thread.start()
+
+
+    def schedule(self, name, failed):
+        provider = self._providers[name]
+        now = time.time()
+        expires = provider.expires_at()
+        if provider.circuit_open():
+            logging.warning("Provider %s not refreshed anymore - its circuit is open" % name)
+            with self._condition:
+                self._due.pop(name, None)
+            return None
+        if failed or expires is None or expires <= now:
+            due = max(now + self._retry + random.uniform(0, self._jitter), provider.backoff_until())
+        else:
+            # ahead of expiry, but not earlier than in the middle of TTL (short TTLs)
+            due = max(expires - self._lead - random.uniform(0, self._jitter), expires - 30 * provider.ttl())
+        with self._condition:
+            self._due[name] = due
+            self._condition.notify_all()
+        logging.debug("Provider %s to be refreshed in %.0fs" % (name, due - now))
+        return due
+
+
+    def refreshed(self, name, acquired):
+        # called on a worker once a refresh is done, acquired - whether data has been acquired
+        with self._condition:
+            self.refreshes += 1
+            due = self.schedule(name, not acquired)
+            if not acquired:
+                self.failures += 1
+                if due is not None:
+                    logging.warning("Provider %s not refreshed - next attempt in %.0fs" % (name, due - time.time()))
+
+
+    def run(self):
+        with self._condition:
+            while True:
+                now = time.time()
+                for name, due in list(self._due.items()):
+                    if due is not None and due <= now:
+                        self._due[name] = None
+                        self._fetcher.submit(name, self._providers[name], True).add_done_callback(
+                            lambda future, name=name: self.refreshed(name, not future.exception() and future.result()))
+                pending = [due for due in self._due.values() if due is not None]
+                self._condition.wait(min(pending) - now if pending else None)
+
+
+    def stats(self):
+        with self._condition:
+            now = time.time()
+            return {
+                'refreshes': self.refreshes,
+                'failures': self.failures,
+                'due_s': dict((name, round(due - now) if due is not None else None) for name, due in self._due.items())
+            }
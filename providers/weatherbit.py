@@ -1,9 +1,9 @@
 # Uses Weatherbit.io API: https://www.weatherbit.io/
 from .acquire import Acquire
+from . import http_client
 
 import json
 import logging
-import requests
 from collections import namedtuple
 
 
@@ -37,27 +37,25 @@ class Weatherbit(Acquire):
         logging.info("Getting a fresh forecast from the internet using Weatherbit.io...")
 
         try:
-            r = requests.get(
+            r = http_client.get(
                 "https://api.weatherbit.io/v2.0/current",
                 params = {
                     "key" : self.key,
                     "lat" : self.lat,
                     "lon" : self.lon,
                     "units" : self.units
-                },
-                timeout=(2, 4)
+                }
             )
             current = r.json()
 
-            r = requests.get(
+            r = http_client.get(
                 "https://api.weatherbit.io/v2.0/forecast/daily",
                 params = {
                     "key" : self.key,
                     "lat" : self.lat,
                     "lon" : self.lon,
                     "units" : self.units
-                },
-                timeout=(2, 4)
+                }
             )
             forecast = r.json()
 
@@ -74,29 +72,22 @@ class Weatherbit(Acquire):
         return (None, None)
 
 
-    def get(self):
-        try:
-            forecast_data = self.load()
-            if forecast_data is None:
-                return self.DEFAULT
-        
-            c = forecast_data['current']['data'][0]
-            d = forecast_data['forecast']['data'][0]
-            
-            return WeatherbitTuple(
-                provider='Weatherbit.io',
-                temp=c['temp'],
-                temp_min=d['low_temp'],
-                temp_max=d['max_temp'],
-                icon=c['weather']['icon'] if 'weather' in c else None,
-                summary=c['weather']['description'] if 'weather' in c else None,
-                forecast_summary=d['weather']['description'] if 'weather' in d else None,
-                nearest_storm_distance=None,    # Unsupported by this provider yet
-                alert_title=None,               # Unsupported by this provider yet
-                alert_description=None          # Unsupported by this provider yet
-            )
-
-        except Exception as e:
-            logging.exception(e)
+    def parse(self, forecast_data):
+        if forecast_data is None:
             return self.DEFAULT
-
+    
+        c = forecast_data['current']['data'][0]
+        d = forecast_data['forecast']['data'][0]
+        
+        return WeatherbitTuple(
+            provider='Weatherbit.io',
+            temp=c['temp'],
+            temp_min=d['low_temp'],
+            temp_max=d['max_temp'],
+            icon=c['weather']['icon'] if 'weather' in c else None,
+            summary=c['weather']['description'] if 'weather' in c else None,
+            forecast_summary=d['weather']['description'] if 'weather' in d else None,
+            nearest_storm_distance=None,    # Unsupported by this provider yet
+            alert_title=None,               # Unsupported by this provider yet
+            alert_description=None          # Unsupported by this provider yet
+        )
@@ -0,0 +1,284 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# The main screen is described by a layout file (resources/layouts/main.json): values bound to the data of a frame,
+# widgets (regions repainted together) made of drawing operations, fonts, assets and warning rules.
+# A layout is compiled once (for a Drawing, i.e. a resolution) into an immutable render plan - assets loaded & scaled,
+# font sizes and frame geometry computed - so rendering a frame only executes the plan.
+#
+# Layout:
+# - canvas - the virtual canvas size the geometry is given in (scaled to a frame resolution)
+# - values - name -> {"from": path in FrameInputs, "divide": n, "round": true, "lower": true,
+#                     "prefer": path used instead if not None and "if" (a path to a flag) is set}
+# - widgets - [{"name", "warning": rule, "ops": [...]}], painted in order
+#   ops: image (an asset), icon (an asset chosen by a value), clock (digit bitmaps), text (a single line, optionally
+#   shrunk to the first of "sizes" it's no wider than "over" at, centered vertically if "center" is set), text_box
+#   (wrapped & fit to a box), box (a filled rectangle), one_of (the first branch which "when" rule is met); each
+#   painted on a plane: black, red or warning (red if the widget's warning rule is met)
+# - geometry & sizes - numbers or simple fractions (i.e. "550/3" - the third of the canvas width + 50)
+# - rules - present, at_least & at_most (a threshold), slower_by (percent over the usual value); thresholds are
+#   numbers or names of Drawing settings (i.e. aqi_warn_level)
+# Texts are python format strings of values and temperature_symbol & distance_symbol.
+
+import json
+import string
+from collections import namedtuple
+from fractions import Fraction
+from PIL import ImageDraw
+
+from resources import icons
+
+
+LAYOUT_PATH = './resources/layouts/main.json'
+RESOURCES_PATH = './resources/'
+
+COLORS = {'white': 255, 'black': 0}
+PLANES = ['black', 'red', 'warning']
+ICON_SETS = {'weather': icons.weather_icons}
+# symbols texts may use -> Drawing settings
+SYMBOLS = {'temperature_symbol': 'TEMPERATURE_SYMBOL', 'distance_symbol': 'distance_symbol'}
+
+# data of a main screen frame, values of a layout are bound to
+FrameInputs = namedtuple('FrameInputs', ['formatted_time', 'use_hrs_mins_separator', 'weather', 'prefer_airly_local_temp',
+                                         'black_on_red', 'aqi', 'gmaps1', 'gmaps2'])
+
+RenderPlan = namedtuple('RenderPlan', ['widgets', 'values', 'symbols'])
+WidgetPlan = namedtuple('WidgetPlan', ['name', 'depends_on', 'warning', 'ops'])
+ValuePlan = namedtuple('ValuePlan', ['path', 'divide', 'round', 'lower', 'prefer', 'prefer_if'])
+RulePlan = namedtuple('RulePlan', ['rule', 'value', 'threshold', 'usual'])
+
+ImageOp = namedtuple('ImageOp', ['image', 'xy', 'plane'])
+IconOp = namedtuple('IconOp', ['value', 'images', 'xy', 'plane'])
+ClockOp = namedtuple('ClockOp', ['value', 'digits', 'xy', 'step', 'separator', 'separator_image', 'separator_xy'])
+TextOp = namedtuple('TextOp', ['text', 'x', 'y', 'xy', 'size', 'font_size', 'shrink_width', 'shrink_sizes', 'center', 'plane', 'color'])
+TextBoxOp = namedtuple('TextBoxOp', ['text', 'x', 'y', 'size', 'min_size', 'right', 'bottom', 'plane', 'color'])
+BoxOp = namedtuple('BoxOp', ['box', 'plane', 'color'])
+OneOfOp = namedtuple('OneOfOp', ['branches'])   # (RulePlan or None, ops)
+
+# value, threshold, usual -> met or not
+RULES = {
+    'present': lambda value, threshold, usual: value is not None,
+    'at_least': lambda value, threshold, usual: value >= threshold,
+    'at_most': lambda value, threshold, usual: value is not None and value <= threshold,
+    # i.e. time to destination in traffic vs. the usual one (unknown if negative)
+    'slower_by': lambda value, threshold, usual: usual >= 0 and usual * (100.0 + threshold) / 100.0 <= value
+}
+
+
+def load(path=LAYOUT_PATH):
+    with open(path) as fp:
+        return json.load(fp)
+
+
+def compile_layout(layout, drawing):
+    if list(layout.get('canvas', [])) != [drawing.CANVAS_WIDTH, drawing.CANVAS_HEIGHT]:
+        raise Exception('Layout is defined for canvas %s, %s expected' % (layout.get('canvas'), [drawing.CANVAS_WIDTH, drawing.CANVAS_HEIGHT]))
+    values = dict((name, compile_value(name, value)) for name, value in layout['values'].items())
+    symbols = dict((name, getattr(drawing, setting)) for name, setting in SYMBOLS.items())
+    widgets = tuple(compile_widget(widget, values, drawing) for widget in layout['widgets'])
+    return RenderPlan(widgets, values, symbols)
+
+
+def compile_value(name, value):
+    if 'from' not in value:
+        raise Exception('Value %s of layout has no source ("from")' % name)
+    return ValuePlan(value['from'], value.get('divide'), value.get('round', False), value.get('lower', False),
+                     value.get('prefer'), value.get('if'))
+
+
+def compile_widget(widget, values, drawing):
+    used = set()
+    warning = compile_rule(widget.get('warning'), values, drawing, used)
+    ops = compile_ops(widget['ops'], values, drawing, used)
+    return WidgetPlan(widget['name'], tuple(sorted(used)), warning, ops)
+
+
+def compile_rule(rule, values, drawing, used):
+    if rule is None:
+        return None
+    if rule.get('rule') not in RULES:
+        raise Exception('Unknown layout rule: %s (available: %s)' % (rule.get('rule'), ', '.join(sorted(RULES))))
+    threshold = rule.get('threshold', rule.get('percent'))
+    if isinstance(threshold, str):
+        threshold = getattr(drawing, threshold)
+    return RulePlan(rule['rule'], use(rule['value'], values, used), threshold,
+                    use(rule['usual'], values, used) if 'usual' in rule else None)
+
+
+def use(name, values, used):
+    if name not in values:
+        raise Exception('Unknown layout value: %s' % name)
+    used.add(name)
+    return name
+
+
+def compile_ops(ops, values, drawing, used):
+    return tuple(compile_op(op, values, drawing, used) for op in ops)
+
+
+def compile_op(op, values, drawing, used):
+    kind = op.get('op')
+    plane = op.get('plane', 'black')
+    if plane not in PLANES:
+        raise Exception('Unknown layout plane: %s (available: %s)' % (plane, ', '.join(PLANES)))
+    color = COLORS[op.get('color', 'black')]
+
+    if kind == 'image':
+        return ImageOp(drawing.resources.image(RESOURCES_PATH + op['image'], '1', drawing.scale), drawing.paste_xy(*numbers(op['at'])), plane)
+    if kind == 'icon':
+        icon_set = ICON_SETS[op['icons']]
+        images = dict((key, drawing.resources.icon(file_name, '1', drawing.scale)) for key, file_name in icon_set.items())
+        return IconOp(use(op['value'], values, used), images, drawing.paste_xy(*numbers(op['at'])), plane)
+    if kind == 'clock':
+        digits = dict((character, drawing.resources.digit(character, '1', drawing.scale)) for character in '0123456789 ')
+        use(op['separator'], values, used)
+        separator_image = drawing.resources.image(RESOURCES_PATH + op['separator_image'], '1', drawing.scale)
+        return ClockOp(use(op['value'], values, used), digits, tuple(numbers(op['at'])), number(op['step']), op['separator'],
+                       separator_image, drawing.paste_xy(*numbers(op['separator_at'])))
+    if kind == 'text':
+        shrink = op.get('shrink')
+        x, y = numbers(op['at'])
+        size, shrink_width, shrink_sizes = number(op['size']), None, None
+        if shrink is not None:
+            # texts scale with fonts - so does the width they may take (in pixels of the frame); the sizes to try in
+            # order, of the frame too
+            shrink_width = number(shrink['over']) * drawing.scale_font
+            shrink_sizes = tuple(drawing.font_size(font_size) for font_size in [size] + numbers(shrink['sizes']))
+        used.update(text_values(op['text'], values))
+        return TextOp(op['text'], x, y, drawing.xy(x, y), size, drawing.font_size(size),
+                      shrink_width, shrink_sizes, bool(shrink and shrink.get('center')), plane, color)
+    if kind == 'text_box':
+        used.update(text_values(op['text'], values))
+        x, y = numbers(op['at'])
+        return TextBoxOp(op['text'], x, y, number(op['size']), number(op.get('min_size')), number(op.get('right')),
+                         number(op.get('bottom')), plane, color)
+    if kind == 'box':
+        return BoxOp(drawing.box(*numbers(op['box'])), plane, color)
+    if kind == 'one_of':
+        return OneOfOp(tuple((compile_rule(branch.get('when'), values, drawing, used), compile_ops(branch['ops'], values, drawing, used))
+                             for branch in op['branches']))
+    raise Exception('Unknown layout operation: %s' % kind)
+
+
+def number(value):
+    # a number of a layout - given as is or as a simple fraction (a string)
+    return float(Fraction(value)) if isinstance(value, str) else value
+
+
+def numbers(values):
+    return [number(value) for value in values]
+
+
+def text_values(text, values):
+    names = set(field.split('.')[0].split('[')[0] for _, field, _, _ in string.Formatter().parse(text) if field)
+    unknown = names - set(values) - set(SYMBOLS)
+    if unknown:
+        raise Exception('Unknown layout values in text %r: %s' % (text, ', '.join(sorted(unknown))))
+    return names - set(SYMBOLS)
+
+
+def resolve(plan, inputs, names):
+    # values (of the given names) of a frame
+    return dict((name, value_of(plan.values[name], inputs)) for name in names)
+
+
+def value_of(value, inputs):
+    result = path_of(inputs, value.path)
+    if value.prefer is not None and (value.prefer_if is None or path_of(inputs, value.prefer_if)):
+        preferred = path_of(inputs, value.prefer)
+        if preferred is not None:
+            result = preferred
+    if result is None:
+        return None
+    if value.divide:
+        result = 1.0 * result / value.divide
+    if value.round:
+        result = int(round(result))
+    if value.lower:
+        result = result.lower()
+    return result
+
+
+def path_of(inputs, path):
+    result = inputs
+    for name in path.split('.'):
+        result = getattr(result, name)
+    return result
+
+
+def is_met(rule, values):
+    return RULES[rule.rule](values[rule.value], rule.threshold, values.get(rule.usual))
+
+
+def key_of(widget, plan, inputs):
+    # what a widget looks like depends on - its values and whether warnings are painted black on red
+    values = resolve(plan, inputs, widget.depends_on)
+    return tuple(values[name] for name in widget.depends_on) + (inputs.black_on_red,)
+
+
+def render(widget, plan, drawing, black_buf, red_buf, inputs):
+    values = resolve(plan, inputs, widget.depends_on)
+    warned = widget.warning is not None and is_met(widget.warning, values)
+    context = dict(plan.symbols, **values)
+    execute(widget.ops, drawing, black_buf, red_buf, inputs.black_on_red, warned, values, context)
+
+
+def execute(ops, drawing, black_buf, red_buf, black_on_red, warned, values, context):
+    for op in ops:
+        if isinstance(op, OneOfOp):
+            for rule, branch in op.branches:
+                if rule is None or is_met(rule, values):
+                    execute(branch, drawing, black_buf, red_buf, black_on_red, warned, values, context)
+                    break
+            continue
+
+        plane = getattr(op, 'plane', 'black')
+        on_red = plane == 'red' or (plane == 'warning' and warned)
+        buf = red_buf if on_red else black_buf
+        if isinstance(op, ImageOp):
+            buf.paste(op.image, op.xy)
+        elif isinstance(op, IconOp):
+            image = op.images.get(values[op.value])
+            if image is not None:
+                buf.paste(image, op.xy)
+        elif isinstance(op, ClockOp):
+            draw_clock(op, drawing, black_buf, values)
+        elif isinstance(op, BoxOp):
+            draw_on(buf).rectangle(op.box, op.color, op.color)
+        else:
+            text = op.text.format(**context)
+            if on_red and black_on_red:
+                # warnings painted black on red - the text is rasterized once, into a mask painted black on the black
+                # plane (beneath the red one) and with its color on the red one
+                mask = drawing.new_canvas(0)
+                draw_text(op, drawing, ImageDraw.Draw(mask), text, 1)
+                black_buf.paste(0, None, mask)
+                buf.paste(op.color, None, mask)
+            else:
+                draw_text(op, drawing, draw_on(buf), text, op.color)
+
+
+def draw_on(buf):
+    # texts aren't anti-aliased on greyscale canvases either (widgets are rendered on such, see widgets.Widget)
+    draw = ImageDraw.Draw(buf)
+    draw.fontmode = '1'
+    return draw
+
+
+def draw_clock(op, drawing, buf, values):
+    for i, character in enumerate(values[op.value]):
+        buf.paste(op.digits[character], drawing.paste_xy(op.xy[0] + i * op.step, op.xy[1]))
+    if values[op.separator]:
+        buf.paste(op.separator_image, op.separator_xy)
+
+
+def draw_text(op, drawing, draw, text, color):
+    if isinstance(op, TextBoxOp):
+        drawing.draw_multiline_text(op.x, op.y, text, op.size, draw, color, op.right, op.bottom, op.min_size)
+    elif op.shrink_width is None:
+        drawing.draw_glyphs(op.xy, text, op.font_size, draw, color)
+    else:
+        # the first size the text isn't too wide at, the last one otherwise
+        font_size = next((font_size for font_size in op.shrink_sizes if drawing.layout.width(text, font_size) <= op.shrink_width),
+                         op.shrink_sizes[-1])
+        xy = drawing.xy(op.x, op.y + (op.size - font_size / drawing.scale_font) / 2) if op.center else op.xy
+        drawing.draw_glyphs(xy, text, font_size, draw, color)
@@ -0,0 +1,57 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Pre-scaled asset sets - images, weather icons and clock digits of the virtual canvas resampled to a panel
+# resolution (and thresholded to 1-bit) once and saved next to the originals, i.e. ./resources/images/800x480/.
+# ResourceCache of that resolution takes them as they are, so high resolution panels start without resampling
+# dozens of bitmaps. A set may be retouched by hand afterwards - as long as the sizes are kept.
+#
+# Run from the project directory: python3 -m resources.assets 800x480 [264x176 ...]
+
+import os
+import sys
+
+from drawing import Drawing
+from resources.cache import ResourceCache
+
+
+DIGITS = '0123456789 '
+
+
+def generate(width, height):
+    # (width, height) - of frames (landscape), returns paths of the images written
+    cache = ResourceCache()
+    scale = (float(width) / Drawing.CANVAS_WIDTH, float(height) / Drawing.CANVAS_HEIGHT)
+    target = ResourceCache(resolution=(width, height))
+    digits = [ResourceCache.IMAGES_PATH + ('_SPACE' if character == ' ' else character) + '.bmp' for character in DIGITS]
+
+    images = []
+    for character, path in zip(DIGITS, digits):
+        images.append((path, cache.digit(character, '1', scale)))
+    for directory in [ResourceCache.IMAGES_PATH, ResourceCache.ICONS_PATH]:
+        for file_name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, file_name)
+            if file_name.endswith('.bmp') and path not in digits:
+                images.append((path, cache.image(path, '1', scale)))
+
+    written = []
+    for path, img in images:
+        path = target.set_path(path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        img.save(path)
+        written.append(path)
+    return written
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.stderr.write("Usage: python3 -m resources.assets WIDTHxHEIGHT [WIDTHxHEIGHT ...]\n")
+        sys.exit(2)
+    for resolution in sys.argv[1:]:
+        width, height = sorted((int(value) for value in resolution.lower().split('x')), reverse=True)
+        written = generate(width, height)
+        print("{}x{}: {} images written to {}".format(width, height, len(written), os.path.dirname(written[0])))
+
+
+if __name__ == '__main__':
+    main()
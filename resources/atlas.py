@@ -0,0 +1,170 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# 1-bit glyph atlases - glyphs of a font size rasterized once (by FreeType, through Pillow) and then blitted,
+# instead of rasterizing the same texts of the main screen over and over. Blitted texts are verified to be
+# pixel-identical to draw.text when an atlas is built - glyphs that aren't (in any pair) are left out of it.
+#
+# An atlas is persisted as a png (the glyphs side by side) with glyph metrics in a text chunk, named after a hash
+# of the font file and the font size, so the atlases aren't rebuilt on startup. It is rebuilt if the charset,
+# Pillow or FreeType version differs from the ones it has been built with.
+
+import itertools
+import json
+import logging
+import math
+import os
+import string
+
+import PIL
+from PIL import Image, ImageDraw, PngImagePlugin, features
+
+# digits of temperatures, AQI & ETA values - letters & punctuation (captions) are rasterized as they are: FreeType
+# positions them (i.e. ',', 'j' or '+') within a string in ways blitting them one by one doesn't reproduce
+CHARSET = string.digits + ' °%-'
+# pen positions texts are verified at (fractional ones too - i.e. lines of multiline texts)
+VERIFY_AT = [(2, 2), (2.4, 3.6), (3.5, 2.5)]
+
+VERSION = {
+    'charset': CHARSET,
+    'pillow': PIL.__version__,
+    'freetype': features.version('freetype2')
+}
+
+
+class GlyphAtlas(object):
+
+
+    def __init__(self, font_size, glyphs):
+        self.font_size = font_size
+        self.glyphs = glyphs    # character -> (bitmap, offset of it from the pen position, advance)
+
+
+    def covers(self, text):
+        return all(glyph in self.glyphs for glyph in text)
+
+
+    def draw(self, draw, xy, text, fill):
+        # the same as draw.text(xy, text, font=font, fill=fill) - glyphs are positioned the way FreeType does:
+        # at 1/64 of a pixel, rounded half up horizontally and half down vertically (its y axis points up)
+        x, y = snap(xy[0], True), snap(xy[1], False)
+        for glyph in text:
+            bitmap, offset, advance = self.glyphs[glyph]
+            if bitmap is not None:
+                draw.bitmap((x + offset[0], y + offset[1]), bitmap, fill=fill)
+            x += advance
+
+
+def snap(value, half_up):
+    pixel = int(math.floor(value))
+    fraction = int(round((value - pixel) * 64))
+    return pixel + (1 if fraction > 32 or (half_up and fraction == 32) else 0)
+
+
+def build(font, font_size):
+    glyphs = {}
+    for glyph in CHARSET:
+        advance = font.getlength(glyph)
+        if advance != int(advance):
+            raise Exception('Glyph %r of font size %d has a fractional advance (%s)' % (glyph, font_size, advance))
+        box = font.getbbox(glyph)
+        bitmap = None
+        if box[2] > box[0] and box[3] > box[1]:
+            bitmap = Image.new('1', (box[2] - box[0], box[3] - box[1]), 0)
+            ImageDraw.Draw(bitmap).text((-box[0], -box[1]), glyph, font=font, fill=1)
+        glyphs[glyph] = (bitmap, (box[0], box[1]), int(advance))
+    atlas = GlyphAtlas(font_size, glyphs)
+
+    # glyphs found in most of the mismatched pairs are left out, until there are none (pairs of a wrong glyph
+    # and the right ones don't count then)
+    pairs = mismatches(atlas, font)
+    mismatched = set()
+    while pairs:
+        glyph = max(CHARSET, key=lambda glyph: sum(glyph in pair for pair in pairs))
+        mismatched.add(glyph)
+        pairs = [pair for pair in pairs if glyph not in pair]
+    if mismatched:
+        logging.warning("Glyphs %r of font size %d aren't blitted as draw.text renders them - left out of the atlas"
+                        % (''.join(sorted(mismatched)), font_size))
+        for glyph in mismatched:
+            del glyphs[glyph]
+    return atlas
+
+
+def mismatches(atlas, font):
+    # pairs of glyphs of the charset that blitted differ from the very same text rendered by draw.text
+    mismatched = []
+    size = (2 * max(advance for _, _, advance in atlas.glyphs.values()) + atlas.font_size + 8, 2 * atlas.font_size + 8)
+    for text in [a + b for a, b in itertools.product(CHARSET, repeat=2)]:
+        for xy in VERIFY_AT:
+            blitted = Image.new('1', size, 0)
+            rendered = Image.new('1', size, 0)
+            atlas.draw(ImageDraw.Draw(blitted), xy, text, 1)
+            ImageDraw.Draw(rendered).text(xy, text, font=font, fill=1)
+            if blitted.tobytes() != rendered.tobytes():
+                mismatched.append(text)
+                break
+    return mismatched
+
+
+def save(atlas, path):
+    # glyphs side by side, their metrics (& the box in the strip) kept in a text chunk
+    glyphs = sorted(atlas.glyphs.items())
+    width = sum(bitmap.size[0] for _, (bitmap, _, _) in glyphs if bitmap is not None)
+    height = max([bitmap.size[1] for _, (bitmap, _, _) in glyphs if bitmap is not None] or [1])
+    strip = Image.new('1', (max(1, width), height), 0)
+    metrics = {}
+    x = 0
+    for glyph, (bitmap, offset, advance) in glyphs:
+        box = None
+        if bitmap is not None:
+            box = [x, 0, x + bitmap.size[0], bitmap.size[1]]
+            strip.paste(bitmap, (x, 0))
+            x += bitmap.size[0]
+        metrics[glyph] = {'box': box, 'offset': offset, 'advance': advance}
+
+    info = PngImagePlugin.PngInfo()
+    info.add_text('atlas', json.dumps({'version': VERSION, 'font_size': atlas.font_size, 'glyphs': metrics}))
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    tmp_path = path + '.tmp'
+    strip.save(tmp_path, 'PNG', pnginfo=info)
+    os.rename(tmp_path, path)
+
+
+def load(path):
+    # None if there's no atlas or it's been built for other charset or library versions
+    if not os.path.exists(path):
+        return None
+    strip = Image.open(path)
+    strip.load()
+    definition = json.loads(strip.text['atlas'])
+    if definition['version'] != VERSION:
+        return None
+    strip = strip.convert('1')
+    glyphs = {}
+    for glyph, metrics in definition['glyphs'].items():
+        bitmap = strip.crop(metrics['box']) if metrics['box'] else None
+        glyphs[glyph] = (bitmap, tuple(metrics['offset']), metrics['advance'])
+    return GlyphAtlas(definition['font_size'], glyphs)
+
+
+def load_or_build(font, font_size, path):
+    try:
+        atlas = load(path)
+        if atlas is not None:
+            return atlas
+    except Exception as e:
+        logging.warning("Cannot load glyph atlas from %s: %s" % (path, e))
+
+    try:
+        atlas = build(font, font_size)
+    except Exception as e:
+        logging.warning("Cannot build glyph atlas of font size %d, texts will be rasterized: %s" % (font_size, e))
+        return GlyphAtlas(font_size, {})
+    try:
+        save(atlas, path)
+        logging.info("Glyph atlas of font size %d saved: %s" % (font_size, path))
+    except Exception as e:
+        logging.warning("Cannot save glyph atlas to %s: %s" % (path, e))
+    return atlas
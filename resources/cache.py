@@ -0,0 +1,152 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageFont
+
+from resources import atlas as glyph_atlas
+
+
+class ResourceCache(object):
+
+    # Fonts (per size), decoded bitmaps (scaled to the frame resolution and converted to the mode of a canvas they
+    # are pasted onto), pre-scaled clock digits and glyph atlases, loaded once and kept in memory - after a warm-up
+    # a frame is drawn without any file I/O.
+    # Images of a resolution that has a pre-scaled asset set (see resources/assets.py) are taken from it as they are.
+    # Bounded (least recently used entries go first), counts hits & misses.
+
+    FONT_PATH = './resources/font/default'
+    IMAGES_PATH = './resources/images/'
+    ICONS_PATH = './resources/icons/'
+    ATLAS_PATH = os.path.expanduser('~/.epaper-display/atlas/')
+
+
+    def __init__(self, size=128, resolution=None):
+        # resolution - (width, height) of frames the images are scaled for, it selects a pre-scaled asset set
+        self._size = size
+        self.resolution = resolution
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._font_data = None
+        self._font_hash = None
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = loader()
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        return entry
+
+
+    def font(self, size):
+        return self.get(('font', int(size)), lambda: ImageFont.truetype(io.BytesIO(self.font_data()), int(size)))
+
+
+    def font_data(self):
+        # the font file is read once, fonts of all the sizes are created from memory (FreeType won't reach for the file then)
+        if self._font_data is None:
+            with open(self.FONT_PATH, 'rb') as fp:
+                self._font_data = fp.read()
+        return self._font_data
+
+
+    def atlas(self, size):
+        # glyph atlas of a font size, loaded from disk (or built & saved there if there's none for the font file yet)
+        def load():
+            if self._font_hash is None:
+                self._font_hash = hashlib.sha1(self.font_data()).hexdigest()[:16]
+            path = os.path.join(self.ATLAS_PATH, '%s-%d.png' % (self._font_hash, int(size)))
+            return glyph_atlas.load_or_build(self.font(size), int(size), path)
+        return self.get(('atlas', int(size)), load)
+
+
+    def image(self, path, mode=None, scale=(1.0, 1.0)):
+        # mode - of a canvas the image is pasted onto, converted once here instead of by every paste
+        # scale - (x, y) factors the image is resized by (a frame resolution to the virtual canvas one)
+        return self.get(('image', path, mode, scale), lambda: self.load_image(path, mode, scale))
+
+
+    def icon(self, file_name, mode=None, scale=(1.0, 1.0)):
+        return self.image(self.ICONS_PATH + file_name, mode, scale)
+
+
+    def digit(self, character, mode=None, scale=(1.0, 1.0)):
+        # clock digits are drawn at half of the height of their bitmaps
+        def load():
+            path = self.IMAGES_PATH + ('_SPACE' if character == ' ' else character) + '.bmp'
+            img = Image.open(path)
+            size = (img.size[0], int(img.size[1] / 2))
+            prescaled = self.prescaled(path, self.scaled_size(size, scale)) if scale != (1.0, 1.0) else None
+            if prescaled is not None:
+                return self.convert(prescaled, mode)
+            return self.convert(self.scale(img.resize(size, Image.NEAREST), scale), mode)
+        return self.get(('digit', character, mode, scale), load)
+
+
+    def load_image(self, path, mode, scale):
+        img = Image.open(path)
+        prescaled = self.prescaled(path, self.scaled_size(img.size, scale)) if scale != (1.0, 1.0) else None
+        if prescaled is not None:
+            return self.convert(prescaled, mode)
+        img.load()
+        return self.convert(self.scale(img, scale), mode)
+
+
+    def set_path(self, path):
+        # the image within the asset set of the resolution, i.e. ./resources/images/800x480/back.bmp
+        return os.path.join(os.path.dirname(path), '%dx%d' % self.resolution, os.path.basename(path))
+
+
+    def prescaled(self, path, size):
+        # the image of the asset set (already scaled & thresholded), None if there's no set or the image doesn't match
+        if self.resolution is None:
+            return None
+        path = self.set_path(path)
+        if not os.path.exists(path):
+            return None
+        img = Image.open(path)
+        if img.size != size:
+            logging.warning("Pre-scaled image %s is %dx%d instead of %dx%d - ignored, regenerate the asset set" % ((path,) + img.size + size))
+            return None
+        img.load()
+        return img
+
+
+    def scaled_size(self, size, scale):
+        return (max(1, int(round(size[0] * scale[0]))), max(1, int(round(size[1] * scale[1]))))
+
+
+    def scale(self, img, scale):
+        if scale == (1.0, 1.0):
+            return img
+        # resampled in greyscale (once per image) and thresholded - dithering would leave dotted edges
+        return img.convert('L').resize(self.scaled_size(img.size, scale), Image.LANCZOS).point(lambda value: 255 if value >= 128 else 0)
+
+
+    def convert(self, img, mode):
+        return img.convert(mode) if mode and img.mode != mode else img
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -17,6 +17,11 @@ exit 1
 #export EPAPER_DEBUG_MODE=true
 # An extension to above DEBUG_MODE - useful for Travis CI - don't loop endlessly, just exit after fist display of data
 #export EPAPER_DEBUG_MODE_DONT_LOOP=true
+# Hardware backend - 'rpi' (default) or 'fake' - a software stand-in for GPIO & SPI that runs the real display drivers on any box,
+# simulates display refresh times (multiplied by EPAPER_FAKE_TIME_SCALE) and optionally saves decoded frames to EPAPER_FAKE_OUTPUT_DIR
+#export EPAPER_HW_BACKEND=fake
+#export EPAPER_FAKE_TIME_SCALE=1.0
+#export EPAPER_FAKE_OUTPUT_DIR=/tmp
 
 # Experimental modification of LUT tables that form waveforms that refresh "pixels" - implemented only for 2.7" displays.
 # This modification makes refresh about 10 times faster for black die, and 2-3 times faster for red die. This of course has
@@ -25,6 +30,66 @@ exit 1
 # Enable this feature on your own responsibility!
 #export EPAPER_FAST_REFRESH=true
 
+# LUT profiles (2.7" only) used to refresh clock ticks, details screens and to clean the display up (see epds/lut_profiles.py).
+# Clock ticks use 'fast' profile if EPAPER_FAST_REFRESH is enabled. Own profiles may be put as json files in EPAPER_LUT_DIR.
+#export EPAPER_CLOCK_LUT=standard
+#export EPAPER_DETAILS_LUT=standard
+#export EPAPER_MAINTENANCE_LUT=deep-clean
+#export EPAPER_LUT_DIR=~/.epaper-display/luts
+
+# An hour when anti-ghosting display maintenance (flashing black, white & red screens) may run, once a day.
+# The more refreshes (especially fast ones) since the last run, the longer it takes. It's interrupted by buttons and resumed afterwards.
+#export EPAPER_MAINTENANCE_HOUR=3
+
+# How many seconds before a minute tick the main screen is rendered, so it's pushed to the display right at the tick.
+#export EPAPER_PRERENDER_SECONDS=5
+
+# Deep sleep of the display between refreshes (lowers idle current): always (default), dead-times (only within DEAD_TIMES hours) or never.
+# The display is woken up (reset & init) before the next refresh.
+#export EPAPER_DEEP_SLEEP=always
+
+# The main screen is composed as a single tri-color array and both display planes are packed out of it at once,
+# if NumPy is installed (pip3 install -r requirements-optional.txt). Set to false to compose it out of two PIL images as it used to be.
+#export EPAPER_NUMPY_COMPOSITOR=true
+
+# Providers with expired data are acquired concurrently by that many workers. A refresh waits for them up to the deadline
+# (in seconds) - the late ones are displayed with their cached data and update the screen at the next refresh.
+#export EPAPER_FETCH_WORKERS=4
+#export EPAPER_FETCH_DEADLINE=10
+
+# Providers' data is refreshed in the background ahead of its expiry (TTL), so rendering never waits for the network.
+# A refresh is due that many seconds before the expiry minus a random jitter (providers of equal TTLs don't fire together),
+# failed ones are retried after a while. Set to false to acquire expired data when a screen is refreshed instead.
+#export EPAPER_REFRESH_AHEAD=true
+#export EPAPER_REFRESH_AHEAD_SEC=60
+#export EPAPER_REFRESH_JITTER_SEC=30
+#export EPAPER_REFRESH_RETRY_SEC=60
+
+# Failed acquisitions of a provider are retried after exponentially growing delays (in seconds, with jitter) and the last
+# good data is displayed meanwhile - up to that many minutes past its TTL. A provider that rejects its API key (401/403)
+# isn't called anymore until its configuration changes (or ~/.epaper-display/cache/*.breaker files are removed).
+#export EPAPER_BACKOFF_BASE_SEC=30
+#export EPAPER_BACKOFF_MAX_SEC=1800
+#export EPAPER_STALE_MAX_MINUTES=180
+
+# Providers share HTTP connections kept alive per host (a pool of that many) - GETs failed to connect, timed out
+# or answered with 5xx are retried that many times (POSTs never). Timeouts (in seconds) of connecting and of reading
+# a response - all of them cut down to EPAPER_FETCH_DEADLINE of an acquisition.
+#export EPAPER_HTTP_POOL_SIZE=2
+#export EPAPER_HTTP_RETRIES=1
+#export EPAPER_HTTP_CONNECT_TIMEOUT=2
+#export EPAPER_HTTP_READ_TIMEOUT=4
+
+# Layout of the main screen - regions, assets, fonts, data bindings and warning rules (see render_plan.py).
+# Copy resources/layouts/main.json and point to the copy to change the screen without code edits.
+#export EPAPER_LAYOUT=./resources/layouts/main.json
+
+# Partial refresh - implemented only for 4.2" displays. Only the changed parts of the screen (i.e. minutes) are sent and refreshed.
+# A full refresh is done if more than given percent of the screen has changed or after given number of partial refreshes (to remove ghosting).
+#export EPAPER_PARTIAL_REFRESH=true
+#export EPAPER_PARTIAL_REFRESH_MAX_DIRTY_PERCENT=35
+#export EPAPER_PARTIAL_REFRESH_FULL_EVERY=30
+
 # Homebase name (a name for LAT,LON below)
 export HOME_NAME-"Home"
 # Lat & lon of your home (a base point)
@@ -101,8 +166,10 @@ export CLOCK_HRS_MINS_SEPARATOR=true
 # Whether to prefer Airly.eu local temperature if available instead of current temperature returned by weather provider. Metric (Celsius) temperature only.
 #export PREFER_AIRLY_LOCAL_TEMP=false
 
-# A type of EPAPER display you want to use - either Waveshare 4"2 (b&w) or 2"7 (tri-color) - this automatically sets EPAPER_MONO to "true" for 2"7 and to "false" for 4"2
+# A type of EPAPER display you want to use - either Waveshare 4"2 (b&w), 7"5 V2 (b&w, 800x480) or 2"7 (tri-color) - this automatically sets EPAPER_MONO to "true" for 4"2 & 7"5 and to "false" for 2"7
+# For high resolution panels (i.e. 7"5) generate a pre-scaled asset set once: python3 -m resources.assets 800x480
 #export EPAPER_TYPE=waveshare-4.2
+#export EPAPER_TYPE=waveshare-7.5
 export EPAPER_TYPE=waveshare-2.7
 # You can override the setting as whether the display is mono or not - though, it will require update (replacement) of relevant epdXinX.py library to support mono or tri-color
 #export EPAPER_MONO=true
@@ -113,5 +180,11 @@ export EPAPER_TYPE=waveshare-2.7
 #export EPAPER_GPIO_PIN_FOR_KEY2=6
 #export EPAPER_GPIO_PIN_FOR_KEY3=13
 #export EPAPER_GPIO_PIN_FOR_KEY4=19
+# SPI clock (Hz) used to transfer frames to the display - 2MHz by default, the panels should handle up to 4MHz
+#export EPAPER_SPI_SPEED_HZ=2000000
+# How long (ms) to wait for the display to finish a refresh before giving up
+#export EPAPER_BUSY_TIMEOUT_MS=40000
+# Whether to push frames to the display in background, so data fetching, rendering and buttons aren't blocked by display refresh (enabled by default)
+#export EPAPER_ASYNC_DISPLAY=true
 
 python3 main.py
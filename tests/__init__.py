@@ -0,0 +1,9 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+# Unit tests of the pure logic modules - they run on any box, display drivers talk to the fake hardware backend.
+# Run from the project directory: python3 -m unittest discover -s tests -t .
+
+import os
+
+os.environ.setdefault("EPAPER_HW_BACKEND", "fake")
+os.environ.setdefault("EPAPER_FAKE_TIME_SCALE", "0")
@@ -0,0 +1,160 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from providers import acquire
+from providers.acquire import Acquire, CacheEntry
+
+
+class Provider(Acquire):
+
+    # A provider replying with the given (status code, response text) pairs, one per acquisition
+
+    DEFAULT = ('default',)
+
+
+    def __init__(self, api_key='key', responses=()):
+        self.api_key = api_key
+        self._responses = list(responses)
+        self._acquisitions = 0
+
+
+    def cache_name(self):
+        return 'provider.json'
+
+
+    def acquire(self):
+        self._acquisitions += 1
+        return self._responses.pop(0)
+
+
+    def parse(self, data):
+        return ('parsed', data['value']) if data is not None else self.DEFAULT
+
+
+def ok(value):
+    return 200, json.dumps({'value': value})
+
+
+class AcquireTest(unittest.TestCase):
+
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(acquire, 'CACHE_DIR', tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def age(self, provider, minutes):
+        # makes the data held in memory that many minutes old
+        provider._entry = CacheEntry(provider._entry.data, time.time() - 60 * minutes, None)
+
+
+    def test_fresh_data_served_from_memory_parsed_once(self):
+        provider = Provider(responses=[ok(1)])
+        self.assertEqual(provider.get(), ('parsed', 1))
+        self.assertEqual(provider.get(), ('parsed', 1))
+        self.assertEqual(provider.cached(), ('parsed', 1))
+        self.assertEqual(provider._acquisitions, 1)
+        self.assertEqual((provider.misses, provider.hits), (1, 2))
+
+
+    def test_cache_file_read_after_restart(self):
+        Provider(responses=[ok(1)]).get()
+        restarted = Provider()
+        self.assertFalse(restarted.expired())
+        self.assertEqual(restarted.get(), ('parsed', 1))
+        self.assertEqual(restarted._acquisitions, 0)
+
+
+    def test_failures_backed_off_exponentially(self):
+        provider = Provider(responses=[(500, 'error'), (None, None), (500, 'error')])
+        for failures in [1, 2]:
+            start = time.time()
+            provider._retry_at = 0      # past the backoff
+            self.assertEqual(provider.get(), Provider.DEFAULT)
+            delay = acquire.BACKOFF_BASE_SEC * 2 ** (failures - 1)
+            self.assertTrue(start + delay / 2.0 <= provider.backoff_until() <= time.time() + delay)
+            self.assertEqual(provider.stats()['failures'], failures)
+
+        # backing off - not acquired at all
+        self.assertEqual(provider.get(), Provider.DEFAULT)
+        self.assertEqual(provider._acquisitions, 2)
+
+
+    def test_backoff_capped(self):
+        provider = Provider()
+        provider._failures = 30
+        provider.acquisition_failed(500, 'error')
+        self.assertLessEqual(provider.backoff_until(), time.time() + acquire.BACKOFF_MAX_SEC)
+
+
+    def test_recovery_resets_failures(self):
+        provider = Provider(responses=[(503, 'error'), ok(2)])
+        provider.get()
+        provider._retry_at = 0
+        self.assertEqual(provider.get(), ('parsed', 2))
+        self.assertEqual((provider.stats()['failures'], provider.backoff_until()), (0, 0))
+
+
+    def test_stale_data_served_while_failing(self):
+        provider = Provider(responses=[ok(1), (500, 'error'), (500, 'error')])
+        provider.get()
+        self.age(provider, provider.ttl() + 1)
+        self.assertTrue(provider.expired())
+        self.assertEqual(provider.get(), ('parsed', 1))
+        self.assertTrue(provider.stats()['stale'])
+
+        # too old to be served anymore
+        self.age(provider, provider.ttl() + acquire.STALE_MAX_MINUTES + 1)
+        provider._retry_at = 0
+        self.assertEqual(provider.get(), Provider.DEFAULT)
+        self.assertEqual(provider.cached(), Provider.DEFAULT)
+
+
+    def test_invalid_response_is_failure(self):
+        provider = Provider(responses=[(200, 'not json')])
+        self.assertEqual(provider.get(), Provider.DEFAULT)
+        self.assertIn('invalid response', provider.stats()['last_error'])
+
+
+    def test_circuit_opened_on_auth_error(self):
+        provider = Provider(responses=[(401, 'wrong key')])
+        self.assertEqual(provider.get(), Provider.DEFAULT)
+        self.assertTrue(provider.circuit_open())
+        self.assertEqual(provider.stats()['failures'], 0)
+        provider._retry_at = 0
+        self.assertEqual(provider.get(), Provider.DEFAULT)
+        self.assertEqual(provider._acquisitions, 1)
+
+
+    def test_circuit_persisted_until_configuration_changes(self):
+        Provider(responses=[(403, 'forbidden')]).get()
+        self.assertTrue(Provider().circuit_open())
+
+        fixed = Provider(api_key='fixed key', responses=[ok(3)])
+        self.assertFalse(fixed.circuit_open())
+        self.assertFalse(os.path.exists(fixed.breaker_path()))
+        self.assertEqual(fixed.get(), ('parsed', 3))
+
+
+    def test_newer_entry_not_overwritten_by_parsing_older_one(self):
+        provider = Provider(responses=[ok(1), ok(2)])
+        provider.get()
+        old = provider._entry
+        provider._entry = None
+        provider.load_and_cache()       # i.e. by a worker while the older data is being parsed
+        self.assertEqual(provider.parsed(old.data), ('parsed', 1))
+        self.assertEqual(provider._entry.data, {'value': 2})
+        self.assertEqual(provider.cached(), ('parsed', 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
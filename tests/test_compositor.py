@@ -0,0 +1,85 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import unittest
+from PIL import Image
+
+import compositor
+from drawing import Drawing
+from epds import epd2in7b, epd4in2, fake_hw
+from epds.packer import FramePacker
+from providers.airly import Airly
+from providers.gmaps import GMaps
+from providers.openweather import OpenWeather
+from widgets import MainScreen
+
+
+# a frame painted on both planes: an alert (red box), AQI and the second ETA above their warning levels
+INPUTS = ("1234", True, OpenWeather.DEFAULT._replace(temp=21.4, temp_min=12, temp_max=25, icon='01d', alert_description='Thunderstorms'),
+          True, True, Airly.DEFAULT._replace(aqi=180, temperature=19.5),
+          GMaps.DEFAULT._replace(time_to_dest=600, time_to_dest_in_traffic=700),
+          GMaps.DEFAULT._replace(time_to_dest=600, time_to_dest_in_traffic=1200))
+
+
+@unittest.skipIf(compositor.numpy is None, "NumPy is not installed")
+class TriColorCompositorTest(unittest.TestCase):
+
+
+    def frames(self, width, height, is_mono):
+        # the main screen composed by the compositor and drawn on canvases (the reference)
+        drawing = Drawing('si', 10, 75, 50, 50, width, height)
+        main_screen = MainScreen(drawing)
+        frame = main_screen.compose(compositor.TriColorCompositor(width, height), is_mono, *INPUTS)
+        return frame, drawing.draw_frame(is_mono, *INPUTS)
+
+
+    def test_packed_as_canvases_are(self):
+        for width, height, is_mono, rotate, invert in [(400, 300, True, False, False), (264, 176, False, True, True), (264, 176, False, False, False)]:
+            frame, canvases = self.frames(width, height, is_mono)
+            planes = 1 if is_mono else 2
+            if rotate:
+                canvases = [canvas.transpose(Image.ROTATE_90) for canvas in canvases]
+            packer_size = canvases[0].size
+            expected = [bytes(FramePacker(packer_size[0], packer_size[1], invert).pack(canvas)) for canvas in canvases[:planes]]
+            self.assertEqual(frame.packed(invert, rotate, planes), expected, "%dx%d, rotate: %s" % (width, height, rotate))
+
+
+    def test_planes_of_layers(self):
+        # red painted on 4x4, black on 2x2 within it - on top, red stays beneath (bits of other planes are kept)
+        frame = compositor.TriColorCompositor(8, 8)
+        red = Image.new('1', (4, 4), 0)
+        black = Image.new('1', (2, 2), 0)
+        frame.apply(compositor.make_layer([None, (red, Image.new('1', (4, 4), 1), (2, 2))]))
+        frame.apply(compositor.make_layer([(black, Image.new('1', (2, 2), 1), (3, 3)), None]))
+        self.assertEqual(frame.frame[3:5, 3:5].tolist(), [[3, 3], [3, 3]])
+        self.assertEqual(int(frame.frame[2, 2]), compositor.RED)
+        self.assertEqual(int(frame.frame.sum()), 16 * compositor.RED + 4 * compositor.BLACK)
+
+        # white painted (within the mask) clears the plane
+        white = Image.new('1', (4, 4), 1)
+        frame.apply(compositor.make_layer([None, (white, Image.new('1', (4, 4), 1), (2, 2))]))
+        self.assertEqual(frame.frame[3:5, 3:5].tolist(), [[1, 1], [1, 1]])
+        self.assertEqual(int(frame.frame.sum()), 4 * compositor.BLACK)
+
+
+    def test_nothing_painted_is_no_layer(self):
+        self.assertIsNone(compositor.make_layer([None, None]))
+
+
+    def test_displayed_on_fake_panel(self):
+        # the packed planes sent by the drivers are decoded by the fake panel back into the canvases
+        frame, (black, red) = self.frames(400, 300, True)
+        epd = epd4in2.EPD()
+        epd.init()
+        epd.display_frame(frame.packed(epd.PACKER_INVERT, False, 1)[0], full=True)
+        self.assertEqual(fake_hw.PANEL.frames[-1][0].tobytes(), black.tobytes())
+
+        frame, canvases = self.frames(264, 176, False)
+        epd = epd2in7b.EPD()
+        epd.init()
+        epd.display_frame(*frame.packed(epd.PACKER_INVERT, True, 2))
+        for decoded, canvas in zip(fake_hw.PANEL.frames[-1], canvases):
+            self.assertEqual(decoded.tobytes(), canvas.transpose(Image.ROTATE_90).tobytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
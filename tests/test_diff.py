@@ -0,0 +1,67 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import unittest
+
+from epds import diff
+
+
+WIDTH = 64     # 8 bytes a row
+HEIGHT = 100
+
+
+def frame(changes=()):
+    # a white packed frame, changes - (x_byte, y) set to black
+    data = bytearray(b'\xff' * (WIDTH // 8 * HEIGHT))
+    for x_byte, y in changes:
+        data[y * WIDTH // 8 + x_byte] = 0
+    return bytes(data)
+
+
+class DirtyWindowsTest(unittest.TestCase):
+
+
+    def test_identical_frames_have_no_windows(self):
+        self.assertEqual(diff.dirty_windows(frame(), frame(), WIDTH, HEIGHT), [])
+
+
+    def test_window_covers_changed_bytes_only(self):
+        windows = diff.dirty_windows(frame(), frame([(2, 5), (4, 5)]), WIDTH, HEIGHT)
+        self.assertEqual(windows, [(2, 5, 5, 6)])
+
+
+    def test_rows_within_gap_are_merged(self):
+        windows = diff.dirty_windows(frame(), frame([(1, 10), (6, 20)]), WIDTH, HEIGHT, row_gap=16)
+        self.assertEqual(windows, [(1, 7, 10, 21)])
+
+
+    def test_rows_further_apart_are_separate_windows(self):
+        windows = diff.dirty_windows(frame(), frame([(1, 10), (6, 40)]), WIDTH, HEIGHT, row_gap=16)
+        self.assertEqual(windows, [(1, 2, 10, 11), (6, 7, 40, 41)])
+
+
+    def test_too_many_windows_are_merged_into_bounding_one(self):
+        changes = [(1, 0), (3, 30), (5, 60), (7, 90)]
+        windows = diff.dirty_windows(frame(), frame(changes), WIDTH, HEIGHT, row_gap=16, max_windows=3)
+        self.assertEqual(windows, [(1, 8, 0, 91)])
+
+
+    def test_first_and_last_bytes_of_row(self):
+        windows = diff.dirty_windows(frame(), frame([(0, 99), (7, 99)]), WIDTH, HEIGHT)
+        self.assertEqual(windows, [(0, 8, 99, 100)])
+
+
+class WindowsTest(unittest.TestCase):
+
+
+    def test_ratio_of_frame_covered(self):
+        self.assertEqual(diff.windows_ratio([(0, 4, 0, 50)], WIDTH, HEIGHT), 0.25)
+        self.assertEqual(diff.windows_ratio([(0, 8, 0, 100)], WIDTH, HEIGHT), 1.0)
+
+
+    def test_window_bytes_row_by_row(self):
+        new = frame([(2, 5), (3, 6)])
+        self.assertEqual(diff.window_bytes(new, (2, 4, 5, 7), WIDTH), b'\x00\xff\xff\x00')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import time
+import unittest
+from unittest import mock
+
+from epds import epdif, fake_hw
+
+
+class WaitUntilIdleTest(unittest.TestCase):
+
+
+    def setUp(self):
+        patcher = mock.patch.object(fake_hw, 'TIME_SCALE', 1.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def test_woken_up_by_edge_of_busy_pin(self):
+        for busy_ms in [30, 250]:
+            fake_hw.PANEL.set_busy(busy_ms)
+            elapsed = epdif.epd_wait_until_idle('test')
+            self.assertGreaterEqual(elapsed, busy_ms - 1)
+            self.assertLess(elapsed, busy_ms + 50)
+        self.assertEqual(fake_hw.GPIO._callbacks, {})     # edge detection removed
+
+
+    def test_idle_panel_not_waited_for(self):
+        fake_hw.PANEL.set_busy(0)
+        self.assertLess(epdif.epd_wait_until_idle('test'), 5)
+
+
+    def test_gives_up_after_timeout(self):
+        fake_hw.PANEL.set_busy(1000)
+        start = time.time()
+        epdif.epd_wait_until_idle('test', timeout_ms=100)
+        self.assertLess(time.time() - start, 0.3)
+        fake_hw.PANEL.set_busy(0)
+
+
+    def test_polls_if_edge_detection_taken(self):
+        fake_hw.GPIO.add_event_detect(epdif.BUSY_PIN, fake_hw.GPIO.RISING)
+        self.addCleanup(fake_hw.GPIO.remove_event_detect, epdif.BUSY_PIN)
+        fake_hw.PANEL.set_busy(50)
+        self.assertLess(epdif.epd_wait_until_idle('test'), 100)
+        self.assertIn(epdif.BUSY_PIN, fake_hw.GPIO._callbacks)     # somebody else's - kept
+
+
+if __name__ == '__main__':
+    unittest.main()
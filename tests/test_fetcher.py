@@ -0,0 +1,103 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import threading
+import time
+import unittest
+
+from providers import http_client
+from providers.fetcher import Fetcher
+
+
+class Provider(object):
+
+    # A stand-in of Acquire: expired until acquired, acquisitions take delay seconds (or until released)
+
+
+    def __init__(self, delay=0, fresh=False):
+        self.delay = delay
+        self.fresh = fresh
+        self.acquisitions = 0
+        self.deadline = None
+        self.release = threading.Event()
+
+
+    def expired(self):
+        return not self.fresh
+
+
+    def cached(self):
+        return ('data', self.acquisitions)
+
+
+    def get(self):
+        self.deadline = getattr(http_client._timing, 'deadline', None)
+        self.release.wait(self.delay)
+        self.acquisitions += 1
+        self.fresh = True
+        return self.cached()
+
+
+    def refresh(self):
+        self.get()
+        return True
+
+
+class FetcherTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.fetcher = Fetcher(workers=4, deadline=0.5)
+
+
+    def tearDown(self):
+        self.fetcher._executor.shutdown(wait=True)
+
+
+    def test_fresh_data_served_from_memory(self):
+        provider = Provider(fresh=True)
+        self.assertEqual(self.fetcher.fetch({'p': provider, 'none': None}), {'p': ('data', 0)})
+        self.assertEqual(provider.acquisitions, 0)
+
+
+    def test_expired_providers_acquired_concurrently(self):
+        providers = dict(('p%d' % i, Provider(delay=0.2)) for i in range(3))
+        start = time.time()
+        results = self.fetcher.fetch(providers)
+        self.assertLess(time.time() - start, 0.4)
+        self.assertEqual(results, dict((name, ('data', 1)) for name in providers))
+        self.assertEqual(self.fetcher.late, 0)
+
+
+    def test_late_provider_served_cached_data_and_acquired_in_background(self):
+        slow, fast = Provider(delay=5), Provider()
+        start = time.time()
+        results = self.fetcher.fetch({'slow': slow, 'fast': fast})
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(results, {'slow': ('data', 0), 'fast': ('data', 1)})
+        self.assertEqual(self.fetcher.late, 1)
+
+        # still acquiring - not submitted once more, waited for (within the deadline) by the next fetch
+        slow.release.set()
+        self.assertEqual(self.fetcher.fetch({'slow': slow}), {'slow': ('data', 1)})
+        self.assertEqual(slow.acquisitions, 1)
+
+
+    def test_not_acquired_if_refreshed_ahead(self):
+        provider = Provider()
+        self.assertEqual(self.fetcher.fetch({'p': provider}, acquire=False), {'p': ('data', 0)})
+        self.assertEqual(provider.acquisitions, 0)
+
+
+    def test_requests_of_acquisition_bound_by_deadline(self):
+        fetcher = Fetcher(workers=1, deadline=0.5)
+        provider = Provider()
+        start = time.time()
+        fetcher.fetch({'p': provider})
+        self.assertAlmostEqual(provider.deadline, start + 0.5, delta=0.1)
+        # ...not past the acquisition - later tasks of the worker aren't bound by it
+        self.assertIsNone(fetcher._executor.submit(lambda: getattr(http_client._timing, 'deadline', None)).result())
+        fetcher._executor.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
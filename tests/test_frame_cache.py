@@ -0,0 +1,80 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import unittest
+from PIL import Image
+
+from frame_cache import FrameCache
+
+
+class FrameCacheTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.cache = FrameCache(size=2)
+        self.encoded = []
+        self.buffer = bytearray()
+
+
+    def encoder(self, image):
+        self.encoded.append(image)
+        return bytearray(image.tobytes())
+
+
+    def reusing_encoder(self, image):
+        # as FramePacker does - the same buffer returned every time
+        self.buffer[:] = image.tobytes()
+        return self.buffer
+
+
+    def test_frame_on_panel_is_skipped(self):
+        digest = self.cache.digest(b'black', b'red')
+        self.assertFalse(self.cache.on_panel(digest))
+        self.cache.displayed(digest)
+        self.assertTrue(self.cache.on_panel(digest))
+        self.assertFalse(self.cache.on_panel(self.cache.digest(b'black', b'other red')))
+        self.assertEqual(self.cache.stats()['refreshes'], 1)
+        self.assertEqual(self.cache.stats()['skipped_refreshes'], 1)
+
+
+    def test_unknown_panel_state_skips_nothing(self):
+        digest = self.cache.digest(b'black', None)
+        self.cache.displayed(digest)
+        self.cache.displayed(None)      # i.e. a failed refresh
+        self.assertFalse(self.cache.on_panel(digest))
+
+
+    def test_digest_tells_planes_apart(self):
+        self.assertNotEqual(self.cache.digest(b'ab', b''), self.cache.digest(b'a', b'b'))
+        self.assertNotEqual(self.cache.digest(b'black', None), self.cache.digest(None, b'black'))
+
+
+    def test_image_encoded_once(self):
+        image = Image.new('1', (16, 4), 1)
+        first = self.cache.encode(image, self.encoder)
+        second = self.cache.encode(image.copy(), self.encoder)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.encoded), 1)
+        self.assertEqual((self.cache.encode_hits, self.cache.encode_misses), (1, 1))
+
+
+    def test_encoded_copy_kept(self):
+        # encoders reuse their buffers - the cache must not keep a reference to one
+        white, black = Image.new('1', (16, 1), 1), Image.new('1', (16, 1), 0)
+        self.cache.encode(white, self.reusing_encoder)
+        self.cache.encode(black, self.reusing_encoder)
+        self.assertEqual(self.cache.encode(white, self.reusing_encoder), b'\xff\xff')
+
+
+    def test_least_recently_used_evicted(self):
+        images = [Image.new('1', (8, 1), color) for color in [0, 1]] + [Image.new('1', (16, 1), 0)]
+        self.cache.encode(images[0], self.encoder)
+        self.cache.encode(images[1], self.encoder)
+        self.cache.encode(images[0], self.encoder)     # the most recently used now
+        self.cache.encode(images[2], self.encoder)     # evicts images[1]
+        self.cache.encode(images[0], self.encoder)
+        self.cache.encode(images[1], self.encoder)
+        self.assertEqual(self.encoded, [images[0], images[1], images[2], images[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from providers import http_client
+from providers.http_client import HttpClient
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    # Replies with the next status code of the server's script, after a delay if it's a (status, seconds) pair
+
+
+    def reply(self):
+        self.server.requests.append(self.command)
+        status = self.server.script.pop(0) if self.server.script else 200
+        if isinstance(status, tuple):
+            status, delay = status
+            time.sleep(delay)
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+
+    do_GET = reply
+    do_POST = reply
+
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.server.requests = []
+        self.server.script = []
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = 'http://127.0.0.1:%d/' % self.server.server_address[1]
+        self.client = HttpClient(pool_size=1, retries=1)
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def test_get_retried_on_server_error(self):
+        self.server.script = [503]
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.server.requests, ['GET', 'GET'])
+        self.assertEqual(self.client.stats()['requests'], 1)
+
+
+    def test_post_not_retried(self):
+        self.server.script = [503]
+        self.assertEqual(self.client.post(self.url).status_code, 503)
+        self.assertEqual(self.server.requests, ['POST'])
+
+
+    def test_no_retry_past_deadline(self):
+        # the backoff (0.5s) would end after the deadline
+        self.server.script = [503]
+        with http_client.deadline(0.3):
+            self.assertEqual(self.client.get(self.url).status_code, 503)
+        self.assertEqual(self.server.requests, ['GET'])
+
+
+    def test_timeouts_cut_to_deadline(self):
+        self.server.script = [(200, 2), (200, 2)]
+        start = time.time()
+        with http_client.deadline(0.5):
+            self.assertRaises(requests.exceptions.Timeout, self.client.get, self.url, timeout=(2, 4))
+        self.assertLess(time.time() - start, 1.0)
+
+
+    def test_nothing_sent_once_deadline_passed(self):
+        with http_client.deadline(0):
+            self.assertRaises(requests.exceptions.Timeout, self.client.get, self.url)
+        self.assertEqual(self.server.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
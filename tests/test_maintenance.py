@@ -0,0 +1,108 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from maintenance import Maintenance
+
+
+WINDOW = datetime(2024, 1, 10, 3, 15)
+NEXT_DAY = datetime(2024, 1, 11, 3, 15)
+NOON = datetime(2024, 1, 10, 12, 0)
+
+
+class MaintenanceTest(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmp.name, 'state', 'maintenance.json')
+        self.maintenance = Maintenance(3, self.state_path)
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+    def refreshes(self, lut, count):
+        for i in range(count):
+            self.maintenance.record_refresh(lut)
+
+
+    def run_cleaning(self, dt, limit=None):
+        # the kinds of frames displayed, stops after limit steps (as if interrupted)
+        steps = []
+        while self.maintenance.due(dt) and (limit is None or len(steps) < limit):
+            steps.append(self.maintenance.next_step())
+            self.maintenance.step_done(dt)
+        return steps
+
+
+    def test_ghosting_weighted_by_lut(self):
+        self.refreshes('standard', 3)
+        self.refreshes('fast', 2)
+        self.refreshes('partial', 5)
+        self.refreshes('deep-clean', 1)
+        self.refreshes('unknown', 1)
+        self.assertEqual(self.maintenance.state['ghosting'], 3 + 2 * 4 + 5 * 2 + 0 + 1)
+        self.assertEqual(self.maintenance.state['refreshes'], {'standard': 3, 'fast': 2, 'partial': 5, 'deep-clean': 1, 'unknown': 1})
+
+
+    def test_due_within_window_only(self):
+        self.refreshes('standard', 1)
+        self.assertTrue(self.maintenance.due(WINDOW))
+        self.assertFalse(self.maintenance.due(NOON))
+
+
+    def test_not_due_without_ghosting(self):
+        self.assertFalse(self.maintenance.due(WINDOW))
+
+
+    def test_cycles_planned_by_ghosting(self):
+        for ghosting, cycles in [(1, 1), (1000, 1), (1001, 2), (2500, 3), (100000, Maintenance.MAX_CYCLES)]:
+            self.maintenance.state.update(ghosting=ghosting, cycles=0)
+            self.maintenance.next_step()
+            self.assertEqual(self.maintenance.state['cycles'], cycles, "ghosting %d" % ghosting)
+
+
+    def test_cleaning_runs_all_cycles_once_a_day(self):
+        self.refreshes('fast', 300)     # 1200 - 2 cycles
+        steps = self.run_cleaning(WINDOW)
+        self.assertEqual(steps, Maintenance.CYCLE * 2)
+        self.assertEqual(self.maintenance.state['ghosting'], 0)
+        self.assertEqual(self.maintenance.state['refreshes'], {})
+        self.assertFalse(self.maintenance.in_progress())
+
+        self.refreshes('standard', 1)
+        self.assertFalse(self.maintenance.due(WINDOW))     # already done today
+        self.assertTrue(self.maintenance.due(NEXT_DAY))
+
+
+    def test_interrupted_cleaning_resumed_outside_window(self):
+        self.refreshes('fast', 300)
+        self.assertEqual(self.run_cleaning(WINDOW, 5), Maintenance.CYCLE[:5])
+        self.assertTrue(self.maintenance.due(NOON))
+        self.assertEqual(self.run_cleaning(NOON), (Maintenance.CYCLE * 2)[5:])
+        self.assertFalse(self.maintenance.due(NOON))
+
+
+    def test_cleaning_resumed_after_restart(self):
+        self.refreshes('standard', 10)
+        self.run_cleaning(WINDOW, 3)
+        restarted = Maintenance(3, self.state_path)
+        self.assertTrue(restarted.in_progress())
+        self.assertEqual(restarted.state['step'], 3)
+        self.assertEqual(restarted.next_step(), Maintenance.CYCLE[3])
+
+
+    def test_refreshes_saved_in_batches(self):
+        self.refreshes('standard', Maintenance.SAVE_EVERY - 1)
+        self.assertFalse(os.path.exists(self.state_path))
+        self.refreshes('standard', 1)
+        self.assertEqual(Maintenance(3, self.state_path).state['ghosting'], Maintenance.SAVE_EVERY)
+
+
+if __name__ == '__main__':
+    unittest.main()
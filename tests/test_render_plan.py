@@ -0,0 +1,69 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import unittest
+
+import render_plan
+from drawing import Drawing
+
+
+class NumberTest(unittest.TestCase):
+
+
+    def test_simple_fractions(self):
+        self.assertEqual(render_plan.number(100), 100)
+        self.assertEqual(render_plan.number(2.5), 2.5)
+        self.assertEqual(render_plan.number("550/3"), 550 / 3.0)
+        self.assertEqual(render_plan.numbers(["140/3", 35]), [140 / 3.0, 35])
+        self.assertIsNone(render_plan.number(None))
+        self.assertRaises(ValueError, render_plan.number, "a third")
+
+
+    def test_layout_geometry_given_by_fractions(self):
+        drawing = Drawing('si', 10, 75, 50, 50)
+        eta1 = [widget for widget in drawing.plan.widgets if widget.name == 'eta1'][0]
+        self.assertEqual((eta1.ops[0].xy, eta1.ops[1].x), ((266, 100), 50 + 2 * 400 / 3.0))
+
+
+class ShrinkTest(unittest.TestCase):
+
+    # ETA & AQI texts shrink the way they always have: ETA to 2/3 and then 1/2 of 70, AQI to 2/3 of 90 (moved down
+    # by 15) - while wider than 100 pixels of the canvas
+
+
+    def setUp(self):
+        self.drawing = Drawing('si', 10, 75, 50, 50)
+        self.drawn = []
+        self.drawing.draw_glyphs = lambda xy, text, font_size, draw, color=0: self.drawn.append((font_size, xy))
+        self.ops = dict((widget.name, [op for op in widget.ops if isinstance(op, render_plan.TextOp)][0])
+                        for widget in self.drawing.plan.widgets if widget.name in ['eta0', 'aqi'])
+
+
+    def draw(self, name, text):
+        del self.drawn[:]
+        render_plan.draw_text(self.ops[name], self.drawing, None, text, 0)
+        return self.drawn[0]
+
+
+    def test_eta_shrunk_in_steps(self):
+        op = self.ops['eta0']
+        self.assertEqual(self.draw('eta0', ' 5'), (70, op.xy))
+        self.assertEqual(self.draw('eta0', '99'), (70, op.xy))
+        self.assertEqual(self.draw('eta0', '123'), (46, op.xy))
+        self.assertEqual(self.draw('eta0', '12345'), (35, op.xy))
+
+
+    def test_aqi_shrunk_and_moved_down(self):
+        op = self.ops['aqi']
+        self.assertEqual(self.draw('aqi', '  5'), (90, op.xy))
+        self.assertEqual(self.draw('aqi', '180'), (60, (op.xy[0], op.xy[1] + 15)))
+
+
+    def test_shrink_steps_scaled_with_fonts(self):
+        drawing = Drawing('si', 10, 75, 50, 50, 264, 176)
+        op = [op for widget in drawing.plan.widgets if widget.name == 'eta0' for op in widget.ops if isinstance(op, render_plan.TextOp)][0]
+        self.assertEqual(op.shrink_sizes, tuple(drawing.font_size(size) for size in [70, 70 * 2 / 3.0, 35]))
+        self.assertEqual(op.shrink_width, 100 * drawing.scale_font)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+
+from providers.scheduler import RefreshScheduler
+
+
+class Provider(object):
+
+    # A stand-in of Acquire: data expiring at the given time, refreshes succeed unless failing is set
+
+
+    def __init__(self, expires_at=None, ttl=10, circuit=False, backoff_until=0, failing=False):
+        self._expires_at = expires_at
+        self._ttl = ttl
+        self.circuit = circuit
+        self._backoff_until = backoff_until
+        self.failing = failing
+        self.refreshes = 0
+
+
+    def ttl(self):
+        return self._ttl
+
+
+    def expired(self):
+        return self._expires_at is None or self._expires_at <= time.time()
+
+
+    def expires_at(self):
+        return self._expires_at
+
+
+    def circuit_open(self):
+        return self.circuit
+
+
+    def backoff_until(self):
+        return self._backoff_until
+
+
+    def refresh(self):
+        self.refreshes += 1
+        if not self.failing:
+            self._expires_at = time.time() + 60 * self._ttl
+        return not self.failing
+
+
+class Fetcher(object):
+
+    # Acquires right away (on the calling thread), remembers what has been submitted
+
+
+    def __init__(self):
+        self.submitted = []
+        self.event = threading.Event()
+
+
+    def submit(self, name, provider, ahead):
+        future = Future()
+        future.set_result(provider.refresh())
+        self.submitted.append((name, ahead))
+        self.event.set()
+        return future
+
+
+class RefreshSchedulerTest(unittest.TestCase):
+
+
+    def scheduler(self, providers, **kwargs):
+        self.fetcher = Fetcher()
+        return RefreshScheduler(self.fetcher, providers, **kwargs)
+
+
+    def test_refresh_due_ahead_of_expiry_with_jitter(self):
+        now = time.time()
+        scheduler = self.scheduler({'p': Provider(expires_at=now + 600)}, lead=60, jitter=30)
+        for i in range(20):
+            due = scheduler.schedule('p', False)
+            self.assertTrue(now + 600 - 60 - 30 <= due <= now + 600 - 60 + 1, due - now)
+
+
+    def test_short_ttl_not_refreshed_before_half_of_it(self):
+        now = time.time()
+        scheduler = self.scheduler({'p': Provider(expires_at=now + 60, ttl=2)}, lead=100, jitter=0)
+        self.assertAlmostEqual(scheduler.schedule('p', False), now + 60 - 30 * 2, delta=1)
+
+
+    def test_failed_refresh_retried_after_while_or_backoff(self):
+        now = time.time()
+        scheduler = self.scheduler({'p': Provider(expires_at=now + 600), 'backing_off': Provider(backoff_until=now + 900)},
+                                   retry=60, jitter=30)
+        due = scheduler.schedule('p', True)
+        self.assertTrue(now + 60 <= due <= now + 90 + 1, due - now)
+        self.assertAlmostEqual(scheduler.schedule('backing_off', True), now + 900, delta=1)
+
+
+    def test_circuit_open_not_refreshed(self):
+        scheduler = self.scheduler({'p': Provider(expires_at=time.time() + 600, circuit=True)})
+        self.assertIsNone(scheduler.schedule('p', False))
+        self.assertNotIn('p', scheduler.stats()['due_s'])
+
+
+    def test_warm_up_acquires_expired_providers(self):
+        fresh, expired, failing = Provider(expires_at=time.time() + 600), Provider(), Provider(failing=True)
+        scheduler = self.scheduler({'fresh': fresh, 'expired': expired, 'failing': failing, 'none': None}, retry=60)
+        scheduler.start()
+        self.assertEqual(sorted(self.fetcher.submitted), [('expired', False), ('failing', False)])
+        stats = scheduler.stats()
+        self.assertEqual((stats['refreshes'], stats['failures']), (2, 1))
+        self.assertEqual(sorted(stats['due_s']), ['expired', 'failing', 'fresh'])
+        self.assertGreaterEqual(stats['due_s']['failing'], 59)
+
+
+    def test_refreshed_in_background_when_due(self):
+        # TTL of 0.01 minute - refreshed in the middle of it (0.3s)
+        provider = Provider(expires_at=time.time() + 0.6, ttl=0.01)
+        scheduler = self.scheduler({'p': provider}, lead=0, jitter=0)
+        scheduler.start()
+        self.assertTrue(self.fetcher.event.wait(2))
+        self.assertEqual(self.fetcher.submitted, [('p', True)])
+        self.assertEqual(provider.refreshes, 1)
+        # rescheduled once the refresh is done (by its future's callback)
+        for i in range(100):
+            if scheduler.stats()['refreshes']:
+                break
+            time.sleep(0.01)
+        self.assertEqual(scheduler.stats()['refreshes'], 1)
+        self.assertGreater(scheduler.stats()['due_s']['p'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
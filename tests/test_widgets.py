@@ -0,0 +1,47 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+import unittest
+
+from drawing import Drawing
+from providers.airly import Airly
+from providers.gmaps import GMaps
+from providers.openweather import OpenWeather
+from widgets import MainScreen
+
+
+WEATHER = OpenWeather.DEFAULT._replace(temp=21.4, temp_min=12, temp_max=25, icon='01d')
+AQI = Airly.DEFAULT._replace(aqi=180, temperature=19.5)
+GMAPS1 = GMaps.DEFAULT._replace(time_to_dest=600, time_to_dest_in_traffic=700)
+GMAPS2 = GMaps.DEFAULT._replace(time_to_dest=600, time_to_dest_in_traffic=1200)
+
+
+class MainScreenTest(unittest.TestCase):
+
+
+    def assert_as_drawn(self, main_screen, is_mono, *inputs):
+        frame = main_screen.draw_frame(is_mono, *inputs)
+        expected = main_screen.drawing.draw_frame(is_mono, *inputs)
+        self.assertEqual([plane.tobytes() for plane in frame], [plane.tobytes() for plane in expected])
+
+
+    def test_frames_as_drawn(self):
+        alerts = [None, 'Thunderstorms', 'Zażółć gęślą jaźń']     # the last one out of glyph atlases
+        for width, height, is_mono in [(400, 300, True), (264, 176, False), (800, 480, True)]:
+            main_screen = MainScreen(Drawing('si', 10, 75, 50, 50, width, height))
+            for alert in alerts:
+                for black_on_red in [False, True]:
+                    self.assert_as_drawn(main_screen, is_mono, "1234", True, WEATHER._replace(alert_description=alert), True,
+                                         black_on_red, AQI, GMAPS1, GMAPS2)
+
+
+    def test_minute_tick_renders_clock_only(self):
+        main_screen = MainScreen(Drawing('si', 10, 75, 50, 50, 264, 176))
+        for formatted_time in ["1234", "1235", "1236"]:
+            self.assert_as_drawn(main_screen, False, formatted_time, True, WEATHER, True, False, AQI, GMAPS1, GMAPS2)
+        renders = main_screen.stats()
+        self.assertEqual(renders.pop('clock'), 3)
+        self.assertEqual(set(renders.values()), {1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,3 +7,13 @@ export EPAPER_DEBUG_MODE_DONT_LOOP=true
 export WEATHERBIT_IO_KEY="travis-test"
 
 python3 main.py
+
+# the same, but through the real display drivers talking to the fake hardware backend
+export EPAPER_DEBUG_MODE=false
+export EPAPER_HW_BACKEND=fake
+export EPAPER_FAKE_TIME_SCALE=0.01
+
+python3 main.py
+
+# rendering benchmark suite - per stage timings & allocations, fails on regressions if a baseline is stored
+python3 -m benchmarks.suite --repeat 3 --output /tmp/epaper-benchmarks.json
@@ -0,0 +1,115 @@
+# https://github.com/pskowronek/epaper-clock-and-more, Apache 2 license
+
+from PIL import Image
+
+import compositor
+import render_plan
+from render_plan import FrameInputs
+
+
+class Widget(object):
+
+    # A region of the main screen rendered into cached tiles (black & red), re-rendered only if the data it depends on
+    # has changed. A tile keeps the pixels the widget has painted (and a mask of them) - to find them out the widget is
+    # rendered once, on greyscale canvases filled with UNPAINTED: the drawing operations paint black (0) or white
+    # (1 or 255) only, so the pixels left UNPAINTED are the ones the widget hasn't painted.
+
+    UNPAINTED = 128
+
+
+    def __init__(self, name, depends_on, render):
+        self.name = name
+        self._depends_on = depends_on   # FrameInputs -> tuple of values the widget depends on
+        self._render = render           # (black_buf, red_buf, FrameInputs) -> None
+        self._key = None
+        self._tiles = []
+        self._layer = None
+        self.renders = 0
+
+
+    def update(self, drawing, is_mono, inputs):
+        # returns True if the widget had to be re-rendered
+        key = (is_mono, drawing.width, drawing.height) + tuple(self._depends_on(inputs))
+        if key == self._key:
+            return False
+        self._tiles = [self.tile(painted) for painted in self.render_painted(drawing, is_mono, inputs)]
+        self._layer = None
+        self._key = key
+        self.renders += 1
+        return True
+
+
+    def render_painted(self, drawing, is_mono, inputs):
+        black_buf = Image.new('L', (drawing.width, drawing.height), self.UNPAINTED)
+        red_buf = black_buf if is_mono else Image.new('L', black_buf.size, self.UNPAINTED)
+        self._render(black_buf, red_buf, inputs)
+        return [black_buf] if is_mono else [black_buf, red_buf]
+
+
+    def tile(self, painted):
+        mask = painted.point(lambda value: 0 if value == self.UNPAINTED else 255, '1')
+        box = mask.getbbox()
+        if box is None:
+            return None     # nothing painted on this plane
+        return painted.crop(box).point(lambda value: 255 if value else 0, '1'), mask.crop(box), box[:2]
+
+
+    def paste(self, *planes):
+        for plane, tile in zip(planes, self._tiles):
+            if tile is not None:
+                plane.paste(tile[0], tile[2], tile[1])
+
+
+    def layer(self):
+        # the tiles as a layer of the tri-color compositor, made once per render
+        if self._layer is None:
+            self._layer = compositor.make_layer(self._tiles) or ()
+        return self._layer
+
+
+class MainScreen(object):
+
+    # Retained version of Drawing.draw_frame - the frame is composed of cached widget tiles (in the same order
+    # draw_frame paints them, so the output is pixel-identical), so a minute tick re-renders the clock only.
+
+
+    def __init__(self, drawing):
+        self.drawing = drawing
+        self.widgets = [self.widget(widget_plan) for widget_plan in drawing.plan.widgets]
+
+
+    def widget(self, widget_plan):
+        # a widget of the main screen's render plan
+        return Widget(widget_plan.name,
+                      lambda i: render_plan.key_of(widget_plan, self.drawing.plan, i),
+                      lambda black_buf, red_buf, i: self.drawing.draw_widget(widget_plan, black_buf, red_buf, i))
+
+
+    def draw_frame(self, is_mono, formatted_time, use_hrs_mins_separator, weather, prefer_airly_local_temp, black_on_red, aqi, gmaps1, gmaps2):
+        inputs = FrameInputs(formatted_time, use_hrs_mins_separator, weather, prefer_airly_local_temp, black_on_red, aqi, gmaps1, gmaps2)
+
+        black_buf = self.drawing.new_canvas(1)
+        red_buf = black_buf if (is_mono) else self.drawing.new_canvas(1)
+        for widget in self.widgets:
+            widget.update(self.drawing, is_mono, inputs)
+            widget.paste(black_buf, red_buf)
+
+        return black_buf, red_buf
+
+
+    def compose(self, frame, is_mono, formatted_time, use_hrs_mins_separator, weather, prefer_airly_local_temp, black_on_red, aqi, gmaps1, gmaps2):
+        # the same as draw_frame, but the widgets are applied onto the frame of TriColorCompositor
+        inputs = FrameInputs(formatted_time, use_hrs_mins_separator, weather, prefer_airly_local_temp, black_on_red, aqi, gmaps1, gmaps2)
+
+        frame.clear()
+        for widget in self.widgets:
+            widget.update(self.drawing, is_mono, inputs)
+            if widget.layer():
+                frame.apply(widget.layer())
+
+        return frame
+
+
+    def stats(self):
+        # renders per widget
+        return dict((widget.name, widget.renders) for widget in self.widgets)